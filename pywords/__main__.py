@@ -0,0 +1,4 @@
+import sys
+from pywords.cli import main
+
+sys.exit(main())
@@ -0,0 +1,172 @@
+'''
+Command-line batch analyzer
+
+Reads words or running text from files (or stdin) and writes one JSON object per token to
+stdout, so PyWORDS can be used in Unix pipelines:
+    $ echo "Puella aquam portat" | pywords
+    {"token": "puella", "matches": [{"id": 31169, "unique": false, "stem": "puell", "ending": "a", "pos": "N", ...}]}
+    $ pywords --parts-of-speech V --jobs 4 texts/*.txt > verbs.jsonl
+
+Each output line has the `token` (lowercase, as split by utils.iter_tokens()) and its list of
+`matches`; a token which can't be matched has an empty list. Each match has the dictline entry
+`id` (its line in DICTLINE.tsv, starting at 0), the matched `stem` and `ending`, the entry's
+`stem_ids` which matched, its part of speech `pos`, the dictionary `entry` codes and senses, and
+the possible `inflections` of the token for that entry (see lookup.get_match_inflections()).
+Matches of irregular forms from UNIQUES.tsv or ESSE.tsv (e.g. est) have `unique` set to true; they
+are not DICTLINE entries, so their `id` is -1 and their `stem` is the whole form. Other matches
+have `unique` false.
+
+Filters correspond to MatchFilter attributes and take comma-separated codes, e.g.
+`--ages F,G --frequencies A,B`. Dictionary entry filters (part of speech, age, frequency,
+declension, ...) remove matches, inflection filters (cases, tenses, ...) narrow the listed
+inflections. --no-substantives removes the noun forms of adjectives, as lookup_word() does with
+MatchFilter(substantives=False). Tokens are analyzed in batches (see --batch-size) and each batch
+is written as soon as it is done. With --jobs, batches are analyzed in worker processes; the
+output order is always the order of the input.
+'''
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+
+import pywords.definitions as definitions
+import pywords.lookup as lookup
+import pywords.utils as pwutils
+from pywords.matchfilter import MatchFilter
+
+DEFAULT_BATCH_SIZE = 1000  # tokens
+
+# MatchFilter list attributes which can be set from the command line
+_filter_names = ['parts_of_speech', 'ages', 'areas', 'geographies', 'frequencies', 'sources', 'variants',
+                 'noun_declensions', 'verb_conjugations', 'adj_declensions', 'noun_kinds', 'verb_kinds',
+                 'number_kinds', 'pronoun_kinds', 'comparisons', 'genders', 'cases', 'numbers', 'persons',
+                 'tenses', 'voices', 'moods']
+
+# Filter used by _analyze_batch(), set by _init_worker() in each worker process
+_worker_filter = [None]
+
+
+def _infl_to_json(infl):
+    """
+    Return an inflection as a JSON-serializable dictionary of its codes
+    """
+    infl_json = {'pos': definitions.get_inflection_pos(infl)}
+    infl_json.update((name, getattr(infl, name)) for name in infl._fields if name != 'ending_uvij')
+    return infl_json
+
+
+def _match_to_json(m: lookup.WordMatch, filt: MatchFilter, lexicon: lookup.Lexicon):
+    entry = m.dl_entry
+    infls = lexicon.get_match_inflections(m)
+    return {'id': m.dl_id,
+            'unique': m.unique,
+            'stem': m.match_stem,
+            'ending': m.match_ending,
+            'stem_ids': m.get_stem_ids(),
+            'pos': entry.pos,
+            'entry': {name: getattr(entry, name) for name in entry._fields},
+            'inflections': [_infl_to_json(infl) for infl in infls
+                            if filt.check_inflection(infl, definitions.get_inflection_pos(infl))]}
+
+
+def analyze_tokens(tokens, filt=MatchFilter(), lexicon=None):
+    """
+    Return a list of JSON-serializable records, one for each token in `tokens` (a list of words)
+    Words are looked up in `lexicon` (default: the default lexicon).
+    """
+    lexicon = lexicon or lookup.get_default_lexicon()
+    records = []
+    for token,matches in zip(tokens, lexicon.match_words(tokens)):
+        if filt.substantives is False:
+            matches = filt.remove_substantives(matches)
+        records.append({'token': token,
+                        'matches': [_match_to_json(m, filt, lexicon) for m in matches
+                                    if filt.check_dictline_word(m.dl_entry)]})
+    return records
+
+
+def _init_worker(filt):
+    _worker_filter[0] = filt
+    lookup.warm()
+
+
+def _analyze_batch(tokens):
+    """
+    Analyze a batch of tokens in a worker, return the output lines
+    """
+    return [json.dumps(record) for record in analyze_tokens(tokens, _worker_filter[0])]
+
+
+def _iter_batches(fnames, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Yield lists of up to `batch_size` tokens from the files `fnames` ('-' is stdin), in order
+    """
+    for fname in fnames:
+        if fname == '-':
+            tokens = pwutils.iter_tokens(sys.stdin)
+            yield from iter(lambda: list(itertools.islice(tokens, batch_size)), [])
+        else:
+            with open(fname) as f:
+                tokens = pwutils.iter_tokens(f)
+                yield from iter(lambda: list(itertools.islice(tokens, batch_size)), [])
+
+
+def build_filter(args):
+    """
+    Return the MatchFilter for parsed command-line arguments
+    """
+    return MatchFilter(substantives=not args.no_substantives,
+                       **{name: getattr(args, name).split(',') for name in _filter_names if getattr(args, name)})
+
+
+def _positive_int(s):
+    try:
+        n = int(s)
+    except ValueError:
+        n = 0
+    if n < 1:
+        raise argparse.ArgumentTypeError("must be a positive integer, not {0}".format(s))
+    return n
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(prog='pywords',
+                                     description='Analyze Latin words or text, writing one JSON object per token.')
+    parser.add_argument('files', nargs='*', default=['-'], help="Files to read (default: stdin, also '-')")
+    parser.add_argument('-j', '--jobs', type=_positive_int, default=1, help='Number of worker processes (default: %(default)s)')
+    parser.add_argument('--batch-size', type=_positive_int, default=DEFAULT_BATCH_SIZE,
+                        help='Tokens analyzed per batch (default: %(default)s)')
+    filters = parser.add_argument_group('filters', 'Comma-separated codes, see pywords/matchfilter.py')
+    filters.add_argument('--no-substantives', action='store_true',
+                         help='Remove noun forms of adjectives, see MatchFilter.remove_substantives()')
+    for name in _filter_names:
+        filters.add_argument('--' + name.replace('_', '-'), metavar='CODES', default='')
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    filt = build_filter(args)
+    batches = _iter_batches(args.files, args.batch_size)
+    try:
+        if args.jobs > 1:
+            with multiprocessing.Pool(args.jobs, initializer=_init_worker, initargs=(filt,)) as pool:
+                for lines in pool.imap(_analyze_batch, batches):
+                    sys.stdout.write(''.join(line + '\n' for line in lines))
+        else:
+            _init_worker(filt)
+            for batch in batches:
+                sys.stdout.write(''.join(line + '\n' for line in _analyze_batch(batch)))
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # e.g. piped into `head`; send the rest of the output nowhere instead of printing a traceback
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
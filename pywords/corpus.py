@@ -0,0 +1,187 @@
+'''
+Parallel analysis of large texts and collections of texts
+
+The text is split into chunks which are analyzed by a pool of worker processes. Each worker
+loads the dictionary once when it starts (from the snapshot, see snapshot.py) and then
+looks up the words of every chunk it is given, like utils.get_vocab_list(). Chunk results are
+merged and sorted, so the result does not depend on the number of processes or the order in
+which chunks finish.
+
+Example:
+    >>> from pywords.corpus import analyze_directory
+    >>> result = analyze_directory('texts/cicero', processes=8)
+    >>> result.definitions[:3], result.missed[:3], result.word_counts['et']
+'''
+
+import os
+import os.path
+import multiprocessing
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import pywords.lookup as lookup
+import pywords.utils as pwutils
+from pywords.matchfilter import MatchFilter
+
+DEFAULT_CHUNK_SIZE = 256*1024  # characters
+
+# Worker settings, set by _init_worker() in each worker process
+_worker_settings = {}
+
+
+@dataclass
+class CorpusAnalysis:
+    """
+    Result of a corpus analysis
+
+    @params
+        definitions     Sorted list of dictionary strings for all words found
+        missed          Sorted list of words that could not be matched
+        word_counts     Number of occurrences of each (lowercase) word
+    """
+    definitions: List[str] = field(default_factory=list)
+    missed: List[str] = field(default_factory=list)
+    word_counts: Dict[str, int] = field(default_factory=dict)
+
+
+def _init_worker(filt, full_info, markdown_fmt):
+    """
+    Pool initializer, load the dictionary once per worker
+    """
+    _worker_settings['filt'] = filt
+    _worker_settings['full_info'] = full_info
+    _worker_settings['markdown_fmt'] = markdown_fmt
+    lookup.warm()
+
+
+def _analyze_chunk(text):
+    """
+    Analyze one chunk of text in a worker
+    Return (set of dictionary strings, set of missed words, Counter of words)
+    """
+    words = pwutils._split_words(text)
+    defns,missed = pwutils._get_word_definitions(words, _worker_settings['filt'],
+                                                  _worker_settings['full_info'],
+                                                  _worker_settings['markdown_fmt'])
+    return (defns, missed, Counter(words))
+
+
+def _is_word_sep(c):
+    """
+    Return True if the character `c` separates words, see utils.iter_tokens()
+    Chunks only break there: other whitespace, such as tabs, doesn't separate words.
+    """
+    return pwutils._word_sep_re.match(c) is not None
+
+
+def chunk_text(text, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Split `text` into chunks of about `chunk_size` characters, only breaking before a word
+    separator (see _is_word_sep()) so that no word is cut in half. Return a generator of strings.
+    """
+    start = 0
+    while start < len(text):
+        end = start + chunk_size
+        if end < len(text):
+            # Move the end forward to the next word separator
+            while end < len(text) and not _is_word_sep(text[end]):
+                end += 1
+        yield text[start:end]
+        start = end
+
+
+def _chunk_files(fnames, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Read each file in turn, in blocks of `chunk_size` characters, and yield chunks which only
+    break at word separators (see _is_word_sep()). Only about one chunk is in memory at a time.
+    """
+    for fname in fnames:
+        rest = ''
+        with open(fname, 'r') as f:
+            while True:
+                block = f.read(chunk_size)
+                if not block:
+                    break
+                text = rest + block
+                # Keep the (possibly incomplete) last word for the next chunk
+                idx = len(text)
+                while idx > 0 and not _is_word_sep(text[idx-1]):
+                    idx -= 1
+                if idx == 0:
+                    rest = text  # No word separator yet
+                    continue
+                yield text[:idx]
+                rest = text[idx:]
+        if rest:
+            yield rest
+
+
+def analyze_chunks(chunks, processes=None, filt=MatchFilter(), full_info=False, markdown_fmt=False,
+                   vocab_list=None):
+    """
+    Analyze an iterable of text chunks with a pool of `processes` worker processes (default: one
+    per CPU). With processes=1, the chunks are analyzed in this process.
+
+    filt, full_info, markdown_fmt, and vocab_list are the same as for utils.get_vocab_list()
+    Return a CorpusAnalysis
+    """
+    processes = processes or os.cpu_count() or 1
+
+    defns = set()
+    missed = set()
+    counts = Counter()
+    if processes == 1:
+        _init_worker(filt, full_info, markdown_fmt)
+        results = map(_analyze_chunk, chunks)
+        for chunk_defns,chunk_missed,chunk_counts in results:
+            defns |= chunk_defns
+            missed |= chunk_missed
+            counts.update(chunk_counts)
+    else:
+        # Load in the parent first, so forked workers start with the dictionary already in memory
+        lookup.warm()
+        with multiprocessing.Pool(processes, initializer=_init_worker,
+                                  initargs=(filt, full_info, markdown_fmt)) as pool:
+            for chunk_defns,chunk_missed,chunk_counts in pool.imap_unordered(_analyze_chunk, chunks):
+                defns |= chunk_defns
+                missed |= chunk_missed
+                counts.update(chunk_counts)
+
+    if vocab_list:
+        vocab_definitions = pwutils._process_vocab_list_opt(vocab_list, filt, full_info, markdown_fmt)
+        defns = {d for d in defns if d not in vocab_definitions}
+
+    return CorpusAnalysis(definitions=sorted(defns),
+                          missed=sorted(missed),
+                          word_counts=dict(sorted(counts.items())))
+
+
+def analyze_text(text, processes=None, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """
+    Analyze a (long) string in parallel, see analyze_chunks() for the other arguments
+    Return a CorpusAnalysis
+    """
+    return analyze_chunks(chunk_text(text, chunk_size), processes, **kwargs)
+
+
+def analyze_files(fnames, processes=None, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """
+    Analyze a list of text files in parallel, see analyze_chunks() for the other arguments
+    Return a CorpusAnalysis
+    """
+    return analyze_chunks(_chunk_files(fnames, chunk_size), processes, **kwargs)
+
+
+def analyze_directory(dirname, extension='.txt', processes=None, chunk_size=DEFAULT_CHUNK_SIZE, **kwargs):
+    """
+    Analyze all files ending in `extension` in the directory `dirname` and its subdirectories,
+    see analyze_chunks() for the other arguments
+    Return a CorpusAnalysis
+    """
+    fnames = []
+    for root,dirs,files in os.walk(dirname):
+        for fname in files:
+            if fname.endswith(extension):
+                fnames.append(os.path.join(root, fname))
+    return analyze_files(sorted(fnames), processes, chunk_size, **kwargs)
@@ -2,7 +2,11 @@
 
 import os
 import os.path
+import sys
 import csv
+import itertools
+import operator
+import threading
 from dataclasses import dataclass
 from pywords.matchfilter import MatchFilter
 
@@ -11,15 +15,11 @@ from pywords.matchfilter import MatchFilter
 ####### GLOBALS ########
 
 # MAIN INFLECTIONS DICTIONARY
-inflections = {'N': [], 'ADJ': [], 'V': [], 'VPAR': [], 'SUPINE': [], 'PRON': [], 'NUM': [], 'ADV': [], 'PREP': []}
-# Inflections cache, each has the decl/var as key (e.g. "1 1")
-# This makes it faster to lookup possible endings, without handling all the default cases (e.g. "1 0", "0 0", which
-# are only used internally, not in the DICTLINE file)
-_noun_inflections_cached = {}
-_adj_inflections_cached = {}
-_verb_inflections_cached = {}
-_num_inflections_cached = {}
-_pron_inflections_cached = {}
+# The inflections (INFLECTS.tsv) and the lists and indexes derived from them are held by an
+# InflectionTable. The module-level functions (get_inflections(), get_possible_inflections(), ...)
+# use the default table, which is loaded on first use. Access its inflections as
+# `definitions.inflections` or get_inflections()
+_default_inflects_fname = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/INFLECTS.tsv')
 
 # For convenience, here are dictionaries converting things
 parts_of_speech = {
@@ -345,106 +345,98 @@ source_types_short = {
     'Z': 'Sent by user - no dictionary reference'}
 
 
-# TODO Are these used? Is u/v causing problems?
-irreg_sum = ['svm', 'es', 'est', 'svmvs', 'estis', 'svnt', 'eram', 'eras', 'erat', 'eramvs', 'eratis', 'erant',
-             'ero', 'eris', 'erit', 'erimvs', 'eritis', 'ervnt', 'fvi', 'fvisti', 'fvit', 'fvimvs', 'fvistis',
-             'fvervnt', 'fveram', 'fveras', 'fverat', 'fveramvs', 'fveratis', 'fverant', 'fvero', 'fveris', 'fverit',
-             'fverimvs', 'fveritis', 'fvervnt','sim', 'sis', 'sit', 'simvs', 'sitis', 'sint', 'essem', 'esses', 'esset',
-             'essemvs', 'essetis', 'essent', 'fverim', 'fveris', 'fverit', 'fverimvs', 'fveritis', 'fverint',
-             'fvissem', 'fvisses', 'fvisset', 'fvissemvs', 'fvissetis', 'fvissent']
-
 # @global
 # OR'd List of Endings
-endings_list_uvij = [
-    '', 'a', 'abam', 'abamini', 'abamur', 'abamus', 'abant', 'abantur', 'abar',
-    'abare', 'abaris', 'abas', 'abat', 'abatis', 'abatur', 'abere', 'aberis',
-    'abimini', 'abimur', 'abimus', 'abis', 'abit', 'abitis', 'abitur', 'abo',
-    'abor', 'abunt', 'abuntur', 'abus', 'ac', 'ad', 'ae', 'aec', 'ai', 'am',
-    'amini', 'amur', 'amus', 'an', 'anc', 'anda', 'andae', 'andam', 'andarum',
-    'andas', 'ande', 'andi', 'andis', 'ando', 'andorum', 'andos', 'andum', 'andus',
-    'ans', 'ant', 'ante', 'antem', 'antes', 'anti', 'antia', 'antibus', 'antis',
-    'antium', 'anto', 'antor', 'antum', 'antur', 'ar', 'are', 'arem', 'aremini',
-    'aremur', 'aremus', 'arent', 'arentur', 'arer', 'arere', 'areris', 'ares',
-    'aret', 'aretis', 'aretur', 'ari', 'arier', 'aris', 'arum', 'arun', 'as', 'at',
-    'ate', 'atis', 'ato', 'ator', 'atote', 'atur', 'bam', 'bamini', 'bamur',
-    'bamus', 'bant', 'bantur', 'bar', 'bare', 'baris', 'bas', 'bat', 'batis',
-    'batur', 'bere', 'beris', 'berit', 'bimini', 'bimur', 'bimus', 'bis', 'bit',
-    'bitis', 'bitur', 'bo', 'bor', 'bunt', 'buntur', 'd', 'e', 'eam', 'eamini',
-    'eamur', 'eamus', 'eant', 'eantur', 'ear', 'eare', 'earis', 'eas', 'eat',
-    'eatis', 'eatur', 'ebam', 'ebamini', 'ebamur', 'ebamus', 'ebant', 'ebantur',
-    'ebar', 'ebare', 'ebaris', 'ebas', 'ebat', 'ebatis', 'ebatur', 'ebere',
-    'eberis', 'ebimini', 'ebimur', 'ebimus', 'ebis', 'ebit', 'ebitis', 'ebitur',
-    'ebo', 'ebor', 'ebunt', 'ebuntur', 'ebus', 'ed', 'ei', 'eis', 'em', 'eme',
-    'emini', 'emur', 'emus', 'en', 'enda', 'endae', 'endam', 'endarum', 'endas',
-    'ende', 'endi', 'endis', 'endo', 'endorum', 'endos', 'endum', 'endus', 'ens',
-    'ent', 'ente', 'entem', 'entes', 'enti', 'entia', 'entibus', 'entis', 'entium',
-    'ento', 'entor', 'entum', 'entur', 'enus', 'eo', 'eor', 'er', 'eram', 'eramus',
-    'erant', 'eras', 'erat', 'eratis', 'ere', 'erem', 'eremini', 'eremur', 'eremus',
-    'erent', 'erentur', 'erer', 'erere', 'ereris', 'eres', 'eret', 'eretis',
-    'eretur', 'eri', 'erier', 'erim', 'erimus', 'erint', 'eris', 'erit', 'eritis',
-    'ero', 'erum', 'erunt', 'es', 'ese', 'esse', 'essem', 'essemus', 'essent',
-    'esses', 'esset', 'essetis', 'est', 'este', 'estis', 'esto', 'estote', 'et',
-    'ete', 'etis', 'eto', 'etor', 'etote', 'etur', 'eu', 'fore', 'forem', 'foremus',
-    'forent', 'fores', 'foret', 'foretis', 'i', 'ia', 'iant', 'ias', 'iat', 'ibam',
-    'ibamus', 'ibant', 'ibas', 'ibat', 'ibatis', 'ibe', 'ibei', 'ibi', 'ibus', 'ic',
-    'id', 'iens', 'ier', 'iere', 'ieri', 'ies', 'ihi', 'ii', 'iis', 'im', 'imini',
-    'imur', 'imus', 'in', 'int', 'ire', 'irem', 'iremini', 'iremur', 'iremus',
-    'irent', 'irentur', 'irer', 'irere', 'ireris', 'ires', 'iret', 'iretis',
-    'iretur', 'iri', 'irier', 'iris', 'is', 'isse', 'issem', 'issemus', 'issent',
-    'isses', 'isset', 'issetis', 'isti', 'istis', 'it', 'ite', 'itis', 'ito',
-    'itor', 'itote', 'itur', 'ium', 'ius', 'jus', 'le', 'lem', 'lemus', 'lent',
-    'les', 'let', 'letis', 'ma', 'mae', 'mam', 'marum', 'mas', 'me', 'mi', 'mini',
-    'mis', 'mo', 'morum', 'mos', 'mum', 'mur', 'mus', 'o', 'obis', 'obus', 'oc',
-    'od', 'oe', 'om', 'on', 'or', 'ora', 'ore', 'orem', 'ores', 'ori', 'oribus',
-    'oris', 'orum', 'orun', 'os', 're', 'rem', 'remini', 'remur', 'remus', 'rent',
-    'rentur', 'rer', 'rere', 'reris', 'res', 'ret', 'retis', 'retur', 'ri', 'rier',
-    'ris', 's', 'se', 'sem', 'semus', 'sent', 'ses', 'set', 'setis', 'setur', 't',
-    'te', 'tis', 'to', 'tor', 'tote', 'tur', 'u', 'ua', 'ubus', 'uc', 'ud', 'ui',
-    'um', 'um', 'umus', 'un', 'unc', 'unda', 'undae', 'undam', 'undarum', 'undas',
-    'unde', 'undi', 'undis', 'undo', 'undorum', 'undos', 'undum', 'undus', 'unt',
-    'unte', 'untem', 'untes', 'unti', 'untia', 'untibus', 'untis', 'untium', 'unto',
-    'untor', 'untur', 'ura', 'urae', 'uram', 'urarum', 'uras', 'ure', 'uri', 'uris',
-    'uro', 'urorum', 'uros', 'urum', 'urus', 'us', 'ut', 'uum', 'uus', 'yn', 'yos'
-]
-endings_list_vi = [e.replace('j', 'i').replace('u', 'v') for e in endings_list_uvij]
+# endings_list_uvij and endings_list_vi are derived from the loaded inflections (INFLECTS.tsv) on
+# first access, see get_endings() and EndingTrie
 
 ####### /GLOBALS #######
 ########################
 
 
+#####################################
+####### VALUE TYPES #################
+
+class _ValueType:
+    """
+    Base class for dictionary entries and inflections: equality and hashing by field values
+
+    Subclasses list their identifying fields in `_fields`. Two objects are equal if they are the
+    same class and all of these fields are equal. The hash is computed from the field values the
+    first time it is needed and then cached, so objects must not be modified after they are built.
+    """
+
+    __slots__ = ('_hash',)
+    _fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._get_fields = staticmethod(operator.attrgetter(*cls._fields))
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if other.__class__ is not self.__class__:
+            return False
+        return hash(self) == hash(other) and self._get_fields(self) == other._get_fields(other)
+
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(self._get_fields(self))
+            return self._hash
+
+    def __getstate__(self):
+        # Same state as the default pickling, without the cached hash (string hashes differ between processes)
+        slots = {}
+        for cls in self.__class__.__mro__:
+            for name in cls.__dict__.get('__slots__', ()):
+                if name != '_hash' and hasattr(self, name):
+                    slots[name] = getattr(self, name)
+        return (getattr(self, '__dict__', None), slots)
+
+####### /VALUE TYPES ################
+#####################################
+
+
 #####################################
 ####### DICTIONARY ENTRIES ##########
 
-class DictlineBaseEntry:
+class DictlineBaseEntry(_ValueType):
     """
     dictline entry
     Base class for dictline entries, providing dictionary codes
     """
 
+    # Compact storage, there is one instance per DICTLINE row
+    __slots__ = ('pos', 'age', 'area', 'geog', 'freq', 'src', 'senses')
+    _fields = ('pos', 'age', 'area', 'geog', 'freq', 'src', 'senses')
+
     def __init__(self, pos: str, age: str, area: str, geog: str, freq: str, src: str, senses: str):
         # These are required by every entry, cannot be empty string
         if pos in parts_of_speech.keys():
-            self.pos = pos
+            self.pos = sys.intern(pos)
         else:
             raise ValueError("Unexpected dictline entry part of speech '{0}'".format(pos))
         if age in ages.keys():
-            self.age = age
+            self.age = sys.intern(age)
         else:
             raise ValueError("Unexpected dictline entry age '{0}'".format(age))
         if area in areas.keys():
-            self.area = area
+            self.area = sys.intern(area)
         else:
             raise ValueError("Unexpected dictline entry subject area '{0}'".format(area))
         if geog in geographies.keys():
-            self.geog = geog
+            self.geog = sys.intern(geog)
         else:
             raise ValueError("Unexpected dictline entry geography '{0}'".format(geog))
         if freq in dict_frequencies.keys():
-            self.freq = freq
+            self.freq = sys.intern(freq)
         else:
             raise ValueError("Unexpected dictline entry frequency '{0}'".format(freq))
         if src in source_types.keys():
-            self.src = src
+            self.src = sys.intern(src)
         else:
             raise ValueError("Unexpected dictline entry source '{0}'".format(src))
         if senses:  # If not None or ''
@@ -500,18 +492,23 @@ class DictlineNounEntry(DictlineBaseEntry):
     machine-readable information.
     """
 
+    __slots__ = ('decl', 'variant', 'gender', 'noun_kind')
+
+    _fields = ('pos', 'decl', 'variant', 'gender', 'noun_kind', 'age', 'area', 'geog', 'freq', 'src',
+               'senses')
+
     def __init__(self, pos: str, decl: str, variant: str, gender: str, noun_kind: str, age: str, area: str, geog: str,
                  freq: str, src: str, senses: str):
         super().__init__(pos, age, area, geog, freq, src, senses)
-        self.decl = decl  # declension
-        self.variant = variant  # declension variant (see INFLECTS.LAT)
+        self.decl = sys.intern(decl)  # declension
+        self.variant = sys.intern(variant)  # declension variant (see INFLECTS.LAT)
         if gender in genders.keys():
-            self.gender = gender
+            self.gender = sys.intern(gender)
         else:
             raise ValueError( "Attempting to initialize gender as '{0}' but this is not a valid gender.".format(gender))
 
         if noun_kind in noun_kinds.keys():
-            self.noun_kind = noun_kind
+            self.noun_kind = sys.intern(noun_kind)
 
     def get_declension(self):
         return noun_declensions[self.decl]
@@ -529,24 +526,6 @@ class DictlineNounEntry(DictlineBaseEntry):
                "', area='" + self.area + "', geog='" + self.geog + "', src='" + self.src + \
                "', senses='" + self.senses + "')"
 
-    def __eq__(self,other):
-        if not isinstance(other,DictlineNounEntry):
-            return False
-        return self.pos == other.pos and \
-               self.decl == other.decl and \
-               self.variant == other.variant and \
-               self.gender == other.gender and \
-               self.noun_kind == other.noun_kind and \
-               self.age == other.age and \
-               self.area == other.area and \
-               self.geog == other.geog and \
-               self.freq == other.freq and \
-               self.src == other.src and \
-               self.senses == other.senses
-
-    def __hash__(self):
-        return hash(repr(self))
-
 
 class DictlineVerbEntry(DictlineBaseEntry):
     """
@@ -555,13 +534,17 @@ class DictlineVerbEntry(DictlineBaseEntry):
     machine-readable information.
     """
 
+    __slots__ = ('conj', 'variant', 'verb_kind')
+
+    _fields = ('pos', 'conj', 'variant', 'verb_kind', 'age', 'area', 'geog', 'freq', 'src', 'senses')
+
     def __init__(self, pos: str, conj: str, variant: str, verb_kind: str, age: str, area: str, geog: str, freq: str,
                  src: str, senses: str):
         super().__init__(pos, age, area, geog, freq, src, senses)
-        self.conj = conj  # conjugation
-        self.variant = variant  # conjugation variant (see INFLECTS.LAT)
+        self.conj = sys.intern(conj)  # conjugation
+        self.variant = sys.intern(variant)  # conjugation variant (see INFLECTS.LAT)
         if verb_kind == '' or verb_kind in verb_kinds.keys():
-            self.verb_kind = verb_kind
+            self.verb_kind = sys.intern(verb_kind)
         else:
             raise ValueError("Attempting to initialize verb kind as '{0}' but this is not a valid verb kind.".format(verb_kind))
 
@@ -577,20 +560,6 @@ class DictlineVerbEntry(DictlineBaseEntry):
                "', area='" + self.area + "', geog='" + self.geog + "', src='" + self.src + \
                "', senses='" + self.senses + "')"
 
-    def __eq__(self,other):
-        if not isinstance(other,DictlineVerbEntry):
-            return False
-        return self.pos == other.pos and \
-               self.conj == other.conj and \
-               self.variant == other.variant and \
-               self.verb_kind == other.verb_kind and \
-               self.age == other.age and \
-               self.area == other.area and \
-               self.geog == other.geog and \
-               self.freq == other.freq and \
-               self.src == other.src and \
-               self.senses == other.senses
-
 
 class DictlineAdjectiveEntry(DictlineBaseEntry):
     """
@@ -599,12 +568,16 @@ class DictlineAdjectiveEntry(DictlineBaseEntry):
     machine-readable information.
     """
 
+    __slots__ = ('decl', 'variant', 'comparison')
+
+    _fields = ('pos', 'decl', 'variant', 'comparison', 'age', 'area', 'geog', 'freq', 'src', 'senses')
+
     def __init__(self, pos, decl, variant, comparison, age, area, geog, freq, src, senses):
         super().__init__(pos, age, area, geog, freq, src, senses)
-        self.decl = decl  # declension
-        self.variant = variant  # adjective variant (see INFLECTS.LAT)
+        self.decl = sys.intern(decl)  # declension
+        self.variant = sys.intern(variant)  # adjective variant (see INFLECTS.LAT)
         if comparison in comparisons.keys():
-            self.comparison = comparison
+            self.comparison = sys.intern(comparison)
         else:
             raise ValueError("Attempting to initialize adjective with unrecognized comparison '{0}'".format(comparison))
 
@@ -621,23 +594,6 @@ class DictlineAdjectiveEntry(DictlineBaseEntry):
                "', area='" + self.area + "', geog='" + self.geog + "', src='" + self.src + \
                "', senses='" + self.senses + "')"
 
-    def __eq__(self,other):
-        if not isinstance(other,DictlineAdjectiveEntry):
-            return False
-        return self.pos == other.pos and \
-               self.decl == other.decl and \
-               self.variant == other.variant and \
-               self.comparison == other.comparison and \
-               self.age == other.age and \
-               self.area == other.area and \
-               self.geog == other.geog and \
-               self.freq == other.freq and \
-               self.src == other.src and \
-               self.senses == other.senses
-
-    def __hash__(self):
-        return hash(repr(self))
-
 
 class DictlineAdverbEntry(DictlineBaseEntry):
     """
@@ -646,10 +602,14 @@ class DictlineAdverbEntry(DictlineBaseEntry):
     machine-readable information.
     """
 
+    __slots__ = ('comparison',)
+
+    _fields = ('pos', 'comparison', 'age', 'area', 'geog', 'freq', 'src', 'senses')
+
     def __init__(self, pos, comparison, age, area, geog, freq, src, senses):
         super().__init__(pos, age, area, geog, freq, src, senses)
         if comparison in comparisons.keys():
-            self.comparison = comparison
+            self.comparison = sys.intern(comparison)
         else:
             raise ValueError("Attempting to initialize adjective with unrecognized comparison '{0}'".format(comparison))
 
@@ -662,21 +622,6 @@ class DictlineAdverbEntry(DictlineBaseEntry):
                "', area='" + self.area + "', geog='" + self.geog + "', src='" + self.src + \
                "', senses='" + self.senses + "')"
 
-    def __eq__(self,other):
-        if not isinstance(other,DictlineAdverbEntry):
-            return False
-        return self.pos == other.pos and \
-               self.comparison == other.comparison and \
-               self.age == other.age and \
-               self.area == other.area and \
-               self.geog == other.geog and \
-               self.freq == other.freq and \
-               self.src == other.src and \
-               self.senses == other.senses
-
-    def __hash__(self):
-        return hash(repr(self))
-
 
 class DictlinePronounEntry(DictlineBaseEntry):
     """
@@ -687,12 +632,16 @@ class DictlinePronounEntry(DictlineBaseEntry):
     NOTE: 'pos' can be PRON or PACK
     """
 
+    __slots__ = ('decl', 'variant', 'pronoun_kind')
+
+    _fields = ('pos', 'decl', 'variant', 'pronoun_kind', 'age', 'area', 'geog', 'freq', 'src', 'senses')
+
     def __init__(self, pos, decl, variant, pronoun_kind, age, area, geog, freq, src, senses):
         super().__init__(pos, age, area, geog, freq, src, senses)
-        self.decl = decl  # declension TODO
-        self.variant = variant
+        self.decl = sys.intern(decl)  # declension TODO
+        self.variant = sys.intern(variant)
         if pronoun_kind in pronoun_kinds.keys():
-            self.pronoun_kind = pronoun_kind
+            self.pronoun_kind = sys.intern(pronoun_kind)
         else:
             raise ValueError("Attempting to initialize pronoun kind with unrecognized kind '{0}'".format(pronoun_kind))
 
@@ -703,23 +652,6 @@ class DictlinePronounEntry(DictlineBaseEntry):
                "', area='" + self.area + "', geog='" + self.geog + "', src='" + self.src + \
                "', senses='" + self.senses + "')"
 
-    def __eq__(self,other):
-        if not isinstance(other,DictlinePronounEntry):
-            return False
-        return self.pos == other.pos and \
-               self.decl == other.decl and \
-               self.variant == other.variant and \
-               self.pronoun_kind == other.pronoun_kind and \
-               self.age == other.age and \
-               self.area == other.area and \
-               self.geog == other.geog and \
-               self.freq == other.freq and \
-               self.src == other.src and \
-               self.senses == other.senses
-
-    def __hash__(self):
-        return hash(repr(self))
-
 
 class DictlineConjunctionEntry(DictlineBaseEntry):
     """
@@ -728,6 +660,10 @@ class DictlineConjunctionEntry(DictlineBaseEntry):
     machine-readable information.
     """
 
+    __slots__ = ()
+
+    _fields = ('pos', 'age', 'area', 'geog', 'freq', 'src', 'senses')
+
     def __init__(self, pos, age, area, geog, freq, src, senses):
         super().__init__(pos, age, area, geog, freq, src, senses)
 
@@ -736,20 +672,6 @@ class DictlineConjunctionEntry(DictlineBaseEntry):
                "', area='" + self.area + "', geog='" + self.geog + "', src='" + self.src + \
                "', senses='" + self.senses + "')"
 
-    def __eq__(self,other):
-        if not isinstance(other,DictlineConjunctionEntry):
-            return False
-        return self.pos == other.pos and \
-               self.age == other.age and \
-               self.area == other.area and \
-               self.geog == other.geog and \
-               self.freq == other.freq and \
-               self.src == other.src and \
-               self.senses == other.senses
-
-    def __hash__(self):
-        return hash(repr(self))
-
 
 class DictlineInterjectionEntry(DictlineBaseEntry):
     """
@@ -758,6 +680,10 @@ class DictlineInterjectionEntry(DictlineBaseEntry):
     machine-readable information.
     """
 
+    __slots__ = ()
+
+    _fields = ('pos', 'age', 'area', 'geog', 'freq', 'src', 'senses')
+
     def __init__(self, pos, age, area, geog, freq, src, senses):
         super().__init__(pos, age, area, geog, freq, src, senses)
 
@@ -766,20 +692,6 @@ class DictlineInterjectionEntry(DictlineBaseEntry):
                "', area='" + self.area + "', geog='" + self.geog + "', src='" + self.src + \
                "', senses='" + self.senses + "')"
 
-    def __eq__(self,other):
-        if not isinstance(other,DictlineInterjectionEntry):
-            return False
-        return self.pos == other.pos and \
-               self.age == other.age and \
-               self.area == other.area and \
-               self.geog == other.geog and \
-               self.freq == other.freq and \
-               self.src == other.src and \
-               self.senses == other.senses
-
-    def __hash__(self):
-        return hash(repr(self))
-
 
 class DictlinePrepositionEntry(DictlineBaseEntry):
     """
@@ -788,10 +700,14 @@ class DictlinePrepositionEntry(DictlineBaseEntry):
     machine-readable information.
     """
 
+    __slots__ = ('case',)
+
+    _fields = ('pos', 'case', 'age', 'area', 'geog', 'freq', 'src', 'senses')
+
     def __init__(self, pos, case, age, area, geog, freq, src, senses):
         super().__init__(pos, age, area, geog, freq, src, senses)
         if case in ['ACC','ABL','GEN']:
-            self.case = case
+            self.case = sys.intern(case)
         else:
             raise ValueError("Unexpected preposition auxiliary case '{0}', valid options are ACC, ABL, and GEN".format(case))
 
@@ -804,21 +720,6 @@ class DictlinePrepositionEntry(DictlineBaseEntry):
                "', area='" + self.area + "', geog='" + self.geog + "', src='" + self.src + \
                "', senses='" + self.senses + "')"
 
-    def __eq__(self,other):
-        if not isinstance(other,DictlinePrepositionEntry):
-            return False
-        return self.pos == other.pos and \
-              self.case == other.case and \
-               self.age == other.age and \
-               self.area == other.area and \
-               self.geog == other.geog and \
-               self.freq == other.freq and \
-               self.src == other.src and \
-               self.senses == other.senses
-
-    def __hash__(self):
-        return hash(repr(self))
-
 
 class DictlineNumberEntry(DictlineBaseEntry):
     """
@@ -827,16 +728,20 @@ class DictlineNumberEntry(DictlineBaseEntry):
     machine-readable information.
     """
 
+    __slots__ = ('decl', 'variant', 'number_kind', 'number')
+
+    _fields = ('pos', 'decl', 'variant', 'number_kind', 'age', 'area', 'geog', 'freq', 'src', 'senses')
+
     def __init__(self, pos, decl, variant, number_kind, number, age, area, geog, freq, src, senses):
         super().__init__(pos, age, area, geog, freq, src, senses)
-        self.decl = decl  # declension
-        self.variant = variant  # adjective variant (see INFLECTS.LAT)
-        self.number_kind = number_kind
+        self.decl = sys.intern(decl)  # declension
+        self.variant = sys.intern(variant)  # adjective variant (see INFLECTS.LAT)
+        self.number_kind = sys.intern(number_kind)
         if number_kind in number_kinds.keys():
-            self.number_kind = number_kind
+            self.number_kind = sys.intern(number_kind)
         else:
             raise ValueError("Attempting to initialize number kind with unrecognized kind '{0}'".format(number_kind))
-        self.number = number or "None"
+        self.number = sys.intern(number or "None")
 
     def get_declension(self):
         return adj_declensions[self.decl]
@@ -854,23 +759,6 @@ class DictlineNumberEntry(DictlineBaseEntry):
                "', area='" + self.area + "', geog='" + self.geog + "', src='" + self.src + \
                "', senses='" + self.senses + "')"
 
-    def __eq__(self,other):
-        if not isinstance(other,DictlineNumberEntry):
-            return False
-        return self.pos == other.pos and \
-               self.decl == other.decl and \
-               self.variant == other.variant and \
-               self.number_kind == other.number_kind and \
-               self.age == other.age and \
-               self.area == other.area and \
-               self.geog == other.geog and \
-               self.freq == other.freq and \
-               self.src == other.src and \
-               self.senses == other.senses
-
-    def __hash__(self):
-        return hash(repr(self))
-
 
 def build_dictline_entry(dictline_row):
     """
@@ -934,6 +822,68 @@ def build_dictline_entry(dictline_row):
                                          )
 
 
+# Verb kinds abbreviated in the dictionary codes of UNIQUES.tsv
+_unique_verb_kinds = {'I': 'IMPERS', 'T': 'TO_BEING', 'TO': 'TO_BEING', 'TR': 'TRANS'}
+
+
+def build_unique(unique_row):
+    """
+    Accepts a UNIQUES row (dictionary of columns) and returns (DictlineEntry subclass object,
+    Infl object) for the unique form
+
+    The dictionary code is the age, area, geography, frequency, and source codes, preceded by an
+    abbreviated verb kind for some verbs (see _unique_verb_kinds). The inflection has the whole
+    form as stem 1 and an empty ending.
+    """
+    pos = unique_row['unq_pos']
+    dictcode = unique_row['unq_dictcode']
+    age, area, geography, frequency, source = dictcode[-5:]
+    kind = 'X'
+    if pos == 'V':
+        kind = _unique_verb_kinds.get(dictcode[:-5], 'X')
+    elif pos == 'PRON':
+        kind = unique_row['unq_pronoun_kind']
+    entry = build_dictline_entry({'dl_pos': pos, 'dl_senses': unique_row['unq_senses'], 'dl_age': age,
+                                  'dl_area': area, 'dl_geography': geography, 'dl_frequency': frequency,
+                                  'dl_source': source, 'dl_type': unique_row['unq_type'],
+                                  'dl_variant': unique_row['unq_variant'], 'dl_gender': unique_row['unq_gender'],
+                                  'dl_kind': kind, 'dl_comparison': unique_row['unq_comparison'], 'dl_aux_case': ''})
+    infl = build_inflection(part_of_speech=pos, stem='1', ending='', age=age, frequency=frequency,
+                            decl=unique_row['unq_type'], conj=unique_row['unq_type'],
+                            variant=unique_row['unq_variant'], case=unique_row['unq_case'],
+                            number=unique_row['unq_number'], gender=unique_row['unq_gender'],
+                            person=unique_row['unq_person'], comparison=unique_row['unq_comparison'],
+                            tense=unique_row['unq_tense'], voice=unique_row['unq_voice'], mood=unique_row['unq_mood'])
+    return entry, infl
+
+
+# ESSE.tsv lists the forms of sum, esse, fui, futurus, which has no DICTLINE entry. The stems only
+# give its dictionary form, each ESSE form is matched whole.
+esse_stems = ('s', '', 'fu', 'futur')
+esse_senses = 'to be, exist; (Medieval, in perfect tense) to go'
+_esse_moods = {'SUBJ': 'SUB'}
+
+
+def build_esse(esse_row):
+    """
+    Accepts an ESSE row (dictionary of columns) and returns (DictlineVerbEntry object, VerbInfl
+    object) for the form of sum, esse. Every row has the same entry.
+
+    ESSE moods are padded and spell the subjunctive SUBJ, they are converted to the INFLECTS codes.
+    As for unique forms, the inflection has the whole form as stem 1 and an empty ending.
+    """
+    entry = build_dictline_entry({'dl_pos': 'V', 'dl_senses': esse_senses, 'dl_age': 'X', 'dl_area': 'X',
+                                  'dl_geography': 'X', 'dl_frequency': 'A', 'dl_source': 'X', 'dl_type': '5',
+                                  'dl_variant': '1', 'dl_gender': '', 'dl_kind': 'TO_BE', 'dl_comparison': '',
+                                  'dl_aux_case': ''})
+    mood = esse_row['esse_mood'].strip()
+    infl = build_inflection(part_of_speech=esse_row['esse_pos'], stem='1', ending='', age='X', frequency='A',
+                            conj='5', variant='1', tense=esse_row['esse_tense'].strip(),
+                            voice=esse_row['esse_voice'].strip(), mood=_esse_moods.get(mood, mood),
+                            person=esse_row['esse_person'].strip(), number=esse_row['esse_number'].strip())
+    return entry, infl
+
+
 #####################################
 ######### INFLECTIONS ###############
 
@@ -944,13 +894,19 @@ def build_dictline_entry(dictline_row):
 #
 # Note the order of the matches() method: use the template inflection (testnoun)
 # to check if the full inflections matches (inflections['N'])
-class NounInfl:
+#
+# The same query is answered faster by the inflection index, without scanning the list:
+#   noun_matches = query_inflections('N', decl='1', case='NOM', number='S')
+class NounInfl(_ValueType):
     """
     Structural version of noun inflection codes, for easier searching
     either specify some of the parameters, or use a raw build string (from INFLECTS.LAT)
     If buildstr is given, all other args are ignored
     """
 
+    _fields = ('decl', 'variant', 'case', 'number', 'gender', 'stem', 'ending_uvij', 'ending_vi', 'age',
+               'frequency')
+
     def __init__(self, buildstr='', decl='', variant='', case='', number='', gender='', stem='', ending=None, age='',
                  frequency=''):
         if buildstr:
@@ -1077,31 +1033,17 @@ class NounInfl:
                "', ending_uvij='" + self.ending_uvij + "', ending_vi='" + self.ending_vi + "', age='" + self.age + \
                "', frequency='" + self.frequency + "')"
 
-    def __eq__(self,other):
-        if not isinstance(other,NounInfl):
-            return False
-        return self.decl == other.decl and \
-               self.variant == other.variant and \
-               self.case == other.case and \
-               self.number == other.number and \
-               self.gender == other.gender and \
-               self.stem == other.stem and \
-               self.ending_uvij == other.ending_uvij and \
-               self.ending_vi == other.ending_vi and \
-               self.age == other.age and \
-               self.frequency == other.frequency
 
-    def __hash__(self):
-        return hash(repr(self))
-
-
-class AdjectiveInfl:
+class AdjectiveInfl(_ValueType):
     """
     Structural version of adjective inflection codes, for easier searching
     either specify some of the parameters, or use a raw build string (from INFLECTS.LAT)
     If buildstr is given, all other args are ignored
     """
 
+    _fields = ('decl', 'variant', 'case', 'number', 'gender', 'comparison', 'stem', 'ending_uvij',
+               'ending_vi', 'age', 'frequency')
+
     def __init__(self, buildstr='', decl='', variant='', case='', number='', gender='', comparison='', stem='', ending=None,
                  age='', frequency=''):
         if buildstr:
@@ -1238,32 +1180,17 @@ class AdjectiveInfl:
                "', stem='" + self.stem + "', ending_uvij='" + self.ending_uvij + "', ending_vi='" + self.ending_vi + \
                "', age='" + self.age + "', frequency='" + self.frequency + "')"
 
-    def __eq__(self,other):
-        if not isinstance(other,AdjectiveInfl):
-            return False
-        return self.decl == other.decl and \
-               self.variant == other.variant and \
-               self.case == other.case and \
-               self.number == other.number and \
-               self.gender == other.gender and \
-               self.comparison == other.comparison and \
-               self.stem == other.stem and \
-               self.ending_uvij == other.ending_uvij and \
-               self.ending_vi == other.ending_vi and \
-               self.age == other.age and \
-               self.frequency == other.frequency
 
-    def __hash__(self):
-        return hash(repr(self))
-
-
-class VerbInfl:
+class VerbInfl(_ValueType):
     """
     Structural version of verb inflection codes, for easier searching
     either specify some of the parameters, or use a raw build string (from INFLECTS.LAT)
     If buildstr is given, all other args are ignored
     """
 
+    _fields = ('conj', 'variant', 'tense', 'voice', 'mood', 'person', 'number', 'stem', 'ending_uvij',
+               'ending_vi', 'age', 'frequency')
+
     def __init__(self, buildstr='', conj='', variant='', tense='', voice='', mood='', person='', number='', stem='',
                  ending=None, age='', frequency=''):
         if buildstr:
@@ -1407,33 +1334,17 @@ class VerbInfl:
                "', ending_uvij='" + self.ending_uvij + "', ending_vi='" + self.ending_vi + "', age='" + \
                self.age + "', frequency='" + self.frequency + "')"
 
-    def __eq__(self,other):
-        if not isinstance(other,VerbInfl):
-            return False
-        return self.conj == other.conj and \
-               self.variant == other.variant and \
-               self.tense == other.tense and \
-               self.mood == other.voice and \
-               self.voice == other.mood and \
-               self.person == other.person and \
-               self.number == other.number and \
-               self.stem == other.stem and \
-               self.ending_uvij == other.ending_uvij and \
-               self.ending_vi == other.ending_vi and \
-               self.age == other.age and \
-               self.frequency == other.frequency
-
-    def __hash__(self):
-        return hash(repr(self))
 
-
-class VerbParticipleInfl:
+class VerbParticipleInfl(_ValueType):
     """
     Structural version of verb participle inflection codes, for easier searching
     either specify some of the parameters, or use a raw build string (from INFLECTS.LAT)
     If buildstr is given, all other args are ignored
     """
 
+    _fields = ('conj', 'variant', 'case', 'number', 'gender', 'tense', 'voice', 'stem', 'ending_uvij',
+               'ending_vi', 'age', 'frequency')
+
     def __init__(self, buildstr='', conj='', variant='', case='', number='', gender='', tense='', voice='', stem='',
                  ending=None, age='', frequency=''):
         if buildstr:
@@ -1576,27 +1487,8 @@ class VerbParticipleInfl:
                "', ending_uvij='" + self.ending_uvij + "', ending_vi='" + self.ending_vi + "', age='" + self.age + \
                "', frequency='" + self.frequency + "')"
 
-    def __eq__(self,other):
-        if not isinstance(other,VerbParticipleInfl):
-            return False
-        return self.conj == other.conj and \
-               self.variant == other.variant and \
-               self.case == other.case and \
-               self.number == other.number and \
-               self.gender == other.gender and \
-               self.voice == other.voice and \
-               self.tense == other.tense and \
-               self.stem == other.stem and \
-               self.ending_uvij == other.ending_uvij and \
-               self.ending_vi == other.ending_vi and \
-               self.age == other.age and \
-               self.frequency == other.frequency
-
-    def __hash__(self):
-        return hash(repr(self))
-
 
-class SupineInfl:
+class SupineInfl(_ValueType):
     """
     Structural version of supine inflection codes, for easier searching
     either specify some of the parameters, or use a raw build string (from original INFLECTS.LAT)
@@ -1606,6 +1498,9 @@ class SupineInfl:
     can be useful e.g. for tests
     """
 
+    _fields = ('decl', 'variant', 'case', 'number', 'gender', 'stem', 'ending_uvij', 'ending_vi', 'age',
+               'frequency')
+
     def __init__(self, buildstr='', decl='', variant='', case='', number='', gender='', stem='', ending=None, age='',
                  frequency=''):
         if buildstr:
@@ -1700,31 +1595,17 @@ class SupineInfl:
                "', ending_uvij='" + self.ending_uvij + "', ending_vi='" + self.ending_vi + "', age='" + self.age + \
                "', frequency='" + self.frequency + "')"
 
-    def __eq__(self,other):
-        if not isinstance(other,PronounInfl):
-            return False
-        return self.decl == other.decl and \
-               self.variant == other.variant and \
-               self.case == other.case and \
-               self.number == other.number and \
-               self.gender == other.gender and \
-               self.stem == other.stem and \
-               self.ending_uvij == other.ending_uvij and \
-               self.ending_vi == other.ending_vi and \
-               self.age == other.age and \
-               self.frequency == other.frequency
-
-    def __hash__(self):
-        return hash(repr(self))
-
 
-class PronounInfl:
+class PronounInfl(_ValueType):
     """
     Structural version of pronoun inflection codes, for easier searching
     either specify some of the parameters, or use a raw build string (from INFLECTS.LAT)
     If buildstr is given, all other args are ignored
     """
 
+    _fields = ('decl', 'variant', 'case', 'number', 'gender', 'stem', 'ending_uvij', 'ending_vi', 'age',
+               'frequency')
+
     def __init__(self, buildstr='', decl='', variant='', case='', number='', gender='', stem='', ending=None, age='',
                  frequency=''):
         if buildstr:
@@ -1849,31 +1730,17 @@ class PronounInfl:
                "', ending_uvij='" + self.ending_uvij + "', ending_vi='" + self.ending_vi + "', age='" + self.age + \
                "', frequency='" + self.frequency + "')"
 
-    def __eq__(self,other):
-        if not isinstance(other,PronounInfl):
-            return False
-        return self.decl == other.decl and \
-               self.variant == other.variant and \
-               self.case == other.case and \
-               self.number == other.number and \
-               self.gender == other.gender and \
-               self.stem == other.stem and \
-               self.ending_uvij == other.ending_uvij and \
-               self.ending_vi == other.ending_vi and \
-               self.age == other.age and \
-               self.frequency == other.frequency
-
-    def __hash__(self):
-        return hash(repr(self))
 
-
-class NumberInfl:
+class NumberInfl(_ValueType):
     """
     Structural version of number inflection codes, for easier searching
     either specify some of the parameters, or use a raw build string (from INFLECTS.LAT)
     If buildstr is given, all other args are ignored
     """
 
+    _fields = ('decl', 'variant', 'case', 'number', 'gender', 'kind', 'stem', 'ending_uvij', 'ending_vi',
+               'age', 'frequency')
+
     def __init__(self, buildstr='', decl='', variant='', case='', number='', gender='', kind='', stem='', ending=None, age='',
                  frequency=''):
         if buildstr:
@@ -2009,32 +1876,16 @@ class NumberInfl:
                "', ending_uvij='" + self.ending_uvij + "', ending_vi='" + self.ending_vi + "', age='" + self.age + \
                "', frequency='" + self.frequency + "')"
 
-    def __eq__(self,other):
-        if not isinstance(other,NumberInfl):
-            return False
-        return self.decl == other.decl and \
-               self.variant == other.variant and \
-               self.case == other.case and \
-               self.number == other.number and \
-               self.gender == other.gender and \
-               self.kind == other.kind and \
-               self.stem == other.stem and \
-               self.ending_uvij == other.ending_uvij and \
-               self.ending_vi == other.ending_vi and \
-               self.age == other.age and \
-               self.frequency == other.frequency
-
-    def __hash__(self):
-        return hash(repr(self))
-
 
-class AdverbInfl:
+class AdverbInfl(_ValueType):
     """
     Structural version of adverb inflection codes, for easier searching
     either specify some of the parameters, or use a raw build string (from INFLECTS.LAT)
     If buildstr is given, all other args are ignored
     """
 
+    _fields = ('comparison', 'stem', 'age', 'frequency')
+
     def __init__(self, buildstr='', comparison='', stem='', age='', frequency=''):
         if buildstr:
             # Build from INFLECTS.LAT string
@@ -2094,25 +1945,16 @@ class AdverbInfl:
         return "AdverbInfl(comparison='{0}', stem='{1}', self.age='{2}', self.frequency='{3}')".format(
             self.comparison, self.stem, self.age, self.frequency)
 
-    def __eq__(self,other):
-        if not isinstance(other,AdverbInfl):
-            return False
-        return self.comparison == other.comparison and \
-               self.stem == other.stem and \
-               self.age == other.age and \
-               self.frequency == other.frequency
 
-    def __hash__(self):
-        return hash(repr(self))
-
-
-class PrepositionInfl:
+class PrepositionInfl(_ValueType):
     """
     Structural version of preposition inflection codes, for easier searching
     either specify some of the parameters, or use a raw build string (from INFLECTS.LAT)
     If buildstr is given, all other args are ignored
     """
 
+    _fields = ('aux_case', 'stem', 'age', 'frequency')
+
     def __init__(self, buildstr='', aux_case='', stem='', age='', frequency=''):
         if buildstr:
             # Build from INFLECTS.LAT string
@@ -2174,17 +2016,6 @@ class PrepositionInfl:
         return "PrepositionInfl(aux_case={0}, stem='{1}', age='{2}', frequency='{3}')".format(
             self.aux_case, self.stem, self.age, self.frequency)
 
-    def __eq__(self,other):
-        if not isinstance(other,PrepositionInfl):
-            return False
-        return self.aux_case == other.aux_case and \
-               self.stem == other.stem and \
-               self.age == other.age and \
-               self.frequency == other.frequency
-
-    def __hash__(self):
-        return hash(repr(self))
-
 
 @dataclass
 class Tackon:
@@ -2332,607 +2163,1110 @@ def build_inflection(buildstr='', part_of_speech='', stem='', ending=None, age='
         return infl_out
 
 
-def load_inflections():
-    # orig_inflections = f.readlines()
-    # f.close()
-    global inflections
-
-    # First get column names and index them in case the order changes
-    # Get inflects table
-    infl_fname = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/INFLECTS.tsv')
-    if not os.path.exists(infl_fname):
-        print("FATAL ERROR: Could not find INFLECTS.tsv. This is the file that contains all possible inflections of words. It should have been included in your installation under data/.")
-        raise FileNotFoundError
-    with open(infl_fname) as f:
-        reader = csv.DictReader(f,delimiter='\t')
-        inflect_rows = [row for row in reader]
-
-    # Build inflections
-    for row in inflect_rows:
-        pos = row['infl_pos']
-        infl_out = build_inflection(
-            part_of_speech=row['infl_pos'] or '',
-            stem=row['infl_stem_id'] or '',
-            ending=row['infl_ending'] or '',
-            age=row['infl_age'] or '',
-            frequency=row['infl_frequency'] or '',
-            decl=row['infl_type'] or '',
-            conj=row['infl_type'] or '',
-            variant=row['infl_variant'] or '',
-            case=row['infl_case'] or '',
-            number=row['infl_plurality'] or '',
-            gender=row['infl_gender'] or '',
-            person=row['infl_person'] or '',
-            comparison=row['infl_comparison'] or '',
-            tense=row['infl_tense'] or '',
-            voice=row['infl_voice'] or '',
-            mood=row['infl_mood'] or '',
-            kind=row['infl_numtype'] or '')
-        if infl_out:
-            inflections[pos].append(infl_out)  # Add to appropriate inflection list
-
-
-def _cache_noun_inflections(key : str):
-    """
-    Generate a cached inflection for N <key>
-    `key` must be a string in the format "<decl> <var>", e.g. "1 1"
-    Neither decl nor var can be 0
-    """
-    global inflections
-    global _noun_inflections_cached
-
-    if len(key) != 3:
-        raise ValueError("Trying to build noun inflection but key provided '{0}' is not in the format '<decl> <var>'. Length is not 3.".format(key))
-    if key[1] != ' ':
-        raise ValueError("Trying to build noun inflection but key provided '{0}' is not in the format '<decl> <var>'. Space must be in key.".format(key))
-    try:
-        decl_int = int(key[0])
-        var_int = int(key[2])
-    except ValueError:
-        raise ValueError("Trying to build noun inflection but key provided '{0}' is not in the format '<decl> <var>'. Declension or variant is not recognzied as a number.".format(key))
-    if key[0] == '0' or key[2] == '0':
-        raise ValueError("Trying to build noun inflection but key provided '{0}' is not in the format '<decl> <var>'. Declension and variant cannot be '0'.".format(key))
-
-    # Don't recache
-    if key in _noun_inflections_cached.keys():
-        return
-
-    # Get inflections, noting priority and keeping age and frequency
-    # first priority
-    test_infl = build_inflection(part_of_speech='N', decl=key[0], variant=key[2])
-    Ninfls1 = [n for n in inflections['N'] if test_infl.matches(n)]
-    # second priority
-    test_infl = build_inflection(part_of_speech='N', decl=key[0], variant='0')
-    Ninfls2 = [n for n in inflections['N'] if test_infl.matches(n)]
-
-    infls_out = Ninfls1  # Start with top priority, which must be included
-    # Now check for gaps
-    for lopri_infl in Ninfls2:
-        overridden=False
-        for hipri_infl in Ninfls1:
-            if hipri_infl.overrides(lopri_infl):
-                overridden=True
-                break
-        if not overridden:
-            infls_out.append(lopri_infl)
-
-    _noun_inflections_cached[key] = infls_out
-
-
-def _cache_adj_inflections(key : str):
-    """
-    Generate a cached inflection for ADJ <key>
-    `key` must be a string in the format "<decl> <var>", e.g. "1 1"
-    If decl is not '0', variant cannot be '0', but '0 0' is valid
-    """
-    global inflections
-    global _adj_inflections_cached
-
-    if len(key) != 3:
-        raise ValueError("Trying to build adjective inflection but key provided '{0}' is not in the format '<decl> <var>'. Length is not 3.".format(key))
-    if key[1] != ' ':
-        raise ValueError("Trying to build adjective inflection but key provided '{0}' is not in the format '<decl> <var>'. Space must be in key.".format(key))
-    try:
-        decl_int = int(key[0])
-        var_int = int(key[2])
-    except ValueError:
-        raise ValueError("Trying to build adjective inflection but key provided '{0}' is not in the format '<decl> <var>'. Declension or variant is not recognzied as a number.".format(key))
-    if key[0] == '0' or key[2] == '0':
-        if key[0] != '0' or key[2] != '0':
-            raise ValueError("Trying to build adjective inflection but key provided '{0}' is not in the format '<decl> <var>'. Declension and variant cannot be '0' unless both are '0'.".format(key))
-
-    # Don't recache
-    if key in _adj_inflections_cached.keys():
-        return
-
-    # Get inflections, noting priority and keeping age and frequency
-    # first priority
-    test_infl = build_inflection(part_of_speech='ADJ', decl=key[0], variant=key[2])
-    ADJinfls1 = [n for n in inflections['ADJ'] if test_infl.matches(n)]
-    # second priority
-    test_infl = build_inflection(part_of_speech='ADJ', decl=key[0], variant='0')
-    ADJinfls2 = [n for n in inflections['ADJ'] if test_infl.matches(n)]
-    # third priority
-    test_infl = build_inflection(part_of_speech='ADJ', decl='0', variant='0')
-    ADJinfls3 = [n for n in inflections['ADJ'] if test_infl.matches(n)]
-
-    infls_out = ADJinfls1  # Start with top priority, which must be included
-    # Now check for gaps
-    for midpri_infl in ADJinfls2:
-        overridden = False
-        for hipri_infl in ADJinfls1:
-            if hipri_infl.overrides(midpri_infl):
-                overridden = True
-                break
-        if not overridden:
-            infls_out.append(midpri_infl)
-
-    infls_out_partial = infls_out  # Capture state before we start adding again
-    for lopri_infl in ADJinfls3:
-        overridden = False
-        for hipri_infl in infls_out_partial:
-            if hipri_infl.overrides(lopri_infl):
-                overridden = True
-                break
-        if not overridden:
-            infls_out.append(lopri_infl)
-
-    _adj_inflections_cached[key] = infls_out
-
-
-def _cache_verb_inflections(key : str):
-    """
-    Generate a cached inflection for V <key>
-    `key` must be a string in the format "<conj> <var>", e.g. "1 1"
-    Neither decl nor var can be 0
-
-    This also adds VPAR and SUPINE inflections
-    """
-    global inflections
-    global _verb_inflections_cached
-
-    if len(key) != 3:
-        raise ValueError("Trying to build verb inflection but key provided '{0}' is not in the format '<conj> <var>'. Length is not 3.".format(key))
-    if key[1] != ' ':
-        raise ValueError("Trying to build verb inflection but key provided '{0}' is not in the format '<conj> <var>'. Space must be in key.".format(key))
-    try:
-        conj_int = int(key[0])
-        var_int = int(key[2])
-    except ValueError:
-        raise ValueError("Trying to build verb inflection but key provided '{0}' is not in the format '<conj> <var>'. Conjugation or variant is not recognzied as a number.".format(key))
-    if key[0] == '0' or key[2] == '0':
-        raise ValueError("Trying to build verb inflection but key provided '{0}' is not in the format '<conj> <var>'. Conjugation and variant cannot be '0'.".format(key))
-
-    # Don't recache
-    if key in _verb_inflections_cached.keys():
-        return
-
-    # BASE INFLECTIONS (V x y)
-    # Get inflections, noting priority and keeping age and frequency
-    # first priority (V x y)
-    test_infl = build_inflection(part_of_speech='V', conj=key[0], variant=key[2])
-    Vinfls1 = [n for n in inflections['V'] if test_infl.matches(n)]
-    # second priority (V x 0)
-    test_infl = build_inflection(part_of_speech='V', conj=key[0], variant='0')
-    Vinfls2 = [n for n in inflections['V'] if test_infl.matches(n)]
-    # third priority (V 0 0)
-    test_infl = build_inflection(part_of_speech='V', conj='0', variant='0')
-    Vinfls3 = [n for n in inflections['V'] if test_infl.matches(n)]
-
-    infls_out = Vinfls1  # Start with top priority, which must be included
-    # Now check for gaps
-    for midpri_infl in Vinfls2:
-        overridden = False
-        for hipri_infl in Vinfls1:
-            if hipri_infl.overrides(midpri_infl):
-                overridden = True
-                break
-        if not overridden:
-            infls_out.append(midpri_infl)
-
-    infls_out_partial = infls_out  # Partial list before we start adding again
-    for lopri_infl in Vinfls3:
-        overridden = False
-        for hipri_infl in infls_out_partial:
-            if hipri_infl.overrides(lopri_infl):
-                overridden = True
-                break
-        if not overridden:
-            infls_out.append(lopri_infl)
-
-    # VPAR INFLECTIONS (VPAR x y)
-    test_infl = build_inflection(part_of_speech='VPAR', conj=key[0], variant=key[2])
-    Vinfls1 = [n for n in inflections['VPAR'] if test_infl.matches(n)]
-    # second priority (V x 0)
-    test_infl = build_inflection(part_of_speech='V', conj=key[0], variant='0')
-    Vinfls2 = [n for n in inflections['VPAR'] if test_infl.matches(n)]
-    # third priority (V 0 0)
-    test_infl = build_inflection(part_of_speech='V', conj='0', variant='0')
-    Vinfls3 = [n for n in inflections['VPAR'] if test_infl.matches(n)]
-
-    vpar_infls_out = Vinfls1  # Start with top priority, which must be included
-    # Now check for gaps
-    for midpri_infl in Vinfls2:
-        overridden = False
-        for hipri_infl in Vinfls1:
-            if hipri_infl.overrides(midpri_infl):
-                overridden = True
-                break
-        if not overridden:
-            infls_out.append(midpri_infl)
-
-    vpar_infls_out_partial = vpar_infls_out  # Partial list before we start adding again
-    for lopri_infl in Vinfls3:
-        overridden = False
-        for hipri_infl in vpar_infls_out_partial:
-            if hipri_infl.overrides(lopri_infl):
-                overridden = True
-                break
-        if not overridden:
-            vpar_infls_out.append(lopri_infl)
-    infls_out += vpar_infls_out  # Concatenate
-
-    # SUPINE INFLECTIONS (SUPINE 0 0)
-    infls_out += inflections['SUPINE']
-
-    # Set cached verb inflection list
-    _verb_inflections_cached[key] = infls_out
-
-
-def _cache_num_inflections(key : str):
-    """
-    Generate a cached inflection for NUM <key>
-    `key` must be a string in the format "<decl> <var>", e.g. "1 1"
-    decl and var can be 0
-    """
-    global inflections
-    global _num_inflections_cached
-
-    if len(key) != 3:
-        raise ValueError("Trying to build numeral inflection but key provided '{0}' is not in the format '<decl> <var>'. Length is not 3.".format(key))
-    if key[1] != ' ':
-        raise ValueError("Trying to build numeral inflection but key provided '{0}' is not in the format '<decl> <var>'. Space must be in key.".format(key))
-    try:
-        decl_int = int(key[0])
-        var_int = int(key[2])
-    except ValueError:
-        raise ValueError("Trying to build numeral inflection but key provided '{0}' is not in the format '<decl> <var>'. Declension or variant is not recognzied as a number.".format(key))
-
-    # Don't recache
-    if key in _num_inflections_cached.keys():
-        return
-
-    # first priority
-    test_infl = build_inflection(part_of_speech='NUM', decl=key[0], variant=key[2])
-    NUMinfls1 = [n for n in inflections['NUM'] if test_infl.matches(n)]
-    # second priority
-    test_infl = build_inflection(part_of_speech='NUM', decl=key[0], variant='0')
-    NUMinfls2 = [n for n in inflections['NUM'] if test_infl.matches(n)]
-    # third priority
-    test_infl = build_inflection(part_of_speech='NUM', decl='0', variant='0')
-    NUMinfls3 = [n for n in inflections['NUM'] if test_infl.matches(n)]
-
-    infls_out = NUMinfls1  # Start with top priority, which must be included
-    # Now check for gaps
-    for midpri_infl in NUMinfls2:
-        overridden = False
-        for hipri_infl in NUMinfls1:
-            if hipri_infl.overrides(midpri_infl):
-                overridden = True
-                break
-        if not overridden:
-            infls_out.append(midpri_infl)
-
-    infls_out_partial = infls_out  # Capture state before we start adding again
-    for lopri_infl in NUMinfls3:
-        overridden = False
-        for hipri_infl in infls_out_partial:
-            if hipri_infl.overrides(lopri_infl):
-                overridden = True
-                break
-        if not overridden:
-            infls_out.append(lopri_infl)
-
-    _num_inflections_cached[key] = infls_out
-
-
-def _cache_pronoun_inflections(key : str):
-    """
-    Generate a cached inflection for NUM <key>
-    `key` must be a string in the format "<decl> <var>", e.g. "1 1"
-    decl cannot be 0, var can
-
-    NOTE: Unlike other parts of speech, we do NOT default to PRON 1 0
-    (or PACK 1 0), see notes.txt.
-    """
-    global inflections
-    global _pron_inflections_cached
-
-    if len(key) != 3:
-        raise ValueError("Trying to build pronoun inflection but key provided '{0}' is not in the format '<decl> <var>'. Length is not 3.".format(key))
-    if key[1] != ' ':
-        raise ValueError("Trying to build pronoun inflection but key provided '{0}' is not in the format '<decl> <var>'. Space must be in key.".format(key))
-    try:
-        decl_int = int(key[0])
-        var_int = int(key[2])
-    except ValueError:
-        raise ValueError("Trying to build pronoun inflection but key provided '{0}' is not in the format '<decl> <var>'. Declension or variant is not recognzied as a number.".format(key))
-    if key[0] == '0':
-        raise ValueError("Trying to build pronoun inflection but key provided '{0}' is not in the format '<decl> <var>'. Declension cannot be '0'.".format(key))
-
-    # Don't recache
-    if key in _pron_inflections_cached.keys():
-        return
-
-    # Get inflections, noting priority and keeping age and frequency
-    # first priority
-    test_infl = build_inflection(part_of_speech='PRON', decl=key[0], variant=key[2])
-    Pinfls1 = [n for n in inflections['PRON'] if test_infl.matches(n)]
-    # second priority
-    #test_infl = build_inflection(part_of_speech='PRON', decl=key[0], variant='0')
-    #Pinfls2 = [n for n in inflections['PRON'] if test_infl.matches(n)]
-
-    infls_out = Pinfls1  # Start with top priority, which must be included
-
-    # Now check for gaps (not used for PRON)
-    #for lopri_infl in Pinfls2:
-    #    overridden=False
-    #    for hipri_infl in Pinfls1:
-    #        if hipri_infl.overrides(lopri_infl):
-    #            overridden=True
-    #            break
-    #    if not overridden:
-    #        infls_out.append(lopri_infl)
-
-    _pron_inflections_cached[key] = infls_out
-
-
-def _get_possible_noun_inflections(dl_entry):
-    # Nouns have gender, which might require including common (C) or specific
-    # (M/F) genders in addition
-    # If noun kind is S (singular only) or M (multiple/plural only), assign number
-    global inflections
-    global _noun_inflections_cached
-
-    infls_matched = set()  # Temporary variable before age/frequency
-    key = '{0} {1}'.format(dl_entry.decl, dl_entry.variant)
-    _cache_noun_inflections(key)  # Make sure we cache this inflection key
-    infls_all = _noun_inflections_cached[key]
-
-    for infl in infls_all:
-        matched = True
-        # Check gender
-        if dl_entry.gender in ['M', 'F', 'C']:
-            # Check for M, F, and C genders
-            if infl.gender == 'N':
-                matched = False
-                continue
-        elif dl_entry.gender == 'N':
-            if infl.gender not in ['N','X']:
-                matched = False
-                continue
-        # Check noun kind
-        if dl_entry.noun_kind == 'S':
-            if infl.number == 'P':
-                matched = False
-                continue
-        elif dl_entry.noun_kind == 'M':
-            if infl.number == 'S':
-                matched = False
+# Inflection class for each part of speech in the inflections dictionary
+_inflection_classes = {'N': NounInfl, 'ADJ': AdjectiveInfl, 'V': VerbInfl, 'VPAR': VerbParticipleInfl,
+                       'SUPINE': SupineInfl, 'PRON': PronounInfl, 'NUM': NumberInfl, 'ADV': AdverbInfl,
+                       'PREP': PrepositionInfl}
+_inflection_pos = {cls: pos for pos,cls in _inflection_classes.items()}
+
+
+def get_inflection_pos(infl):
+    """
+    Return the part of speech code of an inflection object, e.g. 'VPAR' for a VerbParticipleInfl
+    """
+    return _inflection_pos[type(infl)]
+
+
+# Inflection features which identify a form of each part of speech, in the order they have in the
+# keys of the synthesis index, see InflectionTable.get_synthesis_index()
+synthesis_features = {'N': ('case', 'number'),
+                      'ADJ': ('case', 'number', 'gender', 'comparison'),
+                      'V': ('tense', 'voice', 'mood', 'person', 'number'),
+                      'VPAR': ('case', 'number', 'gender', 'tense', 'voice'),
+                      'SUPINE': ('case',),
+                      'PRON': ('case', 'number', 'gender'),
+                      'NUM': ('case', 'number', 'gender', 'kind'),
+                      'ADV': ('comparison',),
+                      'PREP': ()}
+# Inflection codes which stand for several values; their forms are filed under each value too
+_synthesis_wildcards = {'gender': {'C': ('M', 'F'), 'X': ('M', 'F', 'N', 'C')},
+                        'number': {'X': ('S', 'P')},
+                        'case': {'X': ('NOM', 'VOC', 'GEN', 'DAT', 'ACC', 'LOC', 'ABL')},
+                        'comparison': {'X': ('POS', 'COMP', 'SUPER')}}
+# Adverbs with all three stems (comparison X) use the inflections without comparison, by stem
+_adverb_stem_comparisons = {'1': 'POS', '2': 'COMP', '3': 'SUPER'}
+
+
+class InflectionIndex:
+    """
+    Multi-key index over a dictionary of inflections (part of speech -> list of inflections)
+
+    Every field of every inflection is indexed (decl/conj, variant, stem, ending_vi, case, number,
+    gender, tense, voice, mood, ...), so a query intersects the sets of inflections having each
+    requested value instead of scanning the whole list with matches(). Results are returned in
+    load order, the same order a scan would give.
+    """
+
+    def __init__(self, infls):
+        self._infls = {}
+        self._postings = {}  # part of speech -> {(field, value): frozenset of positions}
+        for pos,pos_infls in infls.items():
+            self._infls[pos] = list(pos_infls)
+            postings = {}
+            for i,infl in enumerate(pos_infls):
+                for field in infl._fields:
+                    if field != 'ending_uvij':
+                        postings.setdefault((field, getattr(infl, field, None)), []).append(i)
+            self._postings[pos] = {k: frozenset(v) for k,v in postings.items()}
+
+    def query(self, part_of_speech, **criteria):
+        """
+        Return the list of `part_of_speech` inflections whose fields equal all given criteria,
+        e.g. query('N', decl='3', case='ABL', number='P')
+
+        Criteria are inflection attribute names (decl, conj, variant, stem, case, number, gender,
+        person, comparison, tense, voice, mood, kind, aux_case, age, frequency), plus `ending` which
+        may be given in either spelling. Like matches(), empty criteria ('' or None) match anything,
+        except `ending` where '' means the empty ending.
+        """
+        if part_of_speech not in self._infls:
+            raise ValueError("Unknown inflection part of speech '{0}'".format(part_of_speech))
+        infls = self._infls[part_of_speech]
+        fields = _inflection_classes[part_of_speech]._fields
+        postings = []
+        for field,value in criteria.items():
+            if field == 'ending':
+                if value is None:
+                    continue
+                field,value = 'ending_vi', value.replace('j', 'i').replace('u', 'v')
+            elif not value:
                 continue
+            if field not in fields or field == 'ending_uvij':
+                raise ValueError("'{0}' is not a field of {1} inflections".format(field, part_of_speech))
+            ids = self._postings[part_of_speech].get((field, value))
+            if not ids:
+                return []
+            postings.append(ids)
+        if not postings:
+            return list(infls)
+        postings.sort(key=len)
+        return [infls[i] for i in sorted(postings[0].intersection(*postings[1:]))]
+
+class EndingTrie:
+    """
+    Reversed-suffix trie over a set of endings, used to split words into stem and ending
 
-        if matched:
-            infls_matched.add(infl)
-    return infls_matched
-
-
-def _get_possible_adj_inflections(dl_entry):
-    # Adjectives are narrowed by comparison SOMETIMES
-    # If comparison is 'X', all are valid
-    # If comparison is 'POS', 'COMP', or 'SUPER', only that comparison is a match
-    global inflections
-    global _adj_inflections_cached
-
-    infls_matched = set()  # Temporary variable before age/frequency
-    key = '{0} {1}'.format(dl_entry.decl,dl_entry.variant)
-    _cache_adj_inflections(key)
-    infls_all = _adj_inflections_cached[key]
-
-    for infl in infls_all:
-        matched = True
-        # Check comparison
-        if dl_entry.comparison in ['POS','COMP','SUPER']:
-            if infl.comparison != dl_entry.comparison:
-                matched = False
-        if matched:
-            infls_matched.add(infl)
-    return infls_matched
-
-
-def _get_possible_verb_inflections(dl_entry):
-    # Verbs have kinds (DEP, SEMIDEP, PERFDEF, IMPERS, TO_BE, TO_BEING) that we need to check
-    global inflections
-    global _verb_inflections_cached
-
-    infls_matched = set()  # Temporary variable before age/frequency
-    key = '{0} {1}'.format(dl_entry.conj, dl_entry.variant)
-    _cache_verb_inflections(key)  # Make sure this inflection key is cached
-    infls_all = _verb_inflections_cached[key]
-
-    for infl in infls_all:
-        matched = True
-        # Check verb types
-        if dl_entry.verb_kind == 'DEP':
-            # Deponent, passive voice only (active meaning), still has present and fut active ppls, fut act. infinitive
-            # No perfect stem, occasionally has no supine
-            # Examples:
-            #   tueor, tueri, tuitis sum
-            if isinstance(infl,VerbInfl):
-                if infl.voice == 'ACTIVE':
-                    matched = False
-            elif isinstance(infl,VerbParticipleInfl):
-                if infl.voice == 'PASSIVE':
-                    # TODO gerundive exists in transitive verbs, and intransitive impersonal verbs
-                    # Whitaker has only one verb kind column, so there's not enough information to exclude gerundive
-                    # He notes that the verb kinds are not mutually exclusive; would probably be worth it to refactor
-                    if infl.tense == 'PRES' or infl.tense == 'PERF':
-                        matched = False
+    Each ending is inserted last letter first, so walking a word from its last letter
+    towards its first visits every ending that the word ends with, in one pass.
+    Endings and words should both use the same spelling (usually v and i, as in `ending_vi`).
+    """
+    _END = None  # Key marking that the path from the root to this node spells an ending
+
+    def __init__(self, endings=()):
+        self.root = {}
+        for e in endings:
+            self.add(e)
+
+    def add(self, ending):
+        node = self.root
+        for c in reversed(ending):
+            node = node.setdefault(c, {})
+        node[self._END] = True
+
+    def __contains__(self, ending):
+        node = self.root
+        for c in reversed(ending):
+            node = node.get(c)
+            if node is None:
+                return False
+        return self._END in node
 
-        elif dl_entry.verb_kind == 'SEMIDEP':
-            # Passive voice for perfect system, otherwise normal
-            # Usually, but not always, has no perfect stem in dictline entry
-            # Examples:
-            #   defio, defieri
-            #   audeo, audere (optionally semidep., has perfect stem)
-            if isinstance(infl,VerbInfl):
-                if infl.voice == 'ACTIVE':
-                    if infl.stem == '3':
-                        matched = False
-            elif isinstance(infl,VerbParticipleInfl):
-                if infl.stem == '3':
-                    matched = False
-                if infl.voice == 'PASSIVE':
-                    matched = False
-        elif dl_entry.verb_kind == 'PERFDEF':
-            # Perfect stem only, or sometimes supine stem
-            # Examples:
-            #   commemini, commeminisse, - (no supine)
-            #   novi, novisse, notus sum
-            if infl.stem not in ['3','4']:
-                matched = False
-        elif dl_entry.verb_kind == 'IMPERS':
-            # 3rd person singular only, or infinitive or gerund (inflect stem = 0)
-            # Examples:
-            if isinstance(infl,VerbInfl):
-                if infl.person not in ['3','0']:
+    def find_splits(self, w, skip_zero=False):
+        """
+        Return a list of split indices such that w[split_idx:] is an ending and the stem
+        w[:split_idx] is not empty. Shortest ending first (largest index first).
+        If skip_zero==True, the empty ending is not considered.
+        """
+        splits = []
+        node = self.root
+        if w and not skip_zero and self._END in node:
+            splits.append(len(w))
+        for i in range(len(w)-1,0,-1):
+            node = node.get(w[i])
+            if node is None:
+                break
+            if self._END in node:
+                splits.append(i)
+        return splits
+
+def get_inflection_signature(dl_entry):
+    """
+    Return a tuple of the dictline entry codes that determine its possible inflections:
+    (part of speech, declension/conjugation, variant, kind, gender, comparison)
+    Entries with the same signature have the same possible inflections. PACK is treated as PRON.
+    """
+    pos = 'PRON' if dl_entry.pos == 'PACK' else dl_entry.pos
+    decl = getattr(dl_entry, 'decl', None) or getattr(dl_entry, 'conj', '')
+    kind = ''
+    for kind_attr in ['noun_kind', 'verb_kind', 'pronoun_kind', 'number_kind']:
+        if hasattr(dl_entry, kind_attr):
+            kind = getattr(dl_entry, kind_attr)
+            break
+    return (pos, decl, getattr(dl_entry, 'variant', ''), kind, getattr(dl_entry, 'gender', ''),
+            getattr(dl_entry, 'comparison', ''))
+
+class InflectionTable:
+    """
+    The inflections of one INFLECTS file, with the lists, index, and caches derived from them
+
+    Each table loads its inflections on first use. Several tables (e.g. for a customized INFLECTS
+    file) can be used side by side; the module-level functions use the default table, see
+    get_default_inflection_table().
+
+    A table can be shared between threads. It is loaded once, even if several threads need it at
+    the same time, and the inflection lists, index, and trie are not modified after loading. Each
+    cached inflection list is built once by the first thread that needs it, other threads needing
+    the same list wait for it. Reloading (load(), set_inflections(), unload(), set_caches(),
+    clear_caches()) while other threads use the table is not supported.
+    """
+
+    def __init__(self, fname=None):
+        self.fname = fname or _default_inflects_fname
+        self.inflections = {'N': [], 'ADJ': [], 'V': [], 'VPAR': [], 'SUPINE': [], 'PRON': [], 'NUM': [], 'ADV': [],
+                            'PREP': []}
+        self.loaded = False
+        # Inflections cache, each has the decl/var as key (e.g. "1 1")
+        # This makes it faster to lookup possible endings, without handling all the default cases (e.g. "1 0", "0 0",
+        # which are only used internally, not in the DICTLINE file)
+        self._noun_inflections_cached = {}
+        self._adj_inflections_cached = {}
+        self._verb_inflections_cached = {}
+        self._num_inflections_cached = {}
+        self._pron_inflections_cached = {}
+        # Valid (stem id, ending_vi) pairs for each inflection signature of a dictline entry
+        self._stem_endings_cached = {}
+        # Results of get_possible_inflections(), by (inflection signature, ages, frequencies)
+        self._possible_inflections_cached = {}
+        # Synthesis indexes, by (inflection signature, ages, frequencies), see get_synthesis_index()
+        self._synthesis_cached = {}
+        # All of the inflection caches by name, see get_caches()
+        self._caches = {'noun': self._noun_inflections_cached, 'adj': self._adj_inflections_cached,
+                        'verb': self._verb_inflections_cached, 'num': self._num_inflections_cached,
+                        'pron': self._pron_inflections_cached, 'stem_endings': self._stem_endings_cached,
+                        'possible': self._possible_inflections_cached, 'synthesis': self._synthesis_cached}
+        self._ending_trie = None  # Built from the inflections on first use, see get_ending_trie()
+        self._index = None  # Built from the inflections on first use, see get_index()
+        self._lock = threading.RLock()  # Held while loading and building the trie and index
+        self._key_locks = {}  # Per-key locks of the caches being built, see _cache_once()
+
+    def load(self):
+        """
+        Load (or reload) the inflections from the INFLECTS file
+        """
+        with self._lock:
+            self._load()
+
+    def _load(self):
+        for pos in self.inflections.keys():
+            self.inflections[pos] = []
+
+        # First get column names and index them in case the order changes
+        # Get inflects table
+        if not os.path.exists(self.fname):
+            print("FATAL ERROR: Could not find INFLECTS.tsv. This is the file that contains all possible inflections of words. It should have been included in your installation under data/.")
+            raise FileNotFoundError
+        with open(self.fname) as f:
+            reader = csv.DictReader(f,delimiter='\t')
+            inflect_rows = [row for row in reader]
+
+        # Build inflections
+        for row in inflect_rows:
+            pos = row['infl_pos']
+            infl_out = build_inflection(
+                part_of_speech=row['infl_pos'] or '',
+                stem=row['infl_stem_id'] or '',
+                ending=row['infl_ending'] or '',
+                age=row['infl_age'] or '',
+                frequency=row['infl_frequency'] or '',
+                decl=row['infl_type'] or '',
+                conj=row['infl_type'] or '',
+                variant=row['infl_variant'] or '',
+                case=row['infl_case'] or '',
+                number=row['infl_plurality'] or '',
+                gender=row['infl_gender'] or '',
+                person=row['infl_person'] or '',
+                comparison=row['infl_comparison'] or '',
+                tense=row['infl_tense'] or '',
+                voice=row['infl_voice'] or '',
+                mood=row['infl_mood'] or '',
+                kind=row['infl_numtype'] or '')
+            if infl_out:
+                self.inflections[pos].append(infl_out)  # Add to appropriate inflection list
+        self.clear_caches()
+        self.loaded = True
+
+    def _ensure_loaded(self):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:  # Another thread may have loaded it while we waited
+                    self._load()
+
+    def get_inflections(self):
+        """
+        Return the main inflections dictionary (part of speech -> list of inflections), loading
+        INFLECTS.tsv the first time it is needed
+        """
+        self._ensure_loaded()
+        return self.inflections
+
+    def set_inflections(self, infls):
+        """
+        Replace the loaded inflections with `infls` (a dictionary like the one returned by
+        get_inflections(), e.g. from a snapshot) and drop any cached inflection lists
+        """
+        with self._lock:
+            for pos in self.inflections.keys():
+                self.inflections[pos] = list(infls.get(pos, []))
+            self.clear_caches()
+            self.loaded = True
+
+    def unload(self):
+        """
+        Discard the loaded inflections and cached inflection lists, they are reloaded on next use
+        """
+        with self._lock:
+            for pos in self.inflections.keys():
+                self.inflections[pos] = []
+            self.clear_caches()
+            self.loaded = False
+
+    def get_endings(self, vi=True):
+        """
+        Return the sorted list of all endings found in the inflections, in v and i spelling if
+        `vi` is True, otherwise as spelled in INFLECTS (uvij)
+        """
+        endings = set()
+        for infls in self.get_inflections().values():
+            for infl in infls:
+                # Adverb and preposition inflections have no ending
+                endings.add(getattr(infl, 'ending_vi' if vi else 'ending_uvij', ''))
+        return sorted(endings)
+
+    def get_ending_trie(self):
+        """
+        Return the EndingTrie (v and i spelling) for all endings in the loaded inflections
+        """
+        if self._ending_trie is None:
+            with self._lock:
+                if self._ending_trie is None:
+                    self._ending_trie = EndingTrie(self.get_endings(vi=True))
+        return self._ending_trie
+
+    def get_index(self):
+        """
+        Return the InflectionIndex over the loaded inflections
+        """
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = InflectionIndex(self.get_inflections())
+        return self._index
+
+    def query(self, part_of_speech, **criteria):
+        """
+        Return the loaded inflections of `part_of_speech` matching all `criteria`, see
+        InflectionIndex.query()
+        """
+        return self.get_index().query(part_of_speech, **criteria)
+
+    def clear_caches(self):
+        """
+        Empty the cached inflection lists, e.g. after the inflections have been reloaded
+        """
+        for cache in self._caches.values():
+            cache.clear()
+        self._ending_trie = None
+        self._index = None
+
+    def get_caches(self):
+        """
+        Return the inflection caches as a dictionary of name -> cache, e.g. to store them in a snapshot
+        """
+        return {name: dict(cache) for name,cache in self._caches.items()}
+
+    def set_caches(self, caches):
+        """
+        Replace the inflection caches with `caches`, as returned by get_caches(). The caches
+        must have been computed from the currently loaded inflections.
+        """
+        for name,cache in self._caches.items():
+            cache.clear()
+            cache.update(caches.get(name, {}))
+
+    def _cache_once(self, cache, key, build):
+        """
+        Return cache[key], calling build(key) to fill it if needed
+        Only one thread builds a given key; other threads needing it wait and use its result.
+        """
+        try:
+            return cache[key]
+        except KeyError:
+            pass
+        with self._lock:
+            key_lock = self._key_locks.setdefault((id(cache), key), threading.Lock())
+        with key_lock:
+            if key not in cache:  # Another thread may have built it while we waited
+                cache[key] = build(key)
+        with self._lock:
+            self._key_locks.pop((id(cache), key), None)
+        return cache[key]
+
+    def precompute_caches(self, dl_entries):
+        """
+        Fill the inflection caches for every inflection signature (see get_inflection_signature())
+        found in `dl_entries`, with the ages and frequencies used for word matching, so that the
+        first lookup of a rare declension or conjugation does not pay for building them
+        """
+        self._ensure_loaded()
+        done = set()
+        for dl_entry in dl_entries:
+            key = get_inflection_signature(dl_entry)
+            if key in done or key[0] not in self.inflections:
+                continue  # No inflections for CONJ and INTERJ
+            done.add(key)
+            self.get_possible_stem_endings(dl_entry)  # Also fills the other caches
+
+    def _cache_noun_inflections(self, key : str):
+        """
+        Make sure the inflection list for N <key> is in the cache, building it once
+        """
+        self._cache_once(self._noun_inflections_cached, key, self._build_noun_inflections)
+
+    def _build_noun_inflections(self, key : str):
+        """
+        Build the inflection list for N <key>, see _cache_noun_inflections()
+        `key` must be a string in the format "<decl> <var>", e.g. "1 1"
+        Neither decl nor var can be 0
+        """
+        self._ensure_loaded()
+
+        if len(key) != 3:
+            raise ValueError("Trying to build noun inflection but key provided '{0}' is not in the format '<decl> <var>'. Length is not 3.".format(key))
+        if key[1] != ' ':
+            raise ValueError("Trying to build noun inflection but key provided '{0}' is not in the format '<decl> <var>'. Space must be in key.".format(key))
+        try:
+            decl_int = int(key[0])
+            var_int = int(key[2])
+        except ValueError:
+            raise ValueError("Trying to build noun inflection but key provided '{0}' is not in the format '<decl> <var>'. Declension or variant is not recognzied as a number.".format(key))
+        if key[0] == '0' or key[2] == '0':
+            raise ValueError("Trying to build noun inflection but key provided '{0}' is not in the format '<decl> <var>'. Declension and variant cannot be '0'.".format(key))
+
+        # Get inflections, noting priority and keeping age and frequency
+        # first priority
+        Ninfls1 = self.query('N', decl=key[0], variant=key[2])
+        # second priority
+        Ninfls2 = self.query('N', decl=key[0], variant='0')
+
+        infls_out = Ninfls1  # Start with top priority, which must be included
+        # Now check for gaps
+        for lopri_infl in Ninfls2:
+            overridden=False
+            for hipri_infl in Ninfls1:
+                if hipri_infl.overrides(lopri_infl):
+                    overridden=True
+                    break
+            if not overridden:
+                infls_out.append(lopri_infl)
+
+        return infls_out
+
+    def _cache_adj_inflections(self, key : str):
+        """
+        Make sure the inflection list for ADJ <key> is in the cache, building it once
+        """
+        self._cache_once(self._adj_inflections_cached, key, self._build_adj_inflections)
+
+    def _build_adj_inflections(self, key : str):
+        """
+        Build the inflection list for ADJ <key>, see _cache_adj_inflections()
+        `key` must be a string in the format "<decl> <var>", e.g. "1 1"
+        If decl is not '0', variant cannot be '0', but '0 0' is valid
+        """
+        self._ensure_loaded()
+
+        if len(key) != 3:
+            raise ValueError("Trying to build adjective inflection but key provided '{0}' is not in the format '<decl> <var>'. Length is not 3.".format(key))
+        if key[1] != ' ':
+            raise ValueError("Trying to build adjective inflection but key provided '{0}' is not in the format '<decl> <var>'. Space must be in key.".format(key))
+        try:
+            decl_int = int(key[0])
+            var_int = int(key[2])
+        except ValueError:
+            raise ValueError("Trying to build adjective inflection but key provided '{0}' is not in the format '<decl> <var>'. Declension or variant is not recognzied as a number.".format(key))
+        if key[0] == '0' or key[2] == '0':
+            if key[0] != '0' or key[2] != '0':
+                raise ValueError("Trying to build adjective inflection but key provided '{0}' is not in the format '<decl> <var>'. Declension and variant cannot be '0' unless both are '0'.".format(key))
+
+        # Get inflections, noting priority and keeping age and frequency
+        # first priority
+        ADJinfls1 = self.query('ADJ', decl=key[0], variant=key[2])
+        # second priority
+        ADJinfls2 = self.query('ADJ', decl=key[0], variant='0')
+        # third priority
+        ADJinfls3 = self.query('ADJ', decl='0', variant='0')
+
+        infls_out = ADJinfls1  # Start with top priority, which must be included
+        # Now check for gaps
+        for midpri_infl in ADJinfls2:
+            overridden = False
+            for hipri_infl in ADJinfls1:
+                if hipri_infl.overrides(midpri_infl):
+                    overridden = True
+                    break
+            if not overridden:
+                infls_out.append(midpri_infl)
+
+        infls_out_partial = infls_out  # Capture state before we start adding again
+        for lopri_infl in ADJinfls3:
+            overridden = False
+            for hipri_infl in infls_out_partial:
+                if hipri_infl.overrides(lopri_infl):
+                    overridden = True
+                    break
+            if not overridden:
+                infls_out.append(lopri_infl)
+
+        return infls_out
+
+    def _cache_verb_inflections(self, key : str):
+        """
+        Make sure the inflection list for V <key> is in the cache, building it once
+        """
+        self._cache_once(self._verb_inflections_cached, key, self._build_verb_inflections)
+
+    def _build_verb_inflections(self, key : str):
+        """
+        Build the inflection list for V <key>, see _cache_verb_inflections()
+        `key` must be a string in the format "<conj> <var>", e.g. "1 1"
+        Neither decl nor var can be 0
+
+        This also adds VPAR and SUPINE inflections
+        """
+        self._ensure_loaded()
+
+        if len(key) != 3:
+            raise ValueError("Trying to build verb inflection but key provided '{0}' is not in the format '<conj> <var>'. Length is not 3.".format(key))
+        if key[1] != ' ':
+            raise ValueError("Trying to build verb inflection but key provided '{0}' is not in the format '<conj> <var>'. Space must be in key.".format(key))
+        try:
+            conj_int = int(key[0])
+            var_int = int(key[2])
+        except ValueError:
+            raise ValueError("Trying to build verb inflection but key provided '{0}' is not in the format '<conj> <var>'. Conjugation or variant is not recognzied as a number.".format(key))
+        if key[0] == '0' or key[2] == '0':
+            raise ValueError("Trying to build verb inflection but key provided '{0}' is not in the format '<conj> <var>'. Conjugation and variant cannot be '0'.".format(key))
+
+        # BASE INFLECTIONS (V x y)
+        # Get inflections, noting priority and keeping age and frequency
+        # first priority (V x y)
+        Vinfls1 = self.query('V', conj=key[0], variant=key[2])
+        # second priority (V x 0)
+        Vinfls2 = self.query('V', conj=key[0], variant='0')
+        # third priority (V 0 0)
+        Vinfls3 = self.query('V', conj='0', variant='0')
+
+        infls_out = Vinfls1  # Start with top priority, which must be included
+        # Now check for gaps
+        for midpri_infl in Vinfls2:
+            overridden = False
+            for hipri_infl in Vinfls1:
+                if hipri_infl.overrides(midpri_infl):
+                    overridden = True
+                    break
+            if not overridden:
+                infls_out.append(midpri_infl)
+
+        infls_out_partial = infls_out  # Partial list before we start adding again
+        for lopri_infl in Vinfls3:
+            overridden = False
+            for hipri_infl in infls_out_partial:
+                if hipri_infl.overrides(lopri_infl):
+                    overridden = True
+                    break
+            if not overridden:
+                infls_out.append(lopri_infl)
+
+        # VPAR INFLECTIONS (VPAR x y)
+        Vinfls1 = self.query('VPAR', conj=key[0], variant=key[2])
+        # second priority (V x 0)
+        Vinfls2 = self.query('VPAR', conj=key[0], variant='0')
+        # third priority (V 0 0)
+        Vinfls3 = self.query('VPAR', conj='0', variant='0')
+
+        vpar_infls_out = Vinfls1  # Start with top priority, which must be included
+        # Now check for gaps
+        for midpri_infl in Vinfls2:
+            overridden = False
+            for hipri_infl in Vinfls1:
+                if hipri_infl.overrides(midpri_infl):
+                    overridden = True
+                    break
+            if not overridden:
+                infls_out.append(midpri_infl)
+
+        vpar_infls_out_partial = vpar_infls_out  # Partial list before we start adding again
+        for lopri_infl in Vinfls3:
+            overridden = False
+            for hipri_infl in vpar_infls_out_partial:
+                if hipri_infl.overrides(lopri_infl):
+                    overridden = True
+                    break
+            if not overridden:
+                vpar_infls_out.append(lopri_infl)
+        infls_out += vpar_infls_out  # Concatenate
+
+        # SUPINE INFLECTIONS (SUPINE 0 0)
+        infls_out += self.inflections['SUPINE']
+
+        return infls_out
+
+    def _cache_num_inflections(self, key : str):
+        """
+        Make sure the inflection list for NUM <key> is in the cache, building it once
+        """
+        self._cache_once(self._num_inflections_cached, key, self._build_num_inflections)
+
+    def _build_num_inflections(self, key : str):
+        """
+        Build the inflection list for NUM <key>, see _cache_num_inflections()
+        `key` must be a string in the format "<decl> <var>", e.g. "1 1"
+        decl and var can be 0
+        """
+        self._ensure_loaded()
+
+        if len(key) != 3:
+            raise ValueError("Trying to build numeral inflection but key provided '{0}' is not in the format '<decl> <var>'. Length is not 3.".format(key))
+        if key[1] != ' ':
+            raise ValueError("Trying to build numeral inflection but key provided '{0}' is not in the format '<decl> <var>'. Space must be in key.".format(key))
+        try:
+            decl_int = int(key[0])
+            var_int = int(key[2])
+        except ValueError:
+            raise ValueError("Trying to build numeral inflection but key provided '{0}' is not in the format '<decl> <var>'. Declension or variant is not recognzied as a number.".format(key))
+
+        # first priority
+        NUMinfls1 = self.query('NUM', decl=key[0], variant=key[2])
+        # second priority
+        NUMinfls2 = self.query('NUM', decl=key[0], variant='0')
+        # third priority
+        NUMinfls3 = self.query('NUM', decl='0', variant='0')
+
+        infls_out = NUMinfls1  # Start with top priority, which must be included
+        # Now check for gaps
+        for midpri_infl in NUMinfls2:
+            overridden = False
+            for hipri_infl in NUMinfls1:
+                if hipri_infl.overrides(midpri_infl):
+                    overridden = True
+                    break
+            if not overridden:
+                infls_out.append(midpri_infl)
+
+        infls_out_partial = infls_out  # Capture state before we start adding again
+        for lopri_infl in NUMinfls3:
+            overridden = False
+            for hipri_infl in infls_out_partial:
+                if hipri_infl.overrides(lopri_infl):
+                    overridden = True
+                    break
+            if not overridden:
+                infls_out.append(lopri_infl)
+
+        return infls_out
+
+    def _cache_pronoun_inflections(self, key : str):
+        """
+        Make sure the inflection list for PRON <key> is in the cache, building it once
+        """
+        self._cache_once(self._pron_inflections_cached, key, self._build_pronoun_inflections)
+
+    def _build_pronoun_inflections(self, key : str):
+        """
+        Build the inflection list for PRON <key>, see _cache_pronoun_inflections()
+        `key` must be a string in the format "<decl> <var>", e.g. "1 1"
+        decl cannot be 0, var can
+
+        NOTE: Unlike other parts of speech, we do NOT default to PRON 1 0
+        (or PACK 1 0), see notes.txt.
+        """
+        self._ensure_loaded()
+
+        if len(key) != 3:
+            raise ValueError("Trying to build pronoun inflection but key provided '{0}' is not in the format '<decl> <var>'. Length is not 3.".format(key))
+        if key[1] != ' ':
+            raise ValueError("Trying to build pronoun inflection but key provided '{0}' is not in the format '<decl> <var>'. Space must be in key.".format(key))
+        try:
+            decl_int = int(key[0])
+            var_int = int(key[2])
+        except ValueError:
+            raise ValueError("Trying to build pronoun inflection but key provided '{0}' is not in the format '<decl> <var>'. Declension or variant is not recognzied as a number.".format(key))
+        if key[0] == '0':
+            raise ValueError("Trying to build pronoun inflection but key provided '{0}' is not in the format '<decl> <var>'. Declension cannot be '0'.".format(key))
+
+        # Get inflections, noting priority and keeping age and frequency
+        # first priority
+        Pinfls1 = self.query('PRON', decl=key[0], variant=key[2])
+        # second priority
+        #test_infl = build_inflection(part_of_speech='PRON', decl=key[0], variant='0')
+        #Pinfls2 = [n for n in inflections['PRON'] if test_infl.matches(n)]
+
+        infls_out = Pinfls1  # Start with top priority, which must be included
+
+        # Now check for gaps (not used for PRON)
+        #for lopri_infl in Pinfls2:
+        #    overridden=False
+        #    for hipri_infl in Pinfls1:
+        #        if hipri_infl.overrides(lopri_infl):
+        #            overridden=True
+        #            break
+        #    if not overridden:
+        #        infls_out.append(lopri_infl)
+
+        return infls_out
+
+    def _get_possible_noun_inflections(self, dl_entry):
+        # Nouns have gender, which might require including common (C) or specific
+        # (M/F) genders in addition
+        # If noun kind is S (singular only) or M (multiple/plural only), assign number
+        self._ensure_loaded()
+
+        infls_matched = []  # Temporary variable before age/frequency
+        key = '{0} {1}'.format(dl_entry.decl, dl_entry.variant)
+        self._cache_noun_inflections(key)  # Make sure we cache this inflection key
+        infls_all = self._noun_inflections_cached[key]
+
+        for infl in infls_all:
+            matched = True
+            # Check gender
+            if dl_entry.gender in ['M', 'F', 'C']:
+                # Check for M, F, and C genders
+                if infl.gender == 'N':
                     matched = False
-                elif infl.number not in ['S','X']:
+                    continue
+            elif dl_entry.gender == 'N':
+                if infl.gender not in ['N','X']:
                     matched = False
-            elif isinstance(infl,VerbParticipleInfl):
-                # Only gerund i.e. singular future passive participle in oblique cases
-                if infl.case not in ['ABL','ACC','DAT','GEN']:
+                    continue
+            # Check noun kind
+            if dl_entry.noun_kind == 'S':
+                if infl.number == 'P':
                     matched = False
-                if infl.tense != 'FUT':
+                    continue
+            elif dl_entry.noun_kind == 'M':
+                if infl.number == 'S':
                     matched = False
-                if infl.number == 'P':
+                    continue
+
+            if matched:
+                infls_matched.append(infl)
+        return infls_matched
+
+    def _get_possible_adj_inflections(self, dl_entry):
+        # Adjectives are narrowed by comparison SOMETIMES
+        # If comparison is 'X', all are valid
+        # If comparison is 'POS', 'COMP', or 'SUPER', only that comparison is a match
+        self._ensure_loaded()
+
+        infls_matched = []  # Temporary variable before age/frequency
+        key = '{0} {1}'.format(dl_entry.decl,dl_entry.variant)
+        self._cache_adj_inflections(key)
+        infls_all = self._adj_inflections_cached[key]
+
+        for infl in infls_all:
+            matched = True
+            # Check comparison
+            if dl_entry.comparison in ['POS','COMP','SUPER']:
+                if infl.comparison != dl_entry.comparison:
                     matched = False
-                if infl.voice == 'ACTIVE':
+            if matched:
+                infls_matched.append(infl)
+        return infls_matched
+
+    def _get_possible_verb_inflections(self, dl_entry):
+        # Verbs have kinds (DEP, SEMIDEP, PERFDEF, IMPERS, TO_BE, TO_BEING) that we need to check
+        self._ensure_loaded()
+
+        infls_matched = []  # Temporary variable before age/frequency
+        key = '{0} {1}'.format(dl_entry.conj, dl_entry.variant)
+        self._cache_verb_inflections(key)  # Make sure this inflection key is cached
+        infls_all = self._verb_inflections_cached[key]
+
+        for infl in infls_all:
+            matched = True
+            # Check verb types
+            if dl_entry.verb_kind == 'DEP':
+                # Deponent, passive voice only (active meaning), still has present and fut active ppls, fut act. infinitive
+                # No perfect stem, occasionally has no supine
+                # Examples:
+                #   tueor, tueri, tuitis sum
+                if isinstance(infl,VerbInfl):
+                    if infl.voice == 'ACTIVE':
+                        matched = False
+                elif isinstance(infl,VerbParticipleInfl):
+                    if infl.voice == 'PASSIVE':
+                        # TODO gerundive exists in transitive verbs, and intransitive impersonal verbs
+                        # Whitaker has only one verb kind column, so there's not enough information to exclude gerundive
+                        # He notes that the verb kinds are not mutually exclusive; would probably be worth it to refactor
+                        if infl.tense == 'PRES' or infl.tense == 'PERF':
+                            matched = False
+
+            elif dl_entry.verb_kind == 'SEMIDEP':
+                # Passive voice for perfect system, otherwise normal
+                # Usually, but not always, has no perfect stem in dictline entry
+                # Examples:
+                #   defio, defieri
+                #   audeo, audere (optionally semidep., has perfect stem)
+                if isinstance(infl,VerbInfl):
+                    if infl.voice == 'ACTIVE':
+                        if infl.stem == '3':
+                            matched = False
+                elif isinstance(infl,VerbParticipleInfl):
+                    if infl.stem == '3':
+                        matched = False
+                    if infl.voice == 'PASSIVE':
+                        matched = False
+            elif dl_entry.verb_kind == 'PERFDEF':
+                # Perfect stem only, or sometimes supine stem
+                # Examples:
+                #   commemini, commeminisse, - (no supine)
+                #   novi, novisse, notus sum
+                if infl.stem not in ['3','4']:
                     matched = False
+            elif dl_entry.verb_kind == 'IMPERS':
+                # 3rd person singular only, or infinitive or gerund (inflect stem = 0)
+                # Examples:
+                if isinstance(infl,VerbInfl):
+                    if infl.person not in ['3','0']:
+                        matched = False
+                    elif infl.number not in ['S','X']:
+                        matched = False
+                elif isinstance(infl,VerbParticipleInfl):
+                    # Only gerund i.e. singular future passive participle in oblique cases
+                    if infl.case not in ['ABL','ACC','DAT','GEN']:
+                        matched = False
+                    if infl.tense != 'FUT':
+                        matched = False
+                    if infl.number == 'P':
+                        matched = False
+                    if infl.voice == 'ACTIVE':
+                        matched = False
 
-        elif dl_entry.verb_kind == 'TO_BE':
-            # esse, not used because it's handled as a unique
-            pass
-        elif dl_entry.verb_kind == 'TO_BEING':
-            # like esse, need to revisit this and figure out how to use it... TODO
-            pass
-        if matched:
-            infls_matched.add(infl)
-    return infls_matched
-
-
-def _get_possible_num_inflections(dl_entry):
-    # This method is basically a pass-through for now, but if it changes, things can be added
-    global inflections
-    global _num_inflections_cached
-    infls_matched = set()  # Temporary variable before age/frequency
-    key = '{0} {1}'.format(dl_entry.decl, dl_entry.variant)
-    _cache_num_inflections(key)  # Make sure this inflection key is cached
-    infls_all = _num_inflections_cached[key]
-
-    for infl in infls_all:
-        matched = True
-        if matched:
-            infls_matched.add(infl)
-    return infls_matched
-
-
-def _get_possible_pron_inflections(dl_entry):
-    # This is basically a pass-through unless any special cases crop up
-    global inflections
-    global _pron_inflections_cached
-    infls_matched = set()  # Temporary variable before age/frequency
-    key = '{0} {1}'.format(dl_entry.decl, dl_entry.variant)
-    _cache_pronoun_inflections(key)  # Make sure this inflection key is cached
-    infls_all = _pron_inflections_cached[key]
-
-    for infl in infls_all:
-        matched = True
-        if matched:
-            infls_matched.add(infl)
-    return infls_matched
+            elif dl_entry.verb_kind == 'TO_BE':
+                # esse, not used because it's handled as a unique
+                pass
+            elif dl_entry.verb_kind == 'TO_BEING':
+                # like esse, need to revisit this and figure out how to use it... TODO
+                pass
+            if matched:
+                infls_matched.append(infl)
+        return infls_matched
+
+    def _get_possible_num_inflections(self, dl_entry):
+        # This method is basically a pass-through for now, but if it changes, things can be added
+        self._ensure_loaded()
+        infls_matched = []  # Temporary variable before age/frequency
+        key = '{0} {1}'.format(dl_entry.decl, dl_entry.variant)
+        self._cache_num_inflections(key)  # Make sure this inflection key is cached
+        infls_all = self._num_inflections_cached[key]
+
+        for infl in infls_all:
+            matched = True
+            if matched:
+                infls_matched.append(infl)
+        return infls_matched
+
+    def _get_possible_pron_inflections(self, dl_entry):
+        # This is basically a pass-through unless any special cases crop up
+        self._ensure_loaded()
+        infls_matched = []  # Temporary variable before age/frequency
+        key = '{0} {1}'.format(dl_entry.decl, dl_entry.variant)
+        self._cache_pronoun_inflections(key)  # Make sure this inflection key is cached
+        infls_all = self._pron_inflections_cached[key]
+
+        for infl in infls_all:
+            matched = True
+            if matched:
+                infls_matched.append(infl)
+        return infls_matched
+
+    def get_possible_inflections(self, dl_entry,infl_ages=None,infl_frequencies=None):
+        """
+        Given a dictline entry, return a list of all possible inflections
+
+        Some notable special cases:
+        -Nouns-
+            N kind=S    Singular only
+            N kind=M    Plural/multiple only
+        -Verbs-
+            V 0 0 is shared for all decl/var combinations, except when overridden
+            V x 0 is shared for all variants of declension `x`, except when overridden
+            V 3 1       Unique handling depending on whether stem ends in -c
+            V 7 x       Defective verbs
+            V 8 0       Irregular verbs, overrides FUTP IND and PERF/PLUP SUB
+            V DEP       Passive voice only, and PRES/FUT ACTIVE VPAR, FUT ACTIVE INF
+            V SEMIDEP   Passive voice for stem 3 (perfect stem), otherwise active or passive
+            V IMPERS    3rd person singular, infinitive, and gerund
+            V PERFDEF   Perfect stem only
+            V mood=PPL  Not used
+            V TO_BE     Not used
+            V TO_BEING  Verbs like esse
+        """
+        self._ensure_loaded()
+
+        # Entries with the same signature have the same inflections, see get_inflection_signature()
+        cache_key = (get_inflection_signature(dl_entry), tuple(infl_ages) if infl_ages else None,
+                     tuple(infl_frequencies) if infl_frequencies else None)
+        return list(self._cache_once(self._possible_inflections_cached, cache_key,
+                                     lambda key: self._build_possible_inflections(dl_entry, infl_ages, infl_frequencies)))
+
+    def _build_possible_inflections(self, dl_entry, infl_ages, infl_frequencies):
+        """
+        Build the tuple of possible inflections of a dictline entry, see get_possible_inflections()
+        """
+        pos = dl_entry.pos
+        infls = {}  # Used as an ordered set, so the result is always in the same order
+        infls_matched = []  # Temporary variable before age/frequency
+        if pos in ['PREP','INTERJ','CONJ','ADV']:
+            infls_matched = self.inflections.get(pos, [])  # No inflections for CONJ and INTERJ
+        elif pos == 'ADJ':
+            infls_matched = self._get_possible_adj_inflections(dl_entry)
+        elif pos == 'NUM':
+            infls_matched = self._get_possible_num_inflections(dl_entry)
+        elif pos in ['PRON','PACK']:
+            infls_matched = self._get_possible_pron_inflections(dl_entry)
+        elif pos == 'N':
+            infls_matched = self._get_possible_noun_inflections(dl_entry)
+        elif pos == 'V':
+            infls_matched = self._get_possible_verb_inflections(dl_entry)
+
+        # Remove based on age and frequency
+        for infl in infls_matched:
+            infl_ok = True
+            if infl_ages:
+                if infl.age not in infl_ages and infl.frequency != 'A':
+                    # Note: some inflections (like N 2 4) are only of different ages, these should return if
+                    # the frequency is A!
+                    infl_ok = False
+            if infl_frequencies:
+                if infl.frequency not in infl_frequencies:
+                    infl_ok = False
+
+            if infl_ok:
+                infls[infl] = None
+        return tuple(infls)
+
+    def get_possible_stem_endings(self, dl_entry):
+        """
+        Return a frozenset of the (stem id, ending_vi) pairs which are valid for a dictline entry,
+        using the same inflections as word matching (age 'X', frequency 'A')
+        e.g. ('1','a') and ('2','ae') are in the set for a 1st declension noun
+
+        The sets are computed once per inflection signature (see get_inflection_signature())
+        """
+        self._ensure_loaded()
+        return self._cache_once(self._stem_endings_cached, get_inflection_signature(dl_entry),
+                                lambda key: self._build_stem_endings(dl_entry))
+
+    def _build_stem_endings(self, dl_entry):
+        infls = self.get_possible_inflections(dl_entry, infl_ages=['X'], infl_frequencies=['A'])
+        # Adverb and preposition inflections have no ending
+        return frozenset((infl.stem, getattr(infl, 'ending_vi', '')) for infl in infls)
+
+    def get_synthesis_index(self, dl_entry, infl_ages=None, infl_frequencies=None):
+        """
+        Return the synthesis index of a dictline entry: a dictionary of feature tuples
+        (inflection part of speech, feature values...) -> tuple of (stem id, ending_uvij) pairs,
+        such that a form with those features is the entry's stem with that id plus the ending.
+        The features of each part of speech are listed in `synthesis_features`, e.g.
+            ('N', 'ABL', 'P') -> (('2', 'is'),)                                 for a 1st declension noun
+            ('V', 'PERF', 'ACTIVE', 'SUB', '3', 'P') -> (('3', 'erint'),)       for a verb
+
+        Inflections which apply to several genders, numbers, cases, or comparisons (codes 'C' and 'X')
+        are filed under each of them as well as under their own code. Adverbs are keyed by their
+        comparison only. The index is built from get_possible_inflections() with the given ages and
+        frequencies (default: those used for word matching, age 'X' and frequency 'A'), once per
+        inflection signature.
+        """
+        self._ensure_loaded()
+        if infl_ages is None and infl_frequencies is None:
+            infl_ages,infl_frequencies = ['X'],['A']
+        cache_key = (get_inflection_signature(dl_entry), tuple(infl_ages or ()), tuple(infl_frequencies or ()))
+        return self._cache_once(self._synthesis_cached, cache_key,
+                                lambda key: self._build_synthesis_index(dl_entry, infl_ages, infl_frequencies))
+
+    def _build_synthesis_index(self, dl_entry, infl_ages, infl_frequencies):
+        index = {}  # Values are used as ordered sets
+        for infl in self.get_possible_inflections(dl_entry, infl_ages, infl_frequencies):
+            pos = get_inflection_pos(infl)
+            if pos == 'ADV':
+                if dl_entry.comparison == 'X' and not infl.comparison:
+                    keys = [(pos, _adverb_stem_comparisons[infl.stem])]
+                elif infl.comparison and infl.comparison == dl_entry.comparison:
+                    keys = [(pos, infl.comparison)]
+                else:
+                    continue
+            else:
+                values = [(getattr(infl, name),) + _synthesis_wildcards.get(name, {}).get(getattr(infl, name), ())
+                          for name in synthesis_features[pos]]
+                keys = [(pos,) + key for key in itertools.product(*values)]
+            for key in keys:
+                index.setdefault(key, {})[(infl.stem, getattr(infl, 'ending_uvij', ''))] = None
+        return {key: tuple(stem_endings) for key,stem_endings in index.items()}
+
+    def reverse_ending_lookup(self, e):
+        # Return a list of possible forms that use the ending given by `e`
+        self._ensure_loaded()
+        e = e.strip('-')  # remove any dashes
+        infls = set()
+        for pos in ['N', 'ADJ', 'V', 'VPAR', 'SUPINE']:
+            infls.update(self.query(pos, ending=e))
+        return infls
+
+
+_default_table = InflectionTable()
+
+
+def get_default_inflection_table():
+    """
+    Return the default InflectionTable (INFLECTS.tsv), used by the module-level functions below
+    """
+    return _default_table
+
+
+def load_inflections():
+    _default_table.load()
+
+
+def get_inflections():
+    """
+    Return the main inflections dictionary (part of speech -> list of inflections), loading
+    INFLECTS.tsv the first time it is needed
+    """
+    return _default_table.get_inflections()
+
+
+def set_inflections(infls):
+    """
+    Replace the loaded inflections with `infls` (a dictionary like the one returned by
+    get_inflections(), e.g. from a snapshot) and drop any cached inflection lists
+    """
+    _default_table.set_inflections(infls)
+
+
+def unload_inflections():
+    """
+    Discard the loaded inflections and cached inflection lists, they are reloaded on next use
+    """
+    _default_table.unload()
+
+
+def get_endings(vi=True):
+    """
+    Return the sorted list of all endings found in the inflections, in v and i spelling if
+    `vi` is True, otherwise as spelled in INFLECTS (uvij)
+    """
+    return _default_table.get_endings(vi)
+
+
+def get_ending_trie():
+    """
+    Return the EndingTrie (v and i spelling) for all endings in the loaded inflections
+    """
+    return _default_table.get_ending_trie()
+
+
+def get_inflection_index():
+    """
+    Return the InflectionIndex over the loaded inflections
+    """
+    return _default_table.get_index()
+
+
+def query_inflections(part_of_speech, **criteria):
+    """
+    Return the loaded inflections of `part_of_speech` matching all `criteria`, see
+    InflectionIndex.query(). For example, all ablative plural endings of the third declension:
+        >>> [i.ending_vi for i in query_inflections('N', decl='3', case='ABL', number='P')]
+    """
+    return _default_table.query(part_of_speech, **criteria)
+
+
+def clear_inflection_caches():
+    """
+    Empty the cached inflection lists, e.g. after the inflections have been reloaded
+    """
+    _default_table.clear_caches()
+
+
+def get_inflection_caches():
+    """
+    Return the inflection caches as a dictionary of name -> cache, e.g. to store them in a snapshot
+    """
+    return _default_table.get_caches()
+
+
+def set_inflection_caches(caches):
+    """
+    Replace the inflection caches with `caches`, as returned by get_inflection_caches(). The caches
+    must have been computed from the currently loaded inflections.
+    """
+    _default_table.set_caches(caches)
+
+
+def precompute_inflection_caches(dl_entries):
+    """
+    Fill the inflection caches for every inflection signature found in `dl_entries`, see
+    InflectionTable.precompute_caches()
+    """
+    _default_table.precompute_caches(dl_entries)
 
 
 def get_possible_inflections(dl_entry,infl_ages=None,infl_frequencies=None):
     """
-    Given a dictline entry, return a list of all possible inflections
-
-    Some notable special cases:
-    -Nouns-
-        N kind=S    Singular only
-        N kind=M    Plural/multiple only
-    -Verbs-
-        V 0 0 is shared for all decl/var combinations, except when overridden
-        V x 0 is shared for all variants of declension `x`, except when overridden
-        V 3 1       Unique handling depending on whether stem ends in -c
-        V 7 x       Defective verbs
-        V 8 0       Irregular verbs, overrides FUTP IND and PERF/PLUP SUB
-        V DEP       Passive voice only, and PRES/FUT ACTIVE VPAR, FUT ACTIVE INF
-        V SEMIDEP   Passive voice for stem 3 (perfect stem), otherwise active or passive
-        V IMPERS    3rd person singular, infinitive, and gerund
-        V PERFDEF   Perfect stem only
-        V mood=PPL  Not used
-        V TO_BE     Not used
-        V TO_BEING  Verbs like esse
-    """
-    global inflections
-
-    pos = dl_entry.pos
-    infls = set()
-    infls_matched = set()  # Temporary variable before age/frequency
-    if pos in ['PREP','INTERJ','CONJ','ADV']:
-        infls_matched = inflections[pos]
-    elif pos == 'ADJ':
-        infls_matched = _get_possible_adj_inflections(dl_entry)
-    elif pos == 'NUM':
-        infls_matched = _get_possible_num_inflections(dl_entry)
-    elif pos in ['PRON','PACK']:
-        infls_matched = _get_possible_pron_inflections(dl_entry)
-    elif pos == 'N':
-        infls_matched = _get_possible_noun_inflections(dl_entry)
-    elif pos == 'V':
-        infls_matched = _get_possible_verb_inflections(dl_entry)
-
-    # Remove based on age and frequency
-    for infl in infls_matched:
-        infl_ok = True
-        if infl_ages:
-            if infl.age not in infl_ages and infl.frequency != 'A':
-                # Note: some inflections (like N 2 4) are only of different ages, these should return if
-                # the frequency is A!
-                infl_ok = False
-        if infl_frequencies:
-            if infl.frequency not in infl_frequencies:
-                infl_ok = False
-
-        if infl_ok:
-            infls.add(infl)
-    return infls
+    Given a dictline entry, return a list of all possible inflections, see
+    InflectionTable.get_possible_inflections()
+    """
+    return _default_table.get_possible_inflections(dl_entry, infl_ages, infl_frequencies)
+
+
+def get_possible_stem_endings(dl_entry):
+    """
+    Return a frozenset of the (stem id, ending_vi) pairs which are valid for a dictline entry, see
+    InflectionTable.get_possible_stem_endings()
+    """
+    return _default_table.get_possible_stem_endings(dl_entry)
+
+
+def get_synthesis_index(dl_entry, infl_ages=None, infl_frequencies=None):
+    """
+    Return the synthesis index of a dictline entry (feature tuple -> (stem id, ending) pairs), see
+    InflectionTable.get_synthesis_index()
+    """
+    return _default_table.get_synthesis_index(dl_entry, infl_ages, infl_frequencies)
 
 
 def reverse_ending_lookup(e):
     # Return a list of possible forms that use the ending given by `e`
-    e = e.strip('-')  # remove any dashes
-    infls = set()
-    for pos in ['N', 'ADJ', 'V']:
-        inflection = build_inflection(part_of_speech=pos, ending=e)
-        matches = [inf for inf in inflections[pos] if inflection.matches(inf)]
-        for m in matches:
-            infls.add(m)
-        if pos == 'V':
-            vpar_matches = [inf for inf in inflections['VPAR'] if inflection.matches(inf)]
-            for m in vpar_matches:
-                infls.add(m)
-            supine_matches = [inf for inf in inflections['SUPINE'] if inflection.matches(inf)]
-            for m in supine_matches:
-                infls.add(m)
-    return infls
+    return _default_table.reverse_ending_lookup(e)
+
+
+def __getattr__(name):
+    # `inflections` is loaded lazily, see get_inflections()
+    if name == 'inflections':
+        return get_inflections()
+    if name == 'endings_list_uvij':
+        return get_endings(vi=False)
+    if name == 'endings_list_vi':
+        return get_endings(vi=True)
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
@@ -0,0 +1,180 @@
+'''
+Compiled full-form lexicon
+
+match_word() normally analyzes a word by splitting it into every possible stem and ending,
+looking the stems up in the stem index, and validating the endings against the inflections of
+each entry found. Most words of a text are regular forms of dictionary entries, which can all be
+listed ahead of time: the full-form table maps every form generated by the DICTLINE entries and
+their inflections (v and i spelling) to the (dictline id, split index) pairs of its matches, so
+those words are answered with a single hash probe. Words not in the table (tackons, enclitics,
+misspellings, unknown words) go through the normal matching.
+
+The table is compiled offline from a loaded Lexicon (see Lexicon.build_fullforms()):
+    $ python -m pywords.fullforms
+and memory-mapped when the lexicon is loaded, so it takes no time to load and its pages are
+shared between processes. Like snapshots, a table is only used when it was built from the
+current data files and modules; otherwise it is ignored until it is rebuilt.
+
+A full-form file is laid out as:
+    magic           16 bytes, b'PYWORDS-FULLFORM'
+    version         4 bytes, unsigned int (FULLFORMS_VERSION)
+    sources hash    32 bytes, sha256 of the data files and modules the table was built from
+    slot count      4 bytes, unsigned int, a power of two
+    form count      4 bytes, unsigned int
+    slots           4 bytes per slot, offset of the record in the slot (0: empty slot)
+    records         one per form:
+                        form length     1 byte, length of the utf-8 form
+                        match count     2 bytes
+                        form            utf-8
+                        dictline ids    4 bytes per match
+                        split indices   1 byte per match
+All integers are little-endian. Forms are placed in the slots by open addressing: a form goes in
+the first empty slot from crc32(form) (modulo the slot count) on.
+'''
+
+import os
+import os.path
+import mmap
+import struct
+import tempfile
+import zlib
+
+import pywords.snapshot as snapshot
+
+# Bump this whenever the file layout or the meaning of the records changes
+FULLFORMS_VERSION = 1
+FULLFORMS_MAGIC = b'PYWORDS-FULLFORM'
+_header_format = '<16sI32sII'
+_header_size = struct.calcsize(_header_format)
+_record_header = struct.Struct('<BH')
+_slot = struct.Struct('<I')
+
+fullforms_fname = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/pywords.fullforms')
+
+
+def _get_slot_count(n_forms):
+    # Keep the table at most ~60% full, so most probes find their form in the first slot
+    n_slots = 1
+    while n_slots*3 < n_forms*5:
+        n_slots *= 2
+    return n_slots
+
+
+def write_fullforms(forms, fname=None, sources=None):
+    """
+    Write the full-form table `forms`, a dictionary of form (v and i spelling) -> list of
+    (dictline id, split index) pairs in match order, to the file `fname`
+    `sources` are the files the table was built from (default: snapshot.source_fnames)
+
+    Like snapshots, the file is written to a temporary file first and then moved into place.
+    """
+    fname = fname or fullforms_fname
+    n_slots = _get_slot_count(len(forms))
+    mask = n_slots - 1
+    slots = [0]*n_slots
+    records = bytearray()
+    records_start = _header_size + n_slots*_slot.size
+    for form,matches in forms.items():
+        form_bytes = form.encode()
+        h = zlib.crc32(form_bytes) & mask
+        while slots[h]:
+            h = (h + 1) & mask
+        slots[h] = records_start + len(records)
+        records += _record_header.pack(len(form_bytes), len(matches))
+        records += form_bytes
+        records += struct.pack('<{0}I{0}B'.format(len(matches)), *[dl_id for dl_id,_ in matches],
+                               *[split for _,split in matches])
+    header = struct.pack(_header_format, FULLFORMS_MAGIC, FULLFORMS_VERSION, snapshot.get_sources_checksum(sources),
+                         n_slots, len(forms))
+    fdir = os.path.dirname(os.path.abspath(fname))
+    fd, tmp_fname = tempfile.mkstemp(dir=fdir, prefix='.pywords-fullforms-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(struct.pack('<{0}I'.format(n_slots), *slots))
+            f.write(records)
+        os.replace(tmp_fname, fname)
+    except BaseException:
+        if os.path.exists(tmp_fname):
+            os.remove(tmp_fname)
+        raise
+
+
+class FullFormTable:
+    """
+    Read-only, memory-mapped full-form table (see write_fullforms() for its contents)
+    Use open_fullforms() to open a table only if it is up to date.
+    """
+    def __init__(self, fname):
+        self.fname = fname
+        with open(fname, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < _header_size:
+            self._mm.close()
+            raise ValueError("{0} is not a full-form table".format(fname))
+        magic, self.version, self.sources_hash, self.n_slots, self.n_forms = \
+            struct.unpack_from(_header_format, self._mm)
+        if magic != FULLFORMS_MAGIC:
+            self._mm.close()
+            raise ValueError("{0} is not a full-form table".format(fname))
+        self._mask = self.n_slots - 1
+
+    def get(self, form):
+        """
+        Return the matches of `form` (v and i spelling) as a tuple of (dictline id, split index)
+        pairs, or None if the form is not in the table
+        """
+        mm = self._mm
+        form_bytes = form.encode()
+        h = zlib.crc32(form_bytes) & self._mask
+        while True:
+            offset = _slot.unpack_from(mm, _header_size + h*_slot.size)[0]
+            if offset == 0:
+                return None
+            form_len, n_matches = _record_header.unpack_from(mm, offset)
+            start = offset + _record_header.size
+            if form_len == len(form_bytes) and mm[start:start+form_len] == form_bytes:
+                values = struct.unpack_from('<{0}I{0}B'.format(n_matches), mm, start + form_len)
+                return tuple(zip(values[:n_matches], values[n_matches:]))
+            h = (h + 1) & self._mask
+
+    def __contains__(self, form):
+        return self.get(form) is not None
+
+    def __len__(self):
+        return self.n_forms
+
+    def close(self):
+        self._mm.close()
+
+
+def open_fullforms(fname=None, sources=None):
+    """
+    Return the FullFormTable in the file `fname`, or None if the file is missing, was written by
+    a different version, or is stale (the `sources` files changed since it was built)
+    """
+    fname = fname or fullforms_fname
+    if not os.path.exists(fname):
+        return None
+    try:
+        table = FullFormTable(fname)
+    except (OSError, ValueError):
+        return None
+    try:
+        up_to_date = table.sources_hash == snapshot.get_sources_checksum(sources)
+    except FileNotFoundError:
+        up_to_date = True  # Shipped without the TSVs, as for snapshots
+    if table.version != FULLFORMS_VERSION or not up_to_date:
+        table.close()
+        return None
+    return table
+
+
+def main():
+    import pywords.lookup as lookup
+    fname = lookup.build_fullforms()
+    print("Wrote full-form table to {0}".format(fname))
+
+
+if __name__ == '__main__':
+    main()
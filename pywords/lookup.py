@@ -1,31 +1,31 @@
 # Main methods for looking up words from the dictionary
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+from collections import OrderedDict
 import pywords.definitions as definitions
 from pywords.matchfilter import MatchFilter
+import pywords.snapshot as snapshot
+import pywords.fullforms as fullforms
 import os
 import os.path
-import bisect  # Search
+import sys
 import csv
-import copy  # For deep copies
+import heapq
+import threading
+from time import perf_counter
+from array import array
 from typing import List  # For type hints with lists of objects
 
-###############
-# GLOBAL DATA #
-dictline = []
-dictline_ignoreuvij = []
-stems1 = []
-stems2 = []
-stems3 = []
-stems4 = []
-tackons = []
-tackon_suffix_set = set()
-###############
+_default_dictline_fname = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/DICTLINE.tsv')
+_default_tackons_fname = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/TACKONS.tsv')
+_default_uniques_fname = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/UNIQUES.tsv')
+_default_esse_fname = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/ESSE.tsv')
 
 
-@dataclass
+@dataclass(frozen=True)
 class WordMatch:
     """
     WordMatch objects represent a single word lookup match result
+    They are immutable, because match_word() results are cached and shared between calls
 
     @params
         match_stem  Stem string that was matched
@@ -35,6 +35,10 @@ class WordMatch:
         dl_stem3    Dictline stem 3
         dl_stem4    Dictline stem 4
         dl_entry    Dictline entry (DictlineBaseEntry subclass)
+        dl_id       Index of the entry in the lexicon's dictline list (not compared)
+        unique      True for a match of a unique form (UNIQUES.tsv, or a form of sum from ESSE.tsv),
+                    which is matched whole and has no dl_id
+        unique_inflections  Inflections of a unique form, from its rows (not compared)
     """
     match_stem: str
     match_ending: str
@@ -43,6 +47,9 @@ class WordMatch:
     dl_stem3: str
     dl_stem4: str
     dl_entry: definitions.DictlineBaseEntry
+    dl_id: int = field(default=-1, compare=False)
+    unique: bool = False
+    unique_inflections: tuple = field(default=(), compare=False, repr=False)
 
     def get_stem_ids(self):
         """
@@ -73,298 +80,1494 @@ class WordMatch:
             raise ValueError("get_stem() failed with invalid stem ID string {0}. This method accepts a string number in ['1','2','3','4']".format(id))
 
 
-def load_dictionary():
+@dataclass(frozen=True)
+class Analysis:
     """
-    Load main dictionary database
-
-    To handle the u/v and i/j problems, two almost identical copies are made
-    (not ideal I know), one with dictionary spelling, one with all u's and i's 
-    replaced with v's and j's (resp.). We perform searches using the latter,
-    but return the former. It's a workaround.
-    """
-    global stems1,stems2,stems3,stems4
-    global dictline
-    global dictline_ignoreuvij
-
-    dl_fname = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/DICTLINE.tsv')
-    if not os.path.exists(dl_fname):
-        print("FATAL ERROR: Could not find DICTLINE.tsv. This is the file that contains all words and definitions, which PyWORDS uses for word lookup. It should be included in the installation directory.")
-        raise FileNotFoundError
-    with open(dl_fname) as f:
-        reader = csv.DictReader(f,delimiter='\t')
-        dictline_rows = [row for row in reader]
-
-    # First get column names and index them in case the order changes
-    # Get dictline table
-    # For every entry, populate global `dictline`
-    for row in dictline_rows:
-        stem1 = row['dl_stem1'] or ''
-        stem2 = row['dl_stem2'] or ''
-        stem3 = row['dl_stem3'] or ''
-        stem4 = row['dl_stem4'] or ''
-        entry = definitions.build_dictline_entry(row)
-
-        dictline.append( {'stem1':stem1,
-                          'stem2':stem2,
-                          'stem3':stem3,
-                          'stem4':stem4,
-                          'entry':entry})
-        dictline_ignoreuvij.append( {'stem1':stem1.replace('j','i').replace('u','v'),
-                          'stem2':stem2.replace('j','i').replace('u','v'),
-                          'stem3':stem3.replace('j','i').replace('u','v'),
-                          'stem4':stem4.replace('j','i').replace('u','v'),
-                          'entry':entry})
-
-    # Get sorted stems with original indices
-    # enumerate provides iterable with (idx,element) tuples
-    # sorted key uses element (e[1]) as sort parameter
-    # sorted returns a list of tuples (idx,element), and then all tuples are flipped
-    # to give (element,idx)
-    stems1 = sorted(enumerate([d['stem1'] for d in dictline_ignoreuvij],start=0),key=lambda e:e[1])
-    stems1 = [(s[1],s[0]) for s in stems1] # Flip elements for comparison later
-    stems2 = sorted(enumerate([d['stem2'] for d in dictline_ignoreuvij],start=0),key=lambda e:e[1])
-    stems2 = [(s[1],s[0]) for s in stems2] # Flip elements for comparison later
-    stems3 = sorted(enumerate([d['stem3'] for d in dictline_ignoreuvij],start=0),key=lambda e:e[1])
-    stems3 = [(s[1],s[0]) for s in stems3] # Flip elements for comparison later
-    stems4 = sorted(enumerate([d['stem4'] for d in dictline_ignoreuvij],start=0),key=lambda e:e[1])
-    stems4 = [(s[1],s[0]) for s in stems4] # Flip elements for comparison later
-
-    dictline_rows = None # Clean up
+    One analysis of a word: a dictionary entry (from a WordMatch) and an inflection which fits the
+    word, returned by analyze_word(). get_paradigm() returns one for each form of an entry.
+    Analyses only hold references to the match and inflection; the codes are read from them, and
+    text is only formatted when one of the string methods is called.
 
+    @params
+        word        Word that was analyzed
+        match       WordMatch of the word with the entry
+        inflection  Inflection object (NounInfl, VerbInfl, ...), or None for entries without
+                    inflections (conjunctions, interjections, and some prepositions)
+    """
+    word: str
+    match: WordMatch
+    inflection: object = None
 
-def load_tackons():
-    global tackons,tackon_suffix_set
-
-    # First get column names and index them in case the order changes
-    # Get inflects table
-    tackon_fname = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data/TACKONS.tsv')
-    if not os.path.exists(tackon_fname):
-        print("ERROR: Could not find TACKONS.tsv. This is the file that contains word endings like -libet, -cumque, and others. It should have been included in your installation under data/.")
-        raise FileNotFoundError
-    with open(tackon_fname) as f:
-        reader = csv.DictReader(f,delimiter='\t')
-        tackon_rows = [row for row in reader]  # tackon_rows is now a list of dictionaries, each dict represents a row
-    for tackon in tackon_rows:
-        tackons.append(definitions.Tackon(tackon['tackon_suffix'],
-                                          tackon['tackon_senses'],
-                                          tackon['tackon_wordpos'],
-                                          tackon['tackon_worddecl'],
-                                          tackon['tackon_wordvariant'],
-                                          tackon['tackon_wordgender'],
-                                          tackon['tackon_wordplurality'],
-                                          tackon['tackon_wordcase'],
-                                          tackon['tackon_wordkind']
-                                          ))
-        tackon_suffix_set.add(tackon['tackon_suffix'])
+    @property
+    def dl_id(self):
+        return self.match.dl_id
 
+    @property
+    def entry(self):
+        return self.match.dl_entry
 
-def find_endings(w,skip_zero=False):
-    """ 
-    Returns a list of 'splits', index where the split occurs, such that the stem is w[:split_idx]
-    and the ending is w[split_idx:]
-    If skip_zero==True, assume there is an ending and start with 1 letter instead of ending=''
-    """
-    endings = {}
-    splits = []
-    w = w.replace('u','v').replace('j','i')  # Verify the word is VI and not UVIJ
-    if skip_zero:
-        for i in range(len(w)-1,0,-1):
-            wsub = w[i:]
-            if wsub in definitions.endings_list_vi:
-                endings[w[:i]] = wsub
-                splits.append(i)
-    else:
-        for i in range(len(w),0,-1):
-            wsub = w[i:]
-            if wsub in definitions.endings_list_vi:
-                endings[w[:i]] = wsub
-                splits.append(i)
-    return splits
+    @property
+    def pos(self):
+        return self.match.dl_entry.pos
 
+    @property
+    def stem(self):
+        return self.match.match_stem
 
-def _simple_match(w):
-    """
-    Core word match method. Tries all stem/ending combinations that are valid and searches
-    for the stem in the dictionary. Finally, checks that ending is a valid ending given the
-    dictline entry (declension, conjugation, variant, etc).
+    @property
+    def ending(self):
+        return self.match.match_ending
 
-    Return a list of matched words in the format [stem, ending, dictline entry]
+    @property
+    def stem_ids(self):
+        return self.match.get_stem_ids()
+
+    @property
+    def codes(self):
+        """
+        Dictionary of the inflection codes (case, number, tense, ...), empty without an inflection
+        The part of speech of the inflection is included as 'pos', e.g. 'VPAR' for a participle.
+        """
+        if self.inflection is None:
+            return {}
+        codes = {'pos': definitions.get_inflection_pos(self.inflection)}
+        codes.update((name, getattr(self.inflection, name)) for name in self.inflection._fields
+                     if name not in ('ending_uvij', 'ending_vi'))
+        return codes
+
+    def to_dict(self):
+        """
+        Return the analysis as a JSON-serializable dictionary
+        """
+        entry = self.entry
+        return {'word': self.word,
+                'id': self.dl_id,
+                'stem': self.stem,
+                'ending': self.ending,
+                'stem_ids': self.stem_ids,
+                'entry': {name: getattr(entry, name) for name in entry._fields},
+                'inflection': self.codes or None}
+
+    def get_inflection_string(self, less=False):
+        if self.inflection is None:
+            return ''
+        return self.inflection.get_inflection_string(less=less)
+
+    def get_dictionary_string(self, full_info=False, header_only=False, markdown_fmt=False):
+        return get_dictionary_string(self.match, full_info=full_info, header_only=header_only,
+                                     markdown_fmt=markdown_fmt)
+
+    def __str__(self):
+        # Same format as get_word_inflections()
+        head = self.get_dictionary_string(header_only=True)
+        if self.inflection is None:
+            return head
+        return self.get_inflection_string() + ' ' + head
+
+
+def build_stem_index(dl):
     """
-    matches = []
-    raw_w = w
-    w = w.replace('j', 'i').replace('u', 'v')
-    end_splits = find_endings(w)  # Get potential stem/ending pairs (ignores inflection)
+    Build the stem index from a dictline list, with stems normalized to v and i spelling
 
-    for split_idx in end_splits:
-        stem = w[:split_idx]
-        e = w[split_idx:]
-        match_ids = []
-        # STEM SEARCH
-        # Search for stem in each stem column (1,2,3,4)
-        idx1_s = bisect.bisect(stems1,(stem,0)) # First entry match
-        if idx1_s != len(stems1) and stems1[idx1_s][0] == stem: # if actual match
-            idx1_e = idx1_s  # find end index, last element that is a true match
-            while stems1[idx1_e][0] == stem and idx1_e+1 < len(stems1):
-                idx1_e += 1
-            # stems1[idx1_e-1] is now the last matching stem entry
-            for i in range(idx1_s,idx1_e):
-                if stems1[i][1] not in match_ids:
-                    match_ids.append(stems1[i][1]) # append original indices
-        idx2_s = bisect.bisect(stems2,(stem,0)) # First entry match
-        if idx2_s != len(stems2) and stems2[idx2_s][0] == stem: # if actual match
-            idx2_e = idx2_s  # find end index, last element that is a true match
-            while stems2[idx2_e][0] == stem and idx2_e+1 < len(stems1):
-                idx2_e += 1
-            # stems2[idx2_e-1] is now the last matching stem entry
-            for i in range(idx2_s,idx2_e):
-                if stems2[i][1] not in match_ids:
-                    match_ids.append(stems2[i][1]) # append original indices
-        idx3_s = bisect.bisect(stems3,(stem,0)) # First entry match
-        if idx3_s != len(stems3) and stems3[idx3_s][0] == stem: # if actual match
-            idx3_e = idx3_s  # find end index, last element that is a true match
-            while stems3[idx3_e][0] == stem and idx3_e+1 < len(stems1):
-                idx3_e += 1
-            # stems3[idx3_e-1] is now the last matching stem entry
-            for i in range(idx3_s,idx3_e):
-                if stems3[i][1] not in match_ids:
-                    match_ids.append(stems3[i][1]) # append original indices
-        idx4_s = bisect.bisect(stems4,(stem,0)) # First entry match
-        if idx4_s != len(stems4) and stems4[idx4_s][0] == stem: # if actual match
-            idx4_e = idx4_s  # find end index, last element that is a true match
-            while stems4[idx4_e][0] == stem and idx4_e+1 < len(stems1):
-                idx4_e += 1
-            # stems1[idx4_e-1] is now the last matching stem entry
-            for i in range(idx4_s,idx4_e):
-                if stems4[i][1] not in match_ids:
-                    match_ids.append(stems4[i][1]) # append original indices
-        if match_ids:
-            # GET DICTLINE ENTRIES
-            entries = [dictline[idx] for idx in match_ids]
-            for entr in entries:
-                # ONLY return the original word (with u, v, i, and j instead of just v and i)
-                matches.append(WordMatch(match_stem=raw_w[:split_idx],
-                                         match_ending=raw_w[split_idx:],
-                                         dl_stem1=entr['stem1'],
-                                         dl_stem2=entr['stem2'],
-                                         dl_stem3=entr['stem3'],
-                                         dl_stem4=entr['stem4'],
-                                         dl_entry=entr['entry']
-                                         ))
-
-    # VALIDATE STEM/ENDING PAIRS
-    matches = [match for match in matches if is_possible_ending(match)]
-    return matches
+    The index maps each stem string to an array of packed (dictline id, stem slot) pairs,
+    packed as (id << 2) | (slot - 1) so a pair fits in one unsigned int. Pairs are ordered by
+    slot, then by id, and an entry is only listed once per stem (under the first slot using it),
+    so looking up a stem gives deduplicated ids directly. Empty and '-' stems are not indexed.
+    """
+    index = {}
+    for slot,stem_key in enumerate(['stem1','stem2','stem3','stem4']):
+        for dl_id,d in enumerate(dl):
+            stem = d[stem_key]
+            if stem in ('','-'):
+                continue
+            stem = sys.intern(stem.replace('j','i').replace('u','v'))
+            # Skip if an earlier slot of this entry has the same stem, it's already listed
+            if any(d[k].replace('j','i').replace('u','v') == stem for k in ['stem1','stem2','stem3'][:slot]):
+                continue
+            if stem not in index:
+                index[stem] = array('I')
+            index[stem].append((dl_id << 2) | slot)
+    return index
+
+
+def _find_stem_ids(stem_index, stem):
+    """
+    Return the list of dictline ids whose stems include `stem` (v and i spelling)
+    """
+    return [p >> 2 for p in stem_index.get(stem, ())]
 
 
 def _remove_enclitics(w):
-    if w[-3:] == 'que':
+    w_vi = w.replace('j', 'i').replace('u', 'v')
+    if w_vi[-3:] == 'qve':
         w = w[:len(w)-3] # Remove the 'que'
-    elif w[-2:] == 'ne':
+    elif w_vi[-2:] == 'ne':
         w = w[:len(w)-2] # Remove the 'ne'
-    elif w[-2:] == 've':
+    elif w_vi[-2:] == 've':
         w = w[:len(w)-2] # Remove the 've'
     return w
 
 
-def _match_tackon(w,tackon: definitions.Tackon):
+def _prune_pronouns(matches: List[WordMatch]):
     """
-    Given a plaintext word `w` and a TACKON object `tackon`, determine if this is a match
-
-    Return list of WordMatch objects that work with this TACKON
+    Remove pronoun matches that include "(w/-<tackon>)", e.g. (w/-cumque),
+    because these are handled by the tackon methods.
     """
-    wbase = w[:-len(tackon.suffix)]  # Exclude last <len_suffix> characters
-    wmatches = _simple_match(wbase)
     matches_out = []
-    if len(wmatches)==0:
-        return wmatches
-    for wm in wmatches:
-        if tackon.matches_dictline_entry(wm.dl_entry):
-            wm_infls = definitions.get_possible_inflections(wm.dl_entry,infl_ages=['X'],infl_frequencies=['A'])
-            for wmi in wm_infls:
-                if tackon.matches_inflection(wmi):
-                    matches_out.append(wm)
-                    break  # Break inner loop only, we only need to verify at least one inflection works
+    for m in matches:
+        if m.dl_entry.pos in ['PRON','PACK']:
+            if not m.dl_entry.senses.startswith('(w/-'):
+                matches_out.append(m)
+        else:
+            matches_out.append(m)
+
     return matches_out
 
 
-def _check_tackons(w):
+@dataclass
+class MatchCacheInfo:
     """
-    Check if the word `w` (with uvij spelling) has a valid TACKON ending
+    match_word() cache statistics, returned by match_cache_info()
     """
-    global tackons,tackon_suffix_set
-    # First check for tackon endings
-    possible_tackons = set()
-    matches = []
-    for tack in tackon_suffix_set:
-        if w.endswith(tack):
-            possible_tackons.add(tack)
-    if len(possible_tackons)>0:
-        # Get tackon objects
-        tack_objs = []
-        for tack in possible_tackons:
-            for tack_obj in tackons:  # remember that tackons is global
-                if tack_obj.suffix == tack:
-                    matches += _match_tackon(w, tack_obj)
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
 
-    return matches
 
+class _MatchCache:
+    """
+    Bounded least-recently-used cache of match_word() results
+    Keys are (word with v and i spelling, use_tricks), values are tuples of WordMatch objects
+    Also used for the get_paradigm() cache, with tuples of Analysis objects.
+    A maxsize of 0 disables caching. All methods can be called from several threads.
+    """
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            matches = self.data.get(key)
+            if matches is None:
+                self.misses += 1
+            else:
+                self.data.move_to_end(key)
+                self.hits += 1
+            return matches
+
+    def put(self, key, matches):
+        if self.maxsize <= 0:
+            return
+        with self.lock:
+            self.data[key] = matches
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+                self.evictions += 1
+
+    def resize(self, maxsize):
+        with self.lock:
+            self.maxsize = maxsize
+            while len(self.data) > max(maxsize, 0):
+                self.data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self, reset_stats=False):
+        with self.lock:
+            self.data.clear()
+            if reset_stats:
+                self.hits = 0
+                self.misses = 0
+                self.evictions = 0
+
+    def info(self):
+        with self.lock:
+            return MatchCacheInfo(self.hits, self.misses, self.evictions, len(self.data), self.maxsize)
+
+
+class MatchInstrumentation:
+    """
+    Timings and counters of the word matching stages, collected while instrumentation is enabled
+    (see Lexicon.enable_instrumentation())
+
+    Stages:
+        uniques         Looking words up in the unique (irregular) forms and the forms of sum
+        fullforms       Looking words up in the full-form table, if the lexicon has one
+        find_endings    Splitting words into candidate stems and endings
+        stem_search     Looking up the candidate stems in the stem index
+        validate        Checking that the endings are possible for the matched entries
+        tackons         Matching words with tackons, when the plain match fails
+        enclitics       Matching words without their enclitic, when the tackon match fails too
+    The fallback stages (tackons, enclitics) include the fullforms, find_endings, stem_search, and
+    validate work they do, which is counted in those stages as well.
+
+    Counters:
+        words               Words matched (cache misses only, cached words do no matching work)
+        unique_hits         Words which are unique forms (they are matched as regular forms too)
+        fullform_hits       Words found in the full-form table, which need none of the later stages
+        splits              Candidate stem/ending splits tried
+        stems_probed        Stems looked up in the stem index
+        candidates          Stem matches whose ending was validated
+        valid               Candidates with a possible ending
+        tackon_fallbacks    Words which fell back to tackon matching
+        enclitic_fallbacks  Words which fell back to enclitic removal
+
+    The `slowest` words matched are kept with their time, to find pathological inputs.
+    """
+    stages = ['uniques', 'fullforms', 'find_endings', 'stem_search', 'validate', 'tackons', 'enclitics']
+    counter_names = ['words', 'unique_hits', 'fullform_hits', 'splits', 'stems_probed', 'candidates', 'valid',
+                     'tackon_fallbacks', 'enclitic_fallbacks']
+
+    def __init__(self, slowest=10):
+        self.slowest = slowest
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.times = dict.fromkeys(self.stages, 0.0)
+            self.calls = dict.fromkeys(self.stages, 0)
+            self.counters = dict.fromkeys(self.counter_names, 0)
+            self._slowest_words = []  # Min-heap of (seconds, word)
+
+    def record(self, stage, seconds, **counts):
+        """
+        Add a call of `stage` which took `seconds`, and add `counts` to the counters
+        """
+        with self.lock:
+            self.times[stage] += seconds
+            self.calls[stage] += 1
+            for name,n in counts.items():
+                self.counters[name] += n
 
-def _prune_pronouns(matches: List[WordMatch]):
+    def record_word(self, w, seconds):
+        """
+        Count a matched word, which took `seconds` to match, and keep it if it's one of the slowest
+        """
+        with self.lock:
+            self.counters['words'] += 1
+            if len(self._slowest_words) < self.slowest:
+                heapq.heappush(self._slowest_words, (seconds, w))
+            elif self.slowest > 0 and seconds > self._slowest_words[0][0]:
+                heapq.heapreplace(self._slowest_words, (seconds, w))
+
+    def get_slowest_words(self):
+        """
+        Return the slowest words matched as a list of (word, seconds), slowest first
+        """
+        with self.lock:
+            return [(w, t) for t,w in sorted(self._slowest_words, reverse=True)]
+
+    def to_dict(self):
+        """
+        Return the timings and counters as a JSON-serializable dictionary
+        """
+        with self.lock:
+            stages = {stage: {'seconds': self.times[stage], 'calls': self.calls[stage]} for stage in self.stages}
+            counters = dict(self.counters)
+        return {'stages': stages, 'counters': counters,
+                'slowest_words': [{'word': w, 'seconds': t} for w,t in self.get_slowest_words()]}
+
+    def format_report(self):
+        """
+        Return a plain text report of the timings and counters
+        """
+        report = self.to_dict()
+        lines = ['{0:<16} {1:>10} {2:>10} {3:>12}'.format('stage', 'calls', 'total ms', 'us/call')]
+        for stage,stats in report['stages'].items():
+            per_call = stats['seconds']/stats['calls']*1e6 if stats['calls'] else 0.0
+            lines.append('{0:<16} {1:>10} {2:>10.3f} {3:>12.3f}'.format(stage, stats['calls'], stats['seconds']*1e3,
+                                                                       per_call))
+        lines.append('')
+        for name,n in report['counters'].items():
+            lines.append('{0:<20} {1:>10}'.format(name, n))
+        if report['slowest_words']:
+            lines.append('')
+            lines.append('slowest words (ms):')
+            for item in report['slowest_words']:
+                lines.append('  {0:<24} {1:>10.3f}'.format(item['word'], item['seconds']*1e3))
+        return '\n'.join(lines)
+
+
+def _respell_matches(matches, w):
     """
-    Remove pronoun matches that include "(w/-<tackon>)", e.g. (w/-cumque),
-    because these are handled by the tackon methods.
+    Return a list of `matches` with match_stem and match_ending spelled as in `w`
+    Cached matches may come from a word with different u/v and i/j spelling. The stem and ending
+    are always a prefix of the word, and spelling doesn't change the length, so slice them from `w`.
     """
-    matches_out = []
+    out = []
     for m in matches:
-        if m.dl_entry.pos in ['PRON','PACK']:
-            if not m.dl_entry.senses.startswith('(w/-'):
-                matches_out.append(m)
+        stem_len = len(m.match_stem)
+        end_len = stem_len + len(m.match_ending)
+        if m.match_stem == w[:stem_len] and m.match_ending == w[stem_len:end_len]:
+            out.append(m)
         else:
-            matches_out.append(m)
+            out.append(replace(m, match_stem=w[:stem_len], match_ending=w[stem_len:end_len]))
+    return out
 
-    return matches_out
+
+class Lexicon:
+    """
+    A dictionary to look up words in: DICTLINE entries and their stem index, TACKONS, UNIQUES, the
+    inflections (an InflectionTable), and the match_word() cache
+
+    Nothing is loaded when a Lexicon is created. The data is loaded the first time it is needed,
+    e.g. by match_word(), or explicitly with warm(). Lexicons are independent of each other, so
+    e.g. the standard dictionary and one extended with more DICTLINE-format files can be used
+    side by side:
+        >>> extended = Lexicon(dictline_fnames=[lookup.DEFAULT_DICTLINE_FNAME, 'my_words.tsv'])
+        >>> extended.match_word('computatrum')
+
+    The module-level functions (match_word(), lookup_word(), ...) use the default lexicon, see
+    get_default_lexicon(). The old module globals (lookup.dictline, lookup.tackons, ...) are
+    still available and load the default lexicon on access.
+
+    A lexicon can be shared between threads, e.g. in a web application. It is loaded once, even
+    when several threads look up their first words at the same time, and the loaded data is not
+    modified afterwards; the inflection caches and the match_word() cache are filled under locks
+    (see definitions.InflectionTable). Reloading (load(), build_snapshot()) while other threads are
+    looking up words is not supported. Call warm() before starting the threads to keep the first
+    requests fast.
+
+    @params
+        dictline_fnames     List of DICTLINE-format TSV files, loaded in order (default: DICTLINE.tsv)
+        tackons_fname       TACKONS-format TSV file (default: TACKONS.tsv)
+        uniques_fname       UNIQUES-format TSV file of irregular forms (default: UNIQUES.tsv)
+        esse_fname          ESSE-format TSV file of the forms of sum, esse (default: ESSE.tsv)
+        inflections         InflectionTable to use (default: a new table for INFLECTS.tsv)
+        snapshot_fname      Snapshot file to load from, written by build_snapshot() (default: no snapshot)
+        match_cache_size    Maximum number of words in the match_word() cache
+        fullforms_fname     Full-form table to answer known forms from, see build_fullforms()
+                            (default: no table)
+        paradigm_cache_size Maximum number of entries in the get_paradigm() cache
+    """
+    # Loaded data stored in snapshots, besides the inflections
+    _data_names = ['dictline','stem_index','tackons','tackon_suffix_set','uniques']
+
+    def __init__(self, dictline_fnames=None, tackons_fname=None, inflections=None, snapshot_fname=None,
+                 match_cache_size=10000, fullforms_fname=None, paradigm_cache_size=1000, uniques_fname=None,
+                 esse_fname=None):
+        self.dictline_fnames = list(dictline_fnames or [_default_dictline_fname])
+        self.tackons_fname = tackons_fname or _default_tackons_fname
+        self.uniques_fname = uniques_fname or _default_uniques_fname
+        self.esse_fname = esse_fname or _default_esse_fname
+        self.inflections = inflections or definitions.InflectionTable()
+        self.snapshot_fname = snapshot_fname
+        self.fullforms_fname = fullforms_fname
+        self._match_cache = _MatchCache(match_cache_size)
+        self._paradigm_cache = _MatchCache(paradigm_cache_size)
+        self._synthesis_entries = {}  # dl_id -> (part of speech, stems, synthesis index, excluded pair)
+        self._lock = threading.RLock()  # Held while loading
+        self._instrumentation = None  # MatchInstrumentation while enabled, see enable_instrumentation()
+        self.loaded = False
+        self.dictline = []
+        self.stem_index = {}
+        self.tackons = []
+        self.tackon_suffix_set = set()
+        self.uniques = {}  # form (v and i spelling) -> tuple of (stems, entry, tuple of inflections)
+        self.fullforms = None  # FullFormTable, opened when loading
+
+    def clear(self):
+        self.loaded = False
+        self.dictline = []
+        self.stem_index = {}
+        self.tackons = []
+        self.tackon_suffix_set = set()
+        self.uniques = {}
+        self._close_fullforms()
+        self._match_cache.clear()
+        self._paradigm_cache.clear()
+        self._synthesis_entries.clear()
+
+    ###############
+    # LOADING #####
+
+    def warm(self, use_snapshot=True, precompute=False):
+        """
+        Load the dictionary data now instead of on first use
+        Does nothing if it is already loaded. Return the lexicon.
+        If precompute is True, the inflection caches are filled too, see precompute_inflections().
+        """
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:  # Another thread may have loaded it while we waited
+                    self.load(use_snapshot, precompute)
+        return self
+
+    def load(self, use_snapshot=True, precompute=False):
+        """
+        Load (or reload) the dictionary, inflections, tackons, unique forms, and forms of sum
+        This normally happens automatically on first use, see warm()
+
+        If use_snapshot is True and the lexicon has a snapshot file, the snapshot is used when it
+        exists and is up to date. Otherwise the TSV files are parsed. Snapshots are only read here,
+        build or refresh them with build_snapshot() (or python -m pywords.snapshot).
+        If precompute is True, the inflection caches are filled now (see precompute_inflections()),
+        snapshots already include them.
+        """
+        with self._lock:
+            self._load(use_snapshot, precompute)
+
+    def _load(self, use_snapshot, precompute):
+        use_snapshot = use_snapshot and self.snapshot_fname is not None
+        if use_snapshot:
+            payload = snapshot.read_snapshot(self.snapshot_fname, self._get_snapshot_sources())
+            if payload is not None:
+                self._apply_snapshot_payload(payload)
+                return
+        self._load_from_tsv()
+        if precompute:
+            self.precompute_inflections()
+
+    def load_dictionary(self):
+        """
+        Load main dictionary database
+
+        Entries keep their dictionary spelling. To handle the u/v and i/j problems, the stem
+        index is built with all u's and j's replaced with v's and i's (resp.); we search using
+        that spelling but return the dictionary one.
+        """
+        dictline_rows = []
+        for dl_fname in self.dictline_fnames:
+            if not os.path.exists(dl_fname):
+                print("FATAL ERROR: Could not find {0}. This is the file that contains all words and definitions, which PyWORDS uses for word lookup. It should be included in the installation directory.".format(os.path.basename(dl_fname)))
+                raise FileNotFoundError
+            with open(dl_fname) as f:
+                reader = csv.DictReader(f,delimiter='\t')
+                dictline_rows += [row for row in reader]
+
+        # First get column names and index them in case the order changes
+        # Get dictline table
+        # For every entry, populate `dictline`
+        self.dictline = []
+        for row in dictline_rows:
+            # Stems repeat across entries (e.g. 'zz', '-'), intern them to share one copy
+            stem1 = sys.intern(row['dl_stem1'] or '')
+            stem2 = sys.intern(row['dl_stem2'] or '')
+            stem3 = sys.intern(row['dl_stem3'] or '')
+            stem4 = sys.intern(row['dl_stem4'] or '')
+            entry = definitions.build_dictline_entry(row)
+
+            self.dictline.append( {'stem1':stem1,
+                              'stem2':stem2,
+                              'stem3':stem3,
+                              'stem4':stem4,
+                              'entry':entry})
+
+        self.stem_index = build_stem_index(self.dictline)
+
+        dictline_rows = None # Clean up
+
+    def load_tackons(self):
+        # First get column names and index them in case the order changes
+        # Get inflects table
+        if not os.path.exists(self.tackons_fname):
+            print("ERROR: Could not find TACKONS.tsv. This is the file that contains word endings like -libet, -cumque, and others. It should have been included in your installation under data/.")
+            raise FileNotFoundError
+        with open(self.tackons_fname) as f:
+            reader = csv.DictReader(f,delimiter='\t')
+            tackon_rows = [row for row in reader]  # tackon_rows is now a list of dictionaries, each dict represents a row
+        self.tackons = []
+        self.tackon_suffix_set = set()
+        for tackon in tackon_rows:
+            self.tackons.append(definitions.Tackon(tackon['tackon_suffix'],
+                                              tackon['tackon_senses'],
+                                              tackon['tackon_wordpos'],
+                                              tackon['tackon_worddecl'],
+                                              tackon['tackon_wordvariant'],
+                                              tackon['tackon_wordgender'],
+                                              tackon['tackon_wordplurality'],
+                                              tackon['tackon_wordcase'],
+                                              tackon['tackon_wordkind']
+                                              ))
+            self.tackon_suffix_set.add(tackon['tackon_suffix'])
+
+    def load_uniques(self):
+        """
+        Load the unique forms, irregular forms which are not a stem plus an ending of their entry
+        (e.g. agatur, boum, eundem). Each row is its own entry with a single inflection, see
+        definitions.build_unique(). Rows of the same form and entry are merged into one entry with
+        all their inflections, e.g. iusiurandum (NOM and ACC).
+        """
+        if not os.path.exists(self.uniques_fname):
+            print("ERROR: Could not find UNIQUES.tsv. This is the file that contains irregular forms like agatur, boum, and eundem. It should have been included in your installation under data/.")
+            raise FileNotFoundError
+        with open(self.uniques_fname) as f:
+            reader = csv.DictReader(f,delimiter='\t')
+            unique_rows = [row for row in reader]
+        self.uniques = {}
+        forms = []
+        for row in unique_rows:
+            entry,infl = definitions.build_unique(row)
+            forms.append((row['unq_form_vi'], (row['unq_form_uvij'], '', '', ''), entry, infl))
+        self._add_unique_forms(forms)
+
+    def load_esse(self):
+        """
+        Load the forms of sum, esse (e.g. est, erant, fuisset), which are matched whole like the
+        unique forms, with the entry of sum, see definitions.build_esse(). Call after load_uniques().
+        """
+        if not os.path.exists(self.esse_fname):
+            print("ERROR: Could not find ESSE.tsv. This is the file that contains the forms of sum, esse. It should have been included in your installation under data/.")
+            raise FileNotFoundError
+        with open(self.esse_fname) as f:
+            reader = csv.DictReader(f,delimiter='\t')
+            esse_rows = [row for row in reader]
+        forms = []
+        for row in esse_rows:
+            entry,infl = definitions.build_esse(row)
+            form_vi = row['esse_form'].replace('j', 'i').replace('u', 'v')
+            forms.append((form_vi, definitions.esse_stems, entry, infl))
+        self._add_unique_forms(forms)
+
+    def _add_unique_forms(self, forms):
+        """
+        Add the (form (v and i spelling), stems, entry, inflection) tuples in `forms` to the unique
+        forms. Forms with the same stems and entry share one match with all their inflections.
+        """
+        uniques = {form_vi: {(stems, entry): list(infls) for stems,entry,infls in found}
+                   for form_vi,found in self.uniques.items()}
+        for form_vi,stems,entry,infl in forms:
+            uniques.setdefault(form_vi, {}).setdefault((stems, entry), []).append(infl)
+        self.uniques = {form_vi: tuple((stems, entry, tuple(infls)) for (stems,entry),infls in found.items())
+                        for form_vi,found in uniques.items()}
+
+    def _load_from_tsv(self):
+        """
+        Parse DICTLINE, INFLECTS, TACKONS, UNIQUES, and ESSE from the TSV files, discarding anything
+        already loaded
+        """
+        self.clear()
+        self.inflections.unload()
+        self.load_dictionary()
+        self.inflections.load()
+        self.load_tackons()
+        self.load_uniques()
+        self.load_esse()
+        self.fullforms = self._open_fullforms()
+        self.loaded = True
+
+    def precompute_inflections(self):
+        """
+        Fill the inflection caches for every declension, conjugation, and variant (and kind, gender,
+        and comparison) used in the dictionary, instead of filling them as words are looked up.
+        This keeps the time to look up a word the same from the first call on. Snapshots always
+        include the precomputed caches.
+        """
+        self.warm()
+        self.inflections.precompute_caches(d['entry'] for d in self.dictline)
+
+    def _get_snapshot_sources(self):
+        """
+        Return the files the snapshot of this lexicon is built from, see snapshot.get_sources_checksum()
+        """
+        return self.dictline_fnames + [self.inflections.fname, self.tackons_fname, self.uniques_fname,
+                                      self.esse_fname] + \
+            snapshot.module_fnames
+
+    def _get_snapshot_payload(self):
+        """
+        Collect the loaded dictionary data into a dictionary for snapshot.write_snapshot()
+        """
+        self.precompute_inflections()
+        return {'dictline': self.dictline,
+                'stem_index': self.stem_index,
+                'inflections': self.inflections.get_inflections(),
+                'inflection_caches': self.inflections.get_caches(),
+                'tackons': self.tackons,
+                'tackon_suffix_set': self.tackon_suffix_set,
+                'uniques': self.uniques}
+
+    def _apply_snapshot_payload(self, payload):
+        """
+        Replace the loaded dictionary data with the contents of a snapshot payload
+        """
+        for name in self._data_names:
+            setattr(self, name, payload[name])
+        self.inflections.set_inflections(payload['inflections'])
+        self.inflections.set_caches(payload['inflection_caches'])
+        self._match_cache.clear()
+        self._paradigm_cache.clear()
+        self._synthesis_entries.clear()
+        self._close_fullforms()
+        self.fullforms = self._open_fullforms()
+        self.loaded = True
+
+    def build_snapshot(self, fname=None):
+        """
+        Parse the TSV data files and compile them into a binary snapshot (see snapshot.py)
+        Return the snapshot filename
+        """
+        fname = fname or self.snapshot_fname
+        if fname is None:
+            raise ValueError("No snapshot file given for this lexicon")
+        with self._lock:
+            self._load_from_tsv()
+            snapshot.write_snapshot(self._get_snapshot_payload(), fname, self._get_snapshot_sources())
+        return fname
+
+    def _open_fullforms(self):
+        """
+        Return the lexicon's full-form table, or None if it has none or the table is out of date
+        """
+        if self.fullforms_fname is None:
+            return None
+        return fullforms.open_fullforms(self.fullforms_fname, self._get_snapshot_sources())
+
+    def _close_fullforms(self):
+        """
+        Close the lexicon's full-form table, if it has one open, so reloading does not leak its mapping
+        """
+        if self.fullforms is not None:
+            self.fullforms.close()
+            self.fullforms = None
+
+    def compile_fullforms(self):
+        """
+        Return the full-form table of the lexicon, a dictionary of form (v and i spelling) -> list
+        of (dictline id, split index) pairs, in the order _simple_match() returns the matches
+
+        Every stem of every entry is combined with each ending its inflections allow for that stem
+        (see definitions.get_possible_stem_endings()), and each candidate match is validated with
+        is_possible_ending(), so the table gives the same matches as the stem and ending search.
+        """
+        self.warm()
+        candidates = {}  # form -> {(split index, dictline id): stem slot the entry is indexed under}
+        all_endings = None
+        for dl_id,d in enumerate(self.dictline):
+            entry = d['entry']
+            stems = [d[k].replace('j','i').replace('u','v') for k in ['stem1','stem2','stem3','stem4']]
+            if entry.pos in ['ADV','PREP','CONJ','INTERJ']:
+                stem_endings = [(str(slot+1), '') for slot in range(4)]
+            elif entry.pos == 'X':  # Any ending, see is_possible_ending()
+                all_endings = all_endings or self.inflections.get_endings(vi=True)
+                stem_endings = [(str(slot+1), e) for slot in range(4) for e in all_endings]
+            else:
+                stem_endings = self.inflections.get_possible_stem_endings(entry)
+            for stem_id,ending in stem_endings:
+                stem = stems[int(stem_id)-1]
+                if stem in ('','-'):
+                    continue
+                # The stem index lists an entry under the first slot with this stem
+                candidates.setdefault(stem + ending, {})[(len(stem), dl_id)] = stems.index(stem)
+
+        forms = {}
+        for form,pairs in candidates.items():
+            # Same order as _build_simple_matches(): shortest ending first, then stem index order
+            ordered = sorted(pairs, key=lambda pair: (-pair[0], pairs[pair], pair[1]))
+            matches = [(dl_id, split_idx) for split_idx,dl_id in ordered
+                       if self.is_possible_ending(self._make_match(form, split_idx, dl_id))]
+            if matches:
+                forms[form] = matches
+        return forms
+
+    def build_fullforms(self, fname=None):
+        """
+        Compile the full-form table of the lexicon (see compile_fullforms()) and write it to `fname`
+        (default: the lexicon's fullforms_fname), see fullforms.py. Return the filename.
+        The lexicon uses the new table if it was written to its fullforms_fname.
+        """
+        fname = fname or self.fullforms_fname
+        if fname is None:
+            raise ValueError("No full-form table file given for this lexicon")
+        with self._lock:
+            forms = self.compile_fullforms()
+            fullforms.write_fullforms(forms, fname, self._get_snapshot_sources())
+            self._close_fullforms()
+            self.fullforms = self._open_fullforms()
+        return fname
+
+    ###############
+    # MATCHING ####
+
+    def find_endings(self,w,skip_zero=False):
+        """
+        Returns a list of 'splits', index where the split occurs, such that the stem is w[:split_idx]
+        and the ending is w[split_idx:]
+        If skip_zero==True, assume there is an ending and start with 1 letter instead of ending=''
+        """
+        w = w.replace('u','v').replace('j','i')  # Verify the word is VI and not UVIJ
+        return self.inflections.get_ending_trie().find_splits(w,skip_zero)
+
+    def _simple_match(self,w):
+        """
+        Core word match method. Tries all stem/ending combinations that are valid and searches
+        for the stem in the dictionary. Finally, checks that ending is a valid ending given the
+        dictline entry (declension, conjugation, variant, etc).
+
+        Return a list of matched words in the format [stem, ending, dictline entry]
+        """
+        self.warm()
+        matches = self._fullform_matches(w)
+        if matches is not None:
+            return matches
+        stats = self._instrumentation
+        w_vi = w.replace('j', 'i').replace('u', 'v')
+        if stats is not None:
+            t = perf_counter()
+        end_splits = self.find_endings(w_vi)  # Get potential stem/ending pairs (ignores inflection)
+        if stats is not None:
+            stats.record('find_endings', perf_counter() - t, splits=len(end_splits))
+            t = perf_counter()
+        # STEM SEARCH
+        # Dictline ids with each stem in any stem column (1,2,3,4), without duplicates
+        stem_ids = {w_vi[:i]: _find_stem_ids(self.stem_index, w_vi[:i]) for i in end_splits}
+        if stats is not None:
+            stats.record('stem_search', perf_counter() - t, stems_probed=len(stem_ids))
+        return self._build_simple_matches(w, end_splits, stem_ids)
+
+    def _fullform_matches(self, w):
+        """
+        Return the _simple_match() matches of `w` (uvij spelling) from the full-form table, or None
+        if the lexicon has no table or `w` is not in it
+        """
+        table = self.fullforms
+        if table is None:
+            return None
+        stats = self._instrumentation
+        if stats is not None:
+            t = perf_counter()
+        found = table.get(w.replace('j', 'i').replace('u', 'v'))
+        if stats is not None:
+            stats.record('fullforms', perf_counter() - t, fullform_hits=int(found is not None))
+        if found is None:
+            return None
+        return [self._make_match(w, split_idx, dl_id) for dl_id,split_idx in found]
+
+    def _unique_matches(self, w):
+        """
+        Return the matches of `w` (uvij spelling) with the unique forms and the forms of sum, see
+        load_uniques() and load_esse()
+        The whole word is the match stem, with an empty ending. The stems are the form itself for
+        UNIQUES entries, and those of sum, esse, fui, futurus for its forms. Unique forms are not
+        DICTLINE entries, so their matches have no dl_id (-1).
+        """
+        stats = self._instrumentation
+        if stats is not None:
+            t = perf_counter()
+        found = self.uniques.get(w.replace('j', 'i').replace('u', 'v'), ())
+        if stats is not None:
+            stats.record('uniques', perf_counter() - t, unique_hits=int(len(found) > 0))
+        return [WordMatch(match_stem=w, match_ending='', dl_stem1=stems[0], dl_stem2=stems[1], dl_stem3=stems[2],
+                          dl_stem4=stems[3], dl_entry=entry, unique=True, unique_inflections=infls)
+                for stems,entry,infls in found]
+
+    def _make_match(self, w, split_idx, dl_id):
+        """
+        Return the WordMatch of word `w` split at `split_idx` with the dictline entry `dl_id`
+        """
+        entr = self.dictline[dl_id]
+        # ONLY return the original word (with u, v, i, and j instead of just v and i)
+        return WordMatch(match_stem=w[:split_idx],
+                         match_ending=w[split_idx:],
+                         dl_stem1=entr['stem1'],
+                         dl_stem2=entr['stem2'],
+                         dl_stem3=entr['stem3'],
+                         dl_stem4=entr['stem4'],
+                         dl_entry=entr['entry'],
+                         dl_id=dl_id)
+
+    def _build_simple_matches(self, w, end_splits, stem_ids):
+        """
+        Build the matches of word `w` (uvij spelling) for each split index in `end_splits`, given
+        the dictline ids of each stem (v and i spelling) in `stem_ids`, and keep the valid ones
+        """
+        matches = []
+        w_vi = w.replace('j', 'i').replace('u', 'v')
+        for split_idx in end_splits:
+            match_ids = stem_ids[w_vi[:split_idx]]
+            if match_ids:
+                # GET DICTLINE ENTRIES
+                for idx in match_ids:
+                    matches.append(self._make_match(w, split_idx, idx))
+
+        # VALIDATE STEM/ENDING PAIRS
+        stats = self._instrumentation
+        if stats is not None:
+            t = perf_counter()
+            n_candidates = len(matches)
+        matches = [match for match in matches if self.is_possible_ending(match)]
+        if stats is not None:
+            stats.record('validate', perf_counter() - t, candidates=n_candidates, valid=len(matches))
+        return matches
+
+    def _match_tackon(self,w,tackon: definitions.Tackon):
+        """
+        Given a plaintext word `w` and a TACKON object `tackon`, determine if this is a match
+
+        Return list of WordMatch objects that work with this TACKON
+        """
+        wbase = w[:-len(tackon.suffix)]  # Exclude last <len_suffix> characters
+        wmatches = self._simple_match(wbase)
+        matches_out = []
+        if len(wmatches)==0:
+            return wmatches
+        for wm in wmatches:
+            if tackon.matches_dictline_entry(wm.dl_entry):
+                wm_infls = self.inflections.get_possible_inflections(wm.dl_entry,infl_ages=['X'],infl_frequencies=['A'])
+                for wmi in wm_infls:
+                    if tackon.matches_inflection(wmi):
+                        matches_out.append(wm)
+                        break  # Break inner loop only, we only need to verify at least one inflection works
+        return matches_out
+
+    def _check_tackons(self,w):
+        """
+        Check if the word `w` (with uvij spelling) has a valid TACKON ending
+        """
+        self.warm()
+        tackons,tackon_suffix_set = self.tackons,self.tackon_suffix_set
+        # First check for tackon endings
+        possible_tackons = set()
+        matches = []
+        w_vi = w.replace('j', 'i').replace('u', 'v')
+        for tack in tackon_suffix_set:
+            if w_vi.endswith(tack.replace('j', 'i').replace('u', 'v')):
+                possible_tackons.add(tack)
+        if len(possible_tackons)>0:
+            # Get tackon objects
+            tack_objs = []
+            for tack in possible_tackons:
+                for tack_obj in tackons:
+                    if tack_obj.suffix == tack:
+                        matches += self._match_tackon(w, tack_obj)
+
+        return matches
+
+    def _match_word_uncached(self, w, use_tricks=False, simple_matches=None):
+        """
+        Try to match a word, with basic tricks (see match_word())
+        If the pruned _simple_match() results for `w` are already known, pass them as `simple_matches`
+        """
+        self.warm()
+        # Unique forms, then plain stem + ending. Many unique forms are also regular forms of other
+        # entries (e.g. vis, the noun, and vis, 2nd person of volo), so both are kept.
+        unique_matches = self._unique_matches(w)
+        if simple_matches is None:
+            simple_matches = _prune_pronouns(self._simple_match(w))
+        simple_matches = unique_matches + simple_matches
+        if len(simple_matches)>0:
+            return simple_matches
+        stats = self._instrumentation
+        # Word + tackon
+        if stats is not None:
+            t = perf_counter()
+        tackon_matches = self._check_tackons(w)
+        if stats is not None:
+            stats.record('tackons', perf_counter() - t, tackon_fallbacks=1)
+        if len(tackon_matches)>0:
+            return tackon_matches
+        # Word + enclitic
+        if stats is not None:
+            t = perf_counter()
+        w = _remove_enclitics(w)
+        matches = _prune_pronouns(self._simple_match(w))
+        if stats is not None:
+            stats.record('enclitics', perf_counter() - t, enclitic_fallbacks=1)
+        return matches
+
+    def match_word(self, w, use_tricks=False):
+        """
+        Try to match a word, with basic tricks. If use_tricks is used, more in depth matching
+        methods are used (not implemented)
+
+        Unique forms (irregular forms from UNIQUES.tsv, e.g. agatur, and the forms of sum from
+        ESSE.tsv, e.g. est) come first, then the stem and
+        ending matches; tackons and enclitics are only tried when neither matched.
+
+        Results are cached by the word's v and i spelling (see set_match_cache_size(),
+        clear_match_cache(), and match_cache_info()). A new list is returned on each call.
+        """
+        key = (w.replace('j', 'i').replace('u', 'v'), use_tricks)
+        matches = self._match_cache.get(key)
+        if matches is None:
+            stats = self._instrumentation
+            if stats is not None:
+                t = perf_counter()
+            matches = tuple(self._match_word_uncached(w, use_tricks))
+            if stats is not None:
+                stats.record_word(w, perf_counter() - t)
+            self._match_cache.put(key, matches)
+            return list(matches)
+        return _respell_matches(matches, w)
+
+    def match_words(self, words, use_tricks=False):
+        """
+        Match every word in the iterable `words`, return a list with the match_word() result
+        (list of WordMatch objects) for each word, in the same order
+
+        This is faster than calling match_word() on each word of a text: words are deduplicated by
+        their v and i spelling, each candidate stem of the batch is looked up once, and the results
+        are shared between repeated words. Results go through the match_word() cache.
+        """
+        words = list(words)
+        self.warm()
+
+        # Normalize and deduplicate, keeping the first spelling of each word
+        unique_words = {}
+        for w in words:
+            unique_words.setdefault(w.replace('j', 'i').replace('u', 'v'), w)
+        results = {}
+        uncached = []
+        for w_vi,w in unique_words.items():
+            matches = self._match_cache.get((w_vi, use_tricks))
+            if matches is None:
+                uncached.append((w_vi, w))
+            else:
+                results[w_vi] = matches
+
+        # Words in the full-form table need no stem search
+        table_matches = {w_vi: self._fullform_matches(w) for w_vi,w in uncached}
+        searched = [(w_vi, w) for w_vi,w in uncached if table_matches[w_vi] is None]
+
+        # Candidate stems of the other uncached words, each looked up once
+        stats = self._instrumentation
+        if stats is not None:
+            t = perf_counter()
+        end_splits = {w_vi: self.find_endings(w_vi) for w_vi,w in searched}
+        if stats is not None:
+            stats.record('find_endings', perf_counter() - t, splits=sum(len(splits) for splits in end_splits.values()))
+            t = perf_counter()
+        stems = {w_vi[:i] for w_vi,splits in end_splits.items() for i in splits}
+        stem_ids = {stem: _find_stem_ids(self.stem_index, stem) for stem in stems}
+        if stats is not None:
+            stats.record('stem_search', perf_counter() - t, stems_probed=len(stem_ids))
+
+        # Build and validate the matches of each unique word
+        for w_vi,w in uncached:
+            if stats is not None:
+                t = perf_counter()
+            simple_matches = table_matches[w_vi]
+            if simple_matches is None:
+                simple_matches = self._build_simple_matches(w, end_splits[w_vi], stem_ids)
+            simple_matches = _prune_pronouns(simple_matches)
+            matches = tuple(self._match_word_uncached(w, use_tricks, simple_matches))
+            if stats is not None:
+                stats.record_word(w, perf_counter() - t)
+            self._match_cache.put((w_vi, use_tricks), matches)
+            results[w_vi] = matches
+
+        # Fan the results back out to every word, spelled as given
+        return [_respell_matches(results[w.replace('j', 'i').replace('u', 'v')], w) for w in words]
+
+    def is_possible_ending(self, m: WordMatch):
+        """
+        Check whether a match is possible
+        match should be returned from e.g. _simple_match and should be in uvij format
+
+        This is one of the key functions in the lookup process, narrowing the list of
+        stem matches to those that are actually possible. It needs to account for different
+        kinds (verb kinds like deponent, impersonal; noun kinds like singular or plural
+        only) but doesn't need to manage SUPINE and VPAR inflections (handled by
+        definitions.get_possible_endings(infl,part_of_speech)
+
+        The valid (stem id, ending) pairs for each kind of entry are precomputed, see
+        definitions.get_possible_stem_endings()
+        """
+        entry = m.dl_entry
+        # Get part of speech, handle internal-only parts for now
+        pos = entry.pos
+        if pos in ['ADV','PREP','CONJ','INTERJ']:
+            if m.match_ending == '':
+                return True
+            else:
+                return False
+        elif pos == 'X':  # Not used in DICTLINE, but just in case
+            return True
+        ending = m.match_ending.replace('u', 'v').replace('j', 'i')
+        stem_endings = self.inflections.get_possible_stem_endings(entry)
+        for stem_id in m.get_stem_ids():
+            # An ending is valid if our stem is the stem id of an inflection with this ending
+            if (stem_id, ending) in stem_endings:
+                ###### SPECIAL CASE ######
+                # V 3 1 with -c stem can have empty ending but otherwise cannot
+
+                # Details: There's an inflection for V 3 1 imperative which only applies to stems
+                # which end in 'c' (inflects id 744). Can this be a new V 3 x variant? Otherwise
+                # we need to process this manually which is ugly
+                # Original WORDS might have organized stems by endings but I don't understand that
+                # codebase so I'm not sure how this gets handled
+                if pos == 'V' and entry.conj == '3' and entry.variant == '1':
+                    if stem_id == '2' and ending == '' and m.dl_stem3[-1] != 'c':
+                        continue
+                ##########################
+                return True
+        return False
+
+    def get_match_inflections(self, m: WordMatch):
+        """
+        Return the inflections of a match's dictline entry which fit its stem and ending, i.e. the
+        possible parses of the matched word (with the inflections used for matching, age 'X' and
+        frequency 'A'). get_word_inflections() describes all forms of the entry instead.
+        The inflections of a unique form match are those of its UNIQUES (or ESSE) rows.
+        """
+        if m.unique:
+            return list(m.unique_inflections)
+        ending = m.match_ending.replace('u', 'v').replace('j', 'i')
+        stem_ids = m.get_stem_ids()
+        infls = self.inflections.get_possible_inflections(m.dl_entry, infl_ages=['X'], infl_frequencies=['A'])
+        # Adverb and preposition inflections have no ending
+        return [infl for infl in infls if infl.stem in stem_ids and getattr(infl, 'ending_vi', '') == ending]
+
+    def get_dictionary_string(self, m: WordMatch, full_info=False, header_only=False, markdown_fmt=False):
+        """
+        Convert a match into a string in dictionary style, with the lexicon's inflections, see
+        get_dictionary_string()
+        """
+        return get_dictionary_string(m, full_info, header_only, markdown_fmt, self.inflections)
+
+    def get_word_inflections(self, m: WordMatch, less=False):
+        """
+        Return all the inflections of a match's dictionary entry as a list of plain text strings, see
+        get_word_inflections(). A unique form only has the inflections of its rows.
+        """
+        entry = m.dl_entry
+        infl_strings = []
+        head = self.get_dictionary_string(m, header_only=True)
+        pos = entry.pos
+        if pos in ['SUFFIX','PREFIX','X']:
+            return []  #TODO ?
+        if m.unique:
+            possible_infls = m.unique_inflections
+        else:
+            possible_infls = self.inflections.get_possible_inflections(entry,infl_ages=['X'],infl_frequencies=['A'])
+        for minfl in possible_infls:
+            if less:
+                infl_strings.append(minfl.get_inflection_string(less=less)+'of '+head)
+            else:
+                infl_strings.append(minfl.get_inflection_string(less=less)+' '+head)
+        return infl_strings
+
+    def analyze_word(self, w):
+        """
+        Return the list of analyses (see Analysis) of word `w`: one for each inflection that fits
+        each match. No text is formatted, use the Analysis methods for that.
+        """
+        return [a for m in self.match_word(w) for a in self.analyze_match(w, m)]
+
+    def analyze_words(self, words):
+        """
+        Analyze every word in the iterable `words`, return a list with the analyze_word() result
+        for each word, in the same order (matched together with match_words())
+        """
+        words = list(words)
+        return [[a for m in matches for a in self.analyze_match(w, m)]
+                for w,matches in zip(words, self.match_words(words))]
+
+    def analyze_match(self, w, m):
+        """
+        Return the analyses of word `w` with one of its matches `m`, see analyze_word()
+        """
+        infls = self.get_match_inflections(m)
+        if not infls:
+            return [Analysis(w, m)]
+        return [Analysis(w, m, infl) for infl in infls]
+
+    #############
+    # PARADIGMS #
+
+    def get_paradigm(self, dl_id, infl_ages=None, infl_frequencies=None):
+        """
+        Return the full declension or conjugation table of the dictline entry `dl_id` (e.g. a
+        WordMatch's dl_id): a list of Analysis objects, one for each form and inflection, in the
+        order of get_possible_inflections(). Verbs include their participles (VPAR) and supines.
+
+        By default the paradigm has the forms word matching uses (inflections of age 'X' and
+        frequency 'A'), so each form matches the entry again; `infl_ages` and `infl_frequencies`
+        select other inflections, as for get_possible_inflections(). Forms are spelled with the
+        dictionary stem and the inflection ending. Inflections whose stem is missing from the entry
+        ('-' in DICTLINE, e.g. verbs without a perfect stem) have no form. Conjunctions and
+        interjections have one form, their stem, without an inflection.
+
+        Paradigms are cached by entry, see paradigm_cache_size.
+        """
+        if infl_ages is None and infl_frequencies is None:
+            infl_ages,infl_frequencies = ['X'],['A']
+        key = (dl_id, tuple(infl_ages or ()), tuple(infl_frequencies or ()))
+        paradigm = self._paradigm_cache.get(key)
+        if paradigm is None:
+            paradigm = self._build_paradigm(dl_id, infl_ages, infl_frequencies)
+            self._paradigm_cache.put(key, paradigm)
+        return list(paradigm)
+
+    def get_paradigms(self, dl_ids, infl_ages=None, infl_frequencies=None):
+        """
+        Return the get_paradigm() result for each dictline id in the iterable `dl_ids`, in order
+        Entries with the same inflections share the work of resolving them.
+        """
+        return [self.get_paradigm(dl_id, infl_ages, infl_frequencies) for dl_id in dl_ids]
+
+    def _build_paradigm(self, dl_id, infl_ages, infl_frequencies):
+        """
+        Build the tuple of Analysis objects of the paradigm of entry `dl_id`, see get_paradigm()
+        """
+        self.warm()
+        if dl_id < 0:
+            raise ValueError("No dictline entry {0}, unique forms have no paradigm".format(dl_id))
+        d = self.dictline[dl_id]
+        entry = d['entry']
+        if entry.pos in ['CONJ','INTERJ']:
+            stem = d['stem1']
+            return (Analysis(stem, self._make_match(stem, len(stem), dl_id)),)
+        paradigm = []
+        for infl in self.inflections.get_possible_inflections(entry, infl_ages, infl_frequencies):
+            stem = d['stem' + infl.stem]
+            if stem in ('', '-'):
+                continue
+            ending = getattr(infl, 'ending_uvij', '')  # Adverb and preposition inflections have no ending
+            # V 3 1 only has the empty stem 2 ending with a -c stem, see is_possible_ending()
+            if entry.pos == 'V' and entry.conj == '3' and entry.variant == '1':
+                if infl.stem == '2' and ending == '' and d['stem3'][-1] != 'c':
+                    continue
+            form = stem + ending
+            paradigm.append(Analysis(form, self._make_match(form, len(stem), dl_id), infl))
+        return tuple(paradigm)
+
+    def synthesize(self, dl_id, pos=None, **features):
+        """
+        Return the list of forms of the dictline entry `dl_id` which have the inflection `features`,
+        e.g. for aqua (dl_id 4285) and amo (dl_id 2840):
+            >>> lexicon.synthesize(4285, case='ABL', number='P')
+            ['aquis']
+            >>> lexicon.synthesize(2840, tense='PERF', voice='ACTIVE', mood='SUB', person='3', number='P')
+            ['amaverint']
+
+        `pos` is the part of speech of the inflection (default: the entry's, PRON for PACK), e.g.
+        'VPAR' or 'SUPINE' for the participles and supines of a verb. The features are the inflection
+        attributes listed in definitions.synthesis_features[pos], with the usual codes. When all of
+        them are given, the forms are found with one probe of the entry's synthesis index (see
+        definitions.get_synthesis_index()); otherwise all forms with the given features are returned.
+        The forms are those of get_paradigm() with the default inflections, without duplicates; an
+        empty list means the entry has no such form.
+        """
+        synthesis_entry = self._synthesis_entries.get(dl_id)
+        if synthesis_entry is None:
+            synthesis_entry = self._get_synthesis_entry(dl_id)
+        entry_pos,stems,index,excluded = synthesis_entry
+        pos = pos or entry_pos
+        names = definitions.synthesis_features.get(pos)
+        if names is None:
+            raise ValueError("No inflections for part of speech '{0}'".format(pos))
+        if len(features) == len(names):
+            try:
+                stem_endings = index.get((pos,) + tuple(features[name] for name in names), ())
+            except KeyError as e:
+                raise ValueError("'{0}' is not a feature of {1} inflections".format(e.args[0], pos))
+        else:
+            for name in features:
+                if name not in names:
+                    raise ValueError("'{0}' is not a feature of {1} inflections".format(name, pos))
+            positions = [(names.index(name) + 1, value) for name,value in features.items()]
+            stem_endings = {}  # Ordered set
+            for key,pairs in index.items():
+                if key[0] == pos and all(key[i] == value for i,value in positions):
+                    stem_endings.update(dict.fromkeys(pairs))
+        forms = []
+        for stem_id,ending in stem_endings:
+            stem = stems[stem_id]
+            if stem in ('', '-') or (stem_id, ending) == excluded:
+                continue
+            form = stem + ending
+            if form not in forms:
+                forms.append(form)
+        return forms
+
+    def _get_synthesis_entry(self, dl_id):
+        """
+        Return the part of speech, stems by id, synthesis index, and excluded (stem id, ending) pair
+        of entry `dl_id`, and remember them for synthesize()
+        """
+        self.warm()
+        if dl_id < 0:
+            raise ValueError("No dictline entry {0}, unique forms have no paradigm".format(dl_id))
+        d = self.dictline[dl_id]
+        entry = d['entry']
+        pos = 'PRON' if entry.pos == 'PACK' else entry.pos
+        stems = {'1': d['stem1'], '2': d['stem2'], '3': d['stem3'], '4': d['stem4']}
+        excluded = None
+        # V 3 1 only has the empty stem 2 ending with a -c stem, see is_possible_ending()
+        if entry.pos == 'V' and entry.conj == '3' and entry.variant == '1' and d['stem3'][-1] != 'c':
+            excluded = ('2', '')
+        index = self.inflections.get_synthesis_index(entry) if pos in definitions.synthesis_features else {}
+        synthesis_entry = (pos, stems, index, excluded)
+        self._synthesis_entries[dl_id] = synthesis_entry
+        return synthesis_entry
+
+    ###################
+    # INSTRUMENTATION #
+
+    def enable_instrumentation(self, slowest=10):
+        """
+        Start recording the timings and counters of the matching stages (see MatchInstrumentation),
+        keeping the `slowest` words matched. Return the MatchInstrumentation, which keeps collecting
+        until disable_instrumentation(). Enabling it again starts over.
+
+        Only words that are not in the match_word() cache are matched, so clear the cache first to
+        profile words that were already looked up. When disabled, the stages are not timed at all.
+        """
+        self._instrumentation = MatchInstrumentation(slowest)
+        return self._instrumentation
+
+    def disable_instrumentation(self):
+        """
+        Stop recording the matching stages, return the MatchInstrumentation (or None if it wasn't enabled)
+        """
+        stats, self._instrumentation = self._instrumentation, None
+        return stats
+
+    def get_instrumentation(self):
+        """
+        Return the current MatchInstrumentation, or None if instrumentation is disabled
+        """
+        return self._instrumentation
+
+    ###############
+    # MATCH CACHE #
+
+    def set_match_cache_size(self, maxsize):
+        """
+        Set the maximum number of words kept in the match_word() cache, 0 disables the cache
+        Least recently used words are dropped if the cache is already larger
+        """
+        if maxsize < 0:
+            raise ValueError("Match cache size must be 0 or more, not {0}".format(maxsize))
+        self._match_cache.resize(maxsize)
+
+    def clear_match_cache(self, reset_stats=True):
+        """
+        Empty the match_word() cache, and reset its hit/miss/eviction counters if `reset_stats`
+        """
+        self._match_cache.clear(reset_stats)
+
+    def match_cache_info(self):
+        """
+        Return the current match_word() cache statistics as a MatchCacheInfo
+        """
+        return self._match_cache.info()
+
+
+###############
+# GLOBAL DATA #
+# The default lexicon, used by the module-level functions. Its inflections are the default
+# InflectionTable of definitions.py, so both modules share one copy.
+DEFAULT_DICTLINE_FNAME = _default_dictline_fname
+_default_lexicon = Lexicon(inflections=definitions.get_default_inflection_table(),
+                           snapshot_fname=snapshot.snapshot_fname,
+                           fullforms_fname=fullforms.fullforms_fname)
+###############
+
+
+def get_default_lexicon():
+    """
+    Return the default Lexicon (the standard dictionary), used by the module-level functions
+    """
+    return _default_lexicon
+
+
+def __getattr__(name):
+    # Legacy module globals, e.g. lookup.dictline, live on the lazily loaded default lexicon
+    if name in Lexicon._data_names:
+        return getattr(warm(), name)
+    raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
+
+def warm(use_snapshot=True, precompute=False):
+    """
+    Load the default dictionary now instead of on first use, see Lexicon.warm()
+    Return the default lexicon.
+    """
+    return _default_lexicon.warm(use_snapshot, precompute)
+
+
+def load_data(use_snapshot=True, precompute=False):
+    """
+    Load (or reload) the default dictionary, see Lexicon.load()
+    """
+    _default_lexicon.load(use_snapshot, precompute)
+
+
+def load_dictionary():
+    _default_lexicon.load_dictionary()
+
+
+def load_tackons():
+    _default_lexicon.load_tackons()
+
+
+def build_snapshot(fname=None):
+    """
+    Parse the TSV data files and compile them into a binary snapshot (see snapshot.py)
+    Return the snapshot filename
+    """
+    return _default_lexicon.build_snapshot(fname)
+
+
+def build_fullforms(fname=None):
+    """
+    Compile the full-form table of the default dictionary, see Lexicon.build_fullforms()
+    Return the filename
+    """
+    return _default_lexicon.build_fullforms(fname)
+
+
+def precompute_inflections():
+    """
+    Fill the inflection caches of the default dictionary, see Lexicon.precompute_inflections()
+    """
+    _default_lexicon.precompute_inflections()
+
+
+def find_endings(w,skip_zero=False):
+    """
+    Returns a list of 'splits', index where the split occurs, such that the stem is w[:split_idx]
+    and the ending is w[split_idx:]
+    If skip_zero==True, assume there is an ending and start with 1 letter instead of ending=''
+    """
+    return _default_lexicon.find_endings(w,skip_zero)
+
+
+def _simple_match(w):
+    return _default_lexicon._simple_match(w)
+
+
+def _match_word_uncached(w, use_tricks=False, simple_matches=None):
+    return _default_lexicon._match_word_uncached(w, use_tricks, simple_matches)
+
+
+def is_possible_ending(m: WordMatch):
+    """
+    Check whether a match is possible, see Lexicon.is_possible_ending()
+    """
+    return _default_lexicon.is_possible_ending(m)
+
+
+def get_match_inflections(m: WordMatch):
+    """
+    Return the inflections which fit a match's stem and ending, see Lexicon.get_match_inflections()
+    """
+    return _default_lexicon.get_match_inflections(m)
+
+
+def analyze_word(w):
+    """
+    Return the list of analyses of word `w` in the default dictionary, see Lexicon.analyze_word()
+    """
+    return _default_lexicon.analyze_word(w)
+
+
+def analyze_words(words):
+    """
+    Analyze every word in the iterable `words` in the default dictionary, see Lexicon.analyze_words()
+    """
+    return _default_lexicon.analyze_words(words)
+
+
+def enable_instrumentation(slowest=10):
+    """
+    Start recording the matching stages of the default dictionary, see Lexicon.enable_instrumentation()
+    """
+    return _default_lexicon.enable_instrumentation(slowest)
+
+
+def disable_instrumentation():
+    """
+    Stop recording the matching stages of the default dictionary, return the MatchInstrumentation
+    """
+    return _default_lexicon.disable_instrumentation()
+
+
+def get_instrumentation():
+    """
+    Return the current MatchInstrumentation of the default dictionary, or None if disabled
+    """
+    return _default_lexicon.get_instrumentation()
+
+
+def get_paradigm(dl_id, infl_ages=None, infl_frequencies=None):
+    """
+    Return the declension or conjugation table of a dictline entry in the default dictionary as a
+    list of Analysis objects, see Lexicon.get_paradigm()
+    """
+    return _default_lexicon.get_paradigm(dl_id, infl_ages, infl_frequencies)
+
+
+def get_paradigms(dl_ids, infl_ages=None, infl_frequencies=None):
+    """
+    Return the get_paradigm() result for each dictline id in `dl_ids`, in order
+    """
+    return _default_lexicon.get_paradigms(dl_ids, infl_ages, infl_frequencies)
+
+
+def synthesize(dl_id, pos=None, **features):
+    """
+    Return the forms of a dictline entry in the default dictionary with the inflection `features`,
+    e.g. synthesize(4285, case='ABL', number='P'), see Lexicon.synthesize()
+    """
+    return _default_lexicon.synthesize(dl_id, pos, **features)
+
+
+def set_match_cache_size(maxsize):
+    """
+    Set the maximum number of words kept in the match_word() cache, 0 disables the cache
+    Least recently used words are dropped if the cache is already larger
+    """
+    _default_lexicon.set_match_cache_size(maxsize)
+
+
+def clear_match_cache(reset_stats=True):
+    """
+    Empty the match_word() cache, and reset its hit/miss/eviction counters if `reset_stats`
+    """
+    _default_lexicon.clear_match_cache(reset_stats)
+
+
+def match_cache_info():
+    """
+    Return the current match_word() cache statistics as a MatchCacheInfo
+    """
+    return _default_lexicon.match_cache_info()
 
 
 def match_word(w, use_tricks=False):
     """
-    Try to match a word, with basic tricks. If use_tricks is used, more in depth matching
-    methods are used (not implemented)
-    """
-    finished=False
-    removed_encls = False
-    tried_tackons = False
-    matches = []
-
-    while not finished:
-        matches = _simple_match(w)
-        matches = _prune_pronouns(matches)
-        if len(matches)>0:
-            finished = True
-        elif not tried_tackons:
-            tackon_matches = _check_tackons(w)
-            if len(tackon_matches)>0:
-                matches = tackon_matches
-                finished=True
-            tried_tackons = True  # Pass through for now
-        elif not removed_encls:
-            w = _remove_enclitics(w)
-            removed_encls = True
-        else: # Search failed
-            finished = True
-
-    return matches
-
-
-# TODO 
-def print_noun_declensions(m: WordMatch):
+    Try to match a word in the default dictionary, see Lexicon.match_word()
     """
-    Print the declensions of a noun
-    m must be in the format [stem,ending,dictline] (same as a match)
+    return _default_lexicon.match_word(w, use_tricks)
+
+
+def match_words(words, use_tricks=False):
+    """
+    Match every word in the iterable `words` in the default dictionary, see Lexicon.match_words()
     """
-    dictline = m.dl_entry
+    return _default_lexicon.match_words(words, use_tricks)
 
 
-def _get_noun_dictionary_string(m: WordMatch,full_info=False,header_only=False,markdown_fmt=False):
+def print_noun_declensions(m: WordMatch):
+    """
+    Print the declension table (case by number) of the entry of a match `m` (e.g. from match_word())
+    A unique form has no declension of its own, only the form is printed.
+    """
+    if m.unique:
+        print('{0} (unique form, no declension)'.format(get_dictionary_string(m, header_only=True)))
+        return
+    forms = {}  # (case, number) -> forms, in paradigm order
+    for a in get_paradigm(m.dl_id):
+        if a.inflection is not None and hasattr(a.inflection, 'case'):
+            forms.setdefault((a.inflection.case, a.inflection.number), []).append(a.word)
+    print(get_dictionary_string(m, header_only=True))
+    for case in ['NOM','GEN','DAT','ACC','ABL','VOC','LOC']:
+        if (case,'S') in forms or (case,'P') in forms:
+            print('{0:<4} {1:<24} {2}'.format(case, '/'.join(forms.get((case,'S'), ['-'])),
+                                              '/'.join(forms.get((case,'P'), ['-']))))
+
+
+def _get_noun_dictionary_string(m: WordMatch,full_info=False,header_only=False,markdown_fmt=False,inflections=None):
     """
     Generate a dictionary string for a noun
     Includes:
@@ -373,7 +1576,9 @@ def _get_noun_dictionary_string(m: WordMatch,full_info=False,header_only=False,m
         - kinds and modifiers (singular only, plural only)
         - senses
         - meta data (age, area, geography, frequency, and source)
+    `inflections` is the InflectionTable of the entry (default: the default table)
     """
+    inflections = inflections or definitions.get_default_inflection_table()
     # 1. Start with principle parts, same for all variants except undeclined
     princ_parts = ['','']
 
@@ -383,7 +1588,7 @@ def _get_noun_dictionary_string(m: WordMatch,full_info=False,header_only=False,m
         princ_parts[0] += m.match_stem
     else:
         # Get nom. and gen. singular stem
-        infls = definitions.get_possible_inflections(m.dl_entry,infl_ages=['X'],infl_frequencies=['A'])
+        infls = inflections.get_possible_inflections(m.dl_entry,infl_ages=['X'],infl_frequencies=['A'])
         nom_infl = [infl for infl in infls if infl.case=='NOM' and infl.number=='S'][0]
         nom_stem = m.get_stem(nom_infl.stem)
         nom_stem = '' if nom_stem == '-' else nom_stem
@@ -482,16 +1687,37 @@ def _get_noun_dictionary_string(m: WordMatch,full_info=False,header_only=False,m
     return outstr
 
 
-def get_dictionary_string(m: WordMatch, full_info=False, header_only=False, markdown_fmt=False):
+def _get_unique_dictionary_string(m: WordMatch, full_info=False, header_only=False, markdown_fmt=False):
+    """
+    Dictionary string of a unique form match: the form itself is the headword, followed by the senses
+    """
+    outstr = '**'+m.dl_stem1+'**' if markdown_fmt else m.dl_stem1
+    if header_only:
+        return outstr
+    outstr += ' '+m.dl_entry.senses
+    outstr = outstr.strip()
+    if full_info:
+        source = m.dl_entry.get_source_short()
+        outstr += '. Source: '+source if outstr[-1] != '.' else ' Source: '+source
+    return outstr
+
+
+def get_dictionary_string(m: WordMatch, full_info=False, header_only=False, markdown_fmt=False, inflections=None):
     """
     Convert m into a string in dictionary style
     m must be a WordMatch object (usually returned by match_word())
     If full_info is True, all available information is given. 
     If header_only, only the word header is given (no senses)
     If markdown_fmt, place headwords in bold (**ex**), part of speech in italics (*ex*)
+    `inflections` is the InflectionTable the headword endings come from (default: the default
+    table), see Lexicon.get_dictionary_string()
 
     TODO This whole thing could be rewritten to be less hacky
     """
+    # UNIQUES entries have no stems besides the form (the forms of sum have the stems of sum)
+    if m.unique and not (m.dl_stem2 or m.dl_stem3 or m.dl_stem4):
+        return _get_unique_dictionary_string(m,full_info,header_only,markdown_fmt)
+    inflections = inflections or definitions.get_default_inflection_table()
     dictstr = ''
 
     entry = m.dl_entry
@@ -501,7 +1727,7 @@ def get_dictionary_string(m: WordMatch, full_info=False, header_only=False, mark
     #stem3 = dictline['stem2']
     #stem4 = dictline['stem2']
     if entry.pos == 'N':
-        dictstr = _get_noun_dictionary_string(m,full_info,header_only,markdown_fmt)
+        dictstr = _get_noun_dictionary_string(m,full_info,header_only,markdown_fmt,inflections)
 
     if entry.pos == 'V':
         # ex. singular indicative present active 1st person
@@ -524,7 +1750,7 @@ def get_dictionary_string(m: WordMatch, full_info=False, header_only=False, mark
         else:
             infl_filt = MatchFilter(ages=['X'],frequencies=['X','A'],variants=[entry.variant,'0'],
                     persons=['0','1'],moods=['IND','INF'])
-        matches = [v for v in definitions.inflections[entry.pos] if vinfl.matches(v)]
+        matches = [v for v in inflections.get_inflections()[entry.pos] if vinfl.matches(v)]
         matches = [ma for ma in matches if infl_filt.check_inflection(ma,'V')]
         end1='' # sg ind pres active 1st person
         stem1=''
@@ -721,7 +1947,7 @@ def get_dictionary_string(m: WordMatch, full_info=False, header_only=False, mark
         # 4th stem is present, and therefore acts as the superlative (or comp.)
         # I've updated DICTLINE.GEN so that COMP and SUPER adjectives of declension 0 0 are
         # in the same stem slot
-        matches = definitions.get_possible_inflections(entry,infl_ages=['X'],infl_frequencies=['A'])
+        matches = inflections.get_possible_inflections(entry,infl_ages=['X'],infl_frequencies=['A'])
         matches = [m for m in matches if m.number=='S' and m.case=='NOM']
         if entry.pos == 'ADJ':
             matches = [m for m in matches if m.comparison == 'POS']
@@ -795,7 +2021,7 @@ def get_dictionary_string(m: WordMatch, full_info=False, header_only=False, mark
     elif entry.pos in ['PRON','PACK']:
         infl_filt = MatchFilter(ages=['X'],frequencies=['X','A'],variants=[entry.variant,'0'])
         pinfl = definitions.PronounInfl(decl=entry.decl,number='S')
-        matches = [p for p in definitions.inflections['PRON'] if pinfl.matches(p)]
+        matches = [p for p in inflections.get_inflections()['PRON'] if pinfl.matches(p)]
         matches = [ma for ma in matches if infl_filt.check_inflection(ma,'PRON')]
         if matches:
             end1='' # sg nom 
@@ -875,83 +2101,15 @@ def get_dictionary_string(m: WordMatch, full_info=False, header_only=False, mark
     return dictstr.replace('  ',' ').strip(' ')
 
 
-def is_possible_ending(m: WordMatch):
-    """
-    Check whether a match is possible
-    match should be returned from e.g. _simple_match and should be in uvij format
-
-    This is one of the key functions in the lookup process, narrowing the list of
-    stem matches to those that are actually possible. It needs to account for different
-    kinds (verb kinds like deponent, impersonal; noun kinds like singular or plural
-    only) but doesn't need to manage SUPINE and VPAR inflections (handled by
-    definitions.get_possible_endings(infl,part_of_speech)
-
-    Note: These should be cached
-    """
-    match_stem = m.match_stem.replace('j', 'i').replace('u', 'v')
-    stem_ids = m.get_stem_ids()
-    possible_endings = set()
-    entry = m.dl_entry
-    # Get part of speech, handle internal-only parts for now
-    pos = entry.pos
-    if pos in ['ADV','PREP','CONJ','INTERJ']:
-        if m.match_ending == '':
-            return True
-        else:
-            return False
-    elif pos == 'X':  # Not used in DICTLINE, but just in case
-        return True
-    elif pos == 'PACK':  # Treated like PRON
-        pron_entry = copy.deepcopy(entry)
-        pron_entry.pos = 'PRON'
-        infls = definitions.get_possible_inflections(pron_entry,infl_ages=['X'],infl_frequencies=['A'])
-    else:
-        infls = definitions.get_possible_inflections(entry, infl_ages=['X'], infl_frequencies=['A'])
-    for infl in infls:
-        # Make list of endings
-        ###### SPECIAL CASE ######
-        # V 3 1 with -c stem can have empty ending but otherwise cannot
-
-        # Details: There's an inflection for V 3 1 imperative which only applies to stems
-        # which end in 'c' (inflects id 744). Can this be a new V 3 x variant? Otherwise
-        # we need to process this manually which is ugly
-        # Original WORDS might have organized stems by endings but I don't understand that
-        # codebase so I'm not sure how this gets handled
-        if entry.pos == 'V':
-            if entry.conj == '3' and entry.variant == '1':
-                if infl.stem == '2' and m.match_ending == '':
-                    if m.dl_stem3[-1] != 'c':
-                        continue  # Don't bother with this inflection, go to next
-        ##########################
-        # An ending is valid if our stem (all stems in `stem_ids`) is the stem id of an inflection
-        if infl.stem in stem_ids:
-            possible_endings.add(infl.ending_vi)
-
-    if m.match_ending.replace('u', 'v').replace('j', 'i') in possible_endings:
-        return True
-    return False
-
-
 def get_word_inflections(m: WordMatch, less=False):
     """
     Use a match (from match_word) to look up the possible inflections of a word. Returned as list of plain text
     strings.
     If less is False, information about the word is printed along with the inflection. If
     less is True, only the inflection information and the word header are printed.
+    Regular entries use the default inflections, see Lexicon.get_word_inflections().
     """
-    entry = m.dl_entry
-    infl_strings = []
-    head = get_dictionary_string(m, header_only=True)
-    pos = entry.pos
-    if pos in ['SUFFIX','PREFIX','X']:
-        return []  #TODO ?
-    possible_infls = definitions.get_possible_inflections(entry,infl_ages=['X'],infl_frequencies=['A'])
-    for minfl in possible_infls:
-        if less:
-            infl_strings.append(minfl.get_inflection_string(less=less)+'of '+head)
-        else:
-            infl_strings.append(minfl.get_inflection_string(less=less)+' '+head)
-    return infl_strings
+    return _default_lexicon.get_word_inflections(m, less)
 
 
 def lookup_word(w,full_info=False,match_filter=MatchFilter()):
@@ -980,10 +2138,3 @@ def lookup_inflections(w,match_filter=MatchFilter()):
                 infl_strs.add(infl)
     for s in infl_strs:
         print(s)
-
-
-# TODO Should this go somewhere else?
-load_dictionary()
-definitions.load_inflections()
-load_tackons()
-
@@ -52,7 +52,7 @@ class MatchFilter:
         self.default_tenses=['X','PRES','IMPF','PERF','FUT','FUTP','PLUP','INF']
         self.default_voices=['X','ACTIVE','PASSIVE']
 
-        self.substantives = True  # Show noun forms of adjectives
+        self.substantives = substantives  # Show noun forms of adjectives
         self.parts_of_speech = parts_of_speech or []
         self.ages=ages or []
         self.areas=areas or []
@@ -244,14 +244,13 @@ class MatchFilter:
 
         return True
 
-    @staticmethod
     def remove_substantives(self,matches):
         """
-        Return list of substantive adjectives from list of matches
+        Return a copy of a list of matches without the substantive adjectives (noun forms of adjectives)
         NOTE: This is aggressive. If an adjective is found, ALL nouns with matching stems will be removed. With a
         word like 'bonum' this is safe. Other words might not be.
         """
-        filtmatches = matches
+        filtmatches = list(matches)
         adjs = set()
         # First make a list of adjectives
         for m in matches:
@@ -0,0 +1,381 @@
+'''
+Local lookup service
+
+Loading the dictionary takes a noticeable amount of time, which every script or notebook that
+imports PyWORDS pays again. The lookup service keeps one warm Lexicon in a long-running process,
+and short-lived clients send it their words over a local socket instead.
+
+Start the service with
+    $ python -m pywords.service --port 7737
+and use it from Python with ServiceClient:
+    >>> from pywords.service import ServiceClient
+    >>> with ServiceClient(port=7737) as client:
+    ...     client.get_dictionary_string('aquae')
+
+The protocol is line-delimited JSON over TCP. Each request is a JSON object on one line, with a
+`method`, its parameters, and an optional `id` which is copied to the response:
+    {"id": 1, "method": "match_word", "word": "aquae"}
+    {"id": 1, "result": [{"stem": "aqu", "ending": "ae", ...}]}
+A request that fails gets an `error` message instead of a `result`. Requests on one connection
+may be pipelined; responses are then written as they complete, use the ids to pair them up.
+Request lines longer than `max_line_size` bytes are skipped with an error response.
+
+Methods:
+    match_word              word                            list of matches (see _match_to_json())
+    match_words             words                           list of match lists, one per word
+    get_dictionary_string   word, full_info, markdown_fmt   list of dictionary strings, one per match
+    get_word_inflections    word, less                      list of inflection strings of all matches
+    analyze_word            word                            list of analyses (see lookup.Analysis.to_dict())
+    info                                                    batching and match cache statistics
+All methods use the service's Lexicon, including its inflections for the formatted strings.
+
+Word lookups from all connections are coalesced into micro-batches: requests arriving within
+`max_delay` seconds of each other (up to `max_batch_size` words) are matched together with
+Lexicon.match_words(), which looks up each distinct word and stem once, in a worker thread so
+the event loop keeps accepting requests. Repeated words are served from the match_word() cache.
+'''
+
+import argparse
+import asyncio
+import inspect
+import json
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+
+import pywords.lookup as lookup
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 7737
+DEFAULT_MAX_LINE_SIZE = 2**24  # bytes, about a million words in one match_words request
+
+
+def _match_to_json(m: lookup.WordMatch):
+    """
+    Return a WordMatch as a JSON-serializable dictionary
+    """
+    return {'stem': m.match_stem,
+            'ending': m.match_ending,
+            'stems': [m.dl_stem1, m.dl_stem2, m.dl_stem3, m.dl_stem4],
+            'entry': {name: getattr(m.dl_entry, name) for name in m.dl_entry._fields}}
+
+
+class LookupService:
+    """
+    Asyncio lookup service for one Lexicon (default: the standard dictionary)
+
+    @params
+        lexicon         Lexicon to look words up in
+        max_batch_size  Maximum number of words matched in one batch
+        max_delay       Seconds to wait for more words before matching a batch
+        max_line_size   Maximum length of a request line in bytes
+    """
+    def __init__(self, lexicon=None, max_batch_size=256, max_delay=0.002, max_line_size=DEFAULT_MAX_LINE_SIZE):
+        self.lexicon = lexicon or lookup.get_default_lexicon()
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.max_line_size = max_line_size
+        self.batches = 0  # Number of batches matched
+        self.batched_words = 0  # Number of words in all batches
+        self._pending = []  # (word, future) pairs waiting for the next batch
+        self._flush_handle = None
+        self._tasks = set()  # Batches being matched; the event loop only keeps weak references to tasks
+        # Batches are matched one at a time, off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pywords-service')
+        self._methods = {'match_word': self._rpc_match_word,
+                         'match_words': self._rpc_match_words,
+                         'get_dictionary_string': self._rpc_get_dictionary_string,
+                         'get_word_inflections': self._rpc_get_word_inflections,
+                         'analyze_word': self._rpc_analyze_word,
+                         'info': self._rpc_info}
+
+    ###############
+    # BATCHING ####
+
+    async def match_word(self, w):
+        """
+        Match a word as part of the next batch, return the list of WordMatch objects
+        A word which is not a string is rejected before it joins a batch.
+        """
+        if not isinstance(w, str):
+            raise TypeError("Words must be strings, not {0}".format(type(w).__name__))
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((w, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self):
+        """
+        Start matching the pending words as one batch
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._match_batch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _match_batch(self, batch):
+        self.batches += 1
+        self.batched_words += len(batch)
+        loop = asyncio.get_running_loop()
+        words = [w for w,_ in batch]
+        try:
+            try:
+                results = await loop.run_in_executor(self._executor, self.lexicon.match_words, words)
+            except Exception:
+                # Match the words one by one, so a word that fails only fails its own request
+                results = await loop.run_in_executor(self._executor, self._match_each, words)
+        except asyncio.CancelledError:
+            # The service is closing, don't leave the requests waiting
+            for _,future in batch:
+                future.cancel()
+            raise
+        for (_,future),matches in zip(batch, results):
+            if future.done():  # The request may have been cancelled, e.g. client disconnected
+                continue
+            if isinstance(matches, Exception):
+                future.set_exception(matches)
+            else:
+                future.set_result(matches)
+
+    def _match_each(self, words):
+        """
+        Return the match_word() result of each word, or the exception it raised
+        """
+        results = []
+        for w in words:
+            try:
+                results.append(self.lexicon.match_word(w))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    ###############
+    # METHODS #####
+
+    async def _rpc_match_word(self, word):
+        return [_match_to_json(m) for m in await self.match_word(word)]
+
+    async def _rpc_match_words(self, words):
+        if not isinstance(words, list):
+            raise TypeError("words must be a list, not {0}".format(type(words).__name__))
+        for w in words:
+            if not isinstance(w, str):
+                raise TypeError("Words must be strings, not {0}".format(type(w).__name__))
+        results = await asyncio.gather(*[self.match_word(w) for w in words])
+        return [[_match_to_json(m) for m in matches] for matches in results]
+
+    async def _run(self, func, *args):
+        # Formatting is CPU-bound too, run it off the event loop
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _rpc_get_dictionary_string(self, word, full_info=False, markdown_fmt=False):
+        matches = await self.match_word(word)
+        return await self._run(lambda: [self.lexicon.get_dictionary_string(m, full_info=full_info,
+                                                                           markdown_fmt=markdown_fmt)
+                                        for m in matches])
+
+    async def _rpc_get_word_inflections(self, word, less=False):
+        matches = await self.match_word(word)
+        return await self._run(lambda: [s for m in matches for s in self.lexicon.get_word_inflections(m, less=less)])
+
+    async def _rpc_analyze_word(self, word):
+        matches = await self.match_word(word)
+        return await self._run(lambda: [a.to_dict() for m in matches for a in self.lexicon.analyze_match(word, m)])
+
+    async def _rpc_info(self):
+        return {'batches': self.batches,
+                'batched_words': self.batched_words,
+                'match_cache': asdict(self.lexicon.match_cache_info())}
+
+    async def handle_request(self, request):
+        """
+        Handle one request (a dictionary decoded from JSON), return the response dictionary
+        """
+        if not isinstance(request, dict):
+            return {'id': None, 'error': 'Request must be a JSON object'}
+        params = dict(request)
+        request_id = params.pop('id', None)
+        method = params.pop('method', None)
+        if method not in self._methods:
+            return {'id': request_id, 'error': 'Unknown method {0!r}'.format(method)}
+        try:
+            inspect.signature(self._methods[method]).bind(**params)
+        except TypeError as e:  # Missing or unexpected parameters
+            return {'id': request_id, 'error': 'Invalid parameters for {0}: {1}'.format(method, e)}
+        try:
+            result = await self._methods[method](**params)
+        except Exception as e:
+            return {'id': request_id, 'error': '{0}: {1}'.format(type(e).__name__, e)}
+        return {'id': request_id, 'result': result}
+
+    async def _handle_line(self, line, writer):
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {'id': None, 'error': 'Invalid JSON: {0}'.format(e)}
+        else:
+            response = await self.handle_request(request)
+        await self._write_response(response, writer)
+
+    @staticmethod
+    async def _write_response(response, writer):
+        writer.write(json.dumps(response).encode() + b'\n')
+        await writer.drain()
+
+    @staticmethod
+    async def _skip_line(reader):
+        """
+        Discard the rest of a request line which is too long to read
+        """
+        while True:
+            try:
+                await reader.readuntil(b'\n')
+                return
+            except asyncio.LimitOverrunError as e:
+                await reader.readexactly(e.consumed)
+
+    async def _handle_connection(self, reader, writer):
+        tasks = set()
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b'\n')
+                except asyncio.IncompleteReadError as e:
+                    line = e.partial  # The last line may have no newline
+                except asyncio.LimitOverrunError:
+                    await self._write_response({'id': None, 'error': 'Request line longer than {0} bytes'.format(
+                        self.max_line_size)}, writer)
+                    await self._skip_line(reader)
+                    continue
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self._handle_line(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    ###############
+    # SERVER ######
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """
+        Load the dictionary and start listening, return the asyncio.Server
+        Use port 0 to pick any free port, see server.sockets[0].getsockname()
+        """
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.lexicon.warm)
+        return await asyncio.start_server(self._handle_connection, host, port, limit=self.max_line_size)
+
+    async def serve_forever(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        """
+        Cancel the pending and running batches (their requests are cancelled) and stop the worker thread
+        Call it from the event loop, or after it has finished.
+        """
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        for _,future in batch:
+            future.cancel()
+        for task in self._tasks:
+            task.cancel()
+        self._executor.shutdown(wait=False)
+
+
+class ServiceClient:
+    """
+    Blocking client for a running LookupService, for scripts and notebooks
+
+    Each method sends one request and waits for its response; a failed request raises
+    RuntimeError with the service's error message.
+    """
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=None):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._file = self._sock.makefile('rwb')
+        self._next_id = 0
+
+    def request(self, method, **params):
+        self._next_id += 1
+        request = dict(params, id=self._next_id, method=method)
+        self._file.write(json.dumps(request).encode() + b'\n')
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("The lookup service closed the connection")
+        response = json.loads(line)
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response['result']
+
+    def match_word(self, word):
+        return self.request('match_word', word=word)
+
+    def match_words(self, words):
+        return self.request('match_words', words=list(words))
+
+    def get_dictionary_string(self, word, full_info=False, markdown_fmt=False):
+        return self.request('get_dictionary_string', word=word, full_info=full_info, markdown_fmt=markdown_fmt)
+
+    def get_word_inflections(self, word, less=False):
+        return self.request('get_word_inflections', word=word, less=less)
+
+    def analyze_word(self, word):
+        return self.request('analyze_word', word=word)
+
+    def info(self):
+        return self.request('info')
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the PyWORDS lookup service')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='Address to listen on (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on (default: %(default)s)')
+    parser.add_argument('--max-batch-size', type=int, default=256, help='Maximum words per batch')
+    parser.add_argument('--max-delay', type=float, default=0.002, help='Seconds to wait for a batch to fill')
+    parser.add_argument('--max-line-size', type=int, default=DEFAULT_MAX_LINE_SIZE,
+                        help='Maximum request size in bytes (default: %(default)s)')
+    args = parser.parse_args()
+    service = LookupService(max_batch_size=args.max_batch_size, max_delay=args.max_delay,
+                            max_line_size=args.max_line_size)
+    print("Serving PyWORDS lookups on {0}:{1}".format(args.host, args.port))
+    try:
+        asyncio.run(service.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+
+
+if __name__ == '__main__':
+    main()
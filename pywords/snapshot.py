@@ -0,0 +1,129 @@
+'''
+Precompiled binary snapshot of the dictionary data
+
+Parsing DICTLINE.tsv (and to a lesser extent INFLECTS.tsv, TACKONS.tsv, and UNIQUES.tsv) with
+csv.DictReader and building every entry object dominates the time it takes to start using PyWORDS.
+A snapshot stores the already-built objects (entries, stem index, inflections and their
+precomputed caches, tackons, unique forms) in a single pickled file which can be loaded back in a
+fraction of the time.
+
+A snapshot file is laid out as a fixed-size header followed by the pickled payload:
+    magic           16 bytes, b'PYWORDS-SNAPSHOT'
+    version         4 bytes, big-endian unsigned int (SNAPSHOT_VERSION)
+    sources hash    32 bytes, sha256 of the data files and modules the payload was built from
+    payload hash    32 bytes, sha256 of the payload itself
+
+A snapshot is only used when the version matches, the source files have not changed since it
+was built, and the payload is intact. Otherwise the loader falls back to the TSV files.
+
+Loading only reads snapshots, it never writes one (the package directory may be read-only, and
+building a snapshot precomputes every inflection cache first). Build or refresh the snapshot
+explicitly, e.g. after installing or updating the data files:
+    $ python -m pywords.snapshot
+or lookup.build_snapshot() (Lexicon.build_snapshot() for other lexicons).
+'''
+
+import os
+import os.path
+import hashlib
+import pickle
+import struct
+import tempfile
+
+# Bump this whenever the layout of the payload changes
+SNAPSHOT_VERSION = 6
+SNAPSHOT_MAGIC = b'PYWORDS-SNAPSHOT'
+_header_format = '>16sI32s32s'
+_header_size = struct.calcsize(_header_format)
+
+_pkg_dir = os.path.dirname(os.path.abspath(__file__))
+snapshot_fname = os.path.join(_pkg_dir, 'data/pywords.snapshot')
+
+# Files the snapshot is built from. The Python modules are included because the payload holds
+# pickled instances of their classes; changing them makes the snapshot stale.
+module_fnames = [os.path.join(_pkg_dir, 'definitions.py'),
+                 os.path.join(_pkg_dir, 'lookup.py')]
+source_fnames = [os.path.join(_pkg_dir, 'data/DICTLINE.tsv'),
+                 os.path.join(_pkg_dir, 'data/INFLECTS.tsv'),
+                 os.path.join(_pkg_dir, 'data/TACKONS.tsv'),
+                 os.path.join(_pkg_dir, 'data/UNIQUES.tsv'),
+                 os.path.join(_pkg_dir, 'data/ESSE.tsv')] + module_fnames
+
+
+def get_sources_checksum(fnames=None):
+    """
+    Return the sha256 digest (bytes) of the snapshot source files, in order
+    A missing source file raises FileNotFoundError
+    """
+    fnames = fnames or source_fnames
+    h = hashlib.sha256()
+    for fname in fnames:
+        h.update(os.path.basename(fname).encode())
+        with open(fname, 'rb') as f:
+            h.update(f.read())
+    return h.digest()
+
+
+def write_snapshot(payload, fname=None, sources=None):
+    """
+    Pickle `payload` (a dictionary of loaded data) and write it to the snapshot file `fname`
+    `sources` are the files the payload was built from (default: source_fnames)
+
+    The file is written to a temporary file first and then moved into place, so concurrent
+    readers never see a partially written snapshot.
+    """
+    fname = fname or snapshot_fname
+    data = pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)
+    header = struct.pack(_header_format, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, get_sources_checksum(sources),
+                         hashlib.sha256(data).digest())
+    fdir = os.path.dirname(os.path.abspath(fname))
+    fd, tmp_fname = tempfile.mkstemp(dir=fdir, prefix='.pywords-snapshot-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(data)
+        os.replace(tmp_fname, fname)
+    except BaseException:
+        if os.path.exists(tmp_fname):
+            os.remove(tmp_fname)
+        raise
+
+
+def read_snapshot(fname=None, sources=None):
+    """
+    Return the payload stored in the snapshot file `fname`, or None if the snapshot is missing,
+    was written by a different snapshot version, is stale (the `sources` files changed), or is corrupt.
+    """
+    fname = fname or snapshot_fname
+    if not os.path.exists(fname):
+        return None
+    with open(fname, 'rb') as f:
+        raw = f.read()
+    if len(raw) < _header_size:
+        return None
+    magic, version, sources_hash, payload_hash = struct.unpack(_header_format, raw[:_header_size])
+    if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+        return None
+    try:
+        if sources_hash != get_sources_checksum(sources):
+            return None
+    except FileNotFoundError:
+        # Shipped without the TSVs; nothing to compare against, trust the payload hash
+        pass
+    data = memoryview(raw)[_header_size:]
+    if hashlib.sha256(data).digest() != payload_hash:
+        return None
+    try:
+        return pickle.loads(data)
+    except (pickle.UnpicklingError, AttributeError, ImportError, EOFError):
+        return None
+
+
+def main():
+    import pywords.lookup as lookup
+    fname = lookup.build_snapshot()
+    print("Wrote dictionary snapshot to {0}".format(fname))
+
+
+if __name__ == '__main__':
+    main()
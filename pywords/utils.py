@@ -666,20 +666,112 @@ def _process_vocab_list_opt(vocab_list,filt,full_info,markdown_fmt):
             print("Using vocab list LLPSI: Familia Romana")
             llpsi_fname = os.path.join(os.path.dirname(os.path.abspath(__file__)),'data/lingualatina_voclist.txt')
             with open(llpsi_fname,'r') as f:
-                llpsi_text = ' '.join(f.readlines())
-            vocab_definitions,_ = get_vocab_list(llpsi_text,filt,full_info,markdown_fmt,vocab_list=None)
+                vocab_definitions,_ = get_vocab_list(f,filt,full_info,markdown_fmt,vocab_list=None)
         elif vocab_list[-4:] == '.txt':
             print("Creating vocab list from file {0}".format(vocab_list))
             with open(vocab_list,'r') as f:
-                vl_text = ' '.join(f.readlines())
-            vocab_definitions,_ = get_vocab_list(vl_text,filt,full_info,markdown_fmt,vocab_list=None)
+                vocab_definitions,_ = get_vocab_list(f,filt,full_info,markdown_fmt,vocab_list=None)
     return vocab_definitions
 
 
+# Characters separating words, and the default size of blocks read from files
+_word_sep_re = re.compile(r'[, \n!.\-:;?=+/\'"^\]\[]')
+_block_size = 64*1024
+
+
+def _iter_text_blocks(source, block_size=_block_size):
+    """
+    Yield the text of `source` piece by piece
+    `source` can be a string, a file object opened in text mode, or an iterable of lines, with
+    or without their newlines (e.g. from str.splitlines()). Strings are sliced into blocks and
+    files are read in blocks, so even a file without newlines is never held in memory at once.
+    """
+    if isinstance(source, str):
+        for i in range(0, len(source), block_size):
+            yield source[i:i+block_size]
+    elif hasattr(source, 'read'):
+        while True:
+            block = source.read(block_size)
+            if not block:
+                break
+            yield block
+    else:
+        # Words never continue on the next line, add the newlines that str.splitlines() removes
+        end = ''
+        for line in source:
+            yield end + line
+            end = '' if line.endswith('\n') else '\n'
+
+
+def _is_word(t):
+    return t and t.isalpha() and len(t) > 1
+
+
+def iter_tokens(source):
+    """
+    Generate the lowercase words (alphabetic, at least 2 letters) of `source`, in order
+    `source` can be a string, a text file object, or an iterable of lines (see _iter_text_blocks())
+    Memory use does not depend on the size of the text.
+    """
+    rest = ''
+    for block in _iter_text_blocks(source):
+        tlist = _word_sep_re.split(rest + block)
+        rest = tlist.pop()  # May be continued in the next block
+        for t in tlist:
+            if _is_word(t):
+                yield t.lower()
+    if _is_word(rest):
+        yield rest.lower()
+
+
+def iter_sentences(source):
+    """
+    Generate the sentences of `source`, roughly split at periods, with newlines replaced
+    by spaces. As with str.split('.'), the text after the last period is the last sentence,
+    and empty sentences are included.
+    `source` can be a string, a text file object, or an iterable of lines (see _iter_text_blocks())
+    Memory use only depends on the length of the longest sentence.
+    """
+    rest = ''
+    for block in _iter_text_blocks(source):
+        sentences = (rest + block.replace('\n', ' ')).split('.')
+        rest = sentences.pop()  # May be continued in the next block
+        yield from sentences
+    yield rest
+
+
+def _split_words(text):
+    """
+    Split a string into a list of lowercase words (alphabetic, at least 2 letters)
+    """
+    return list(iter_tokens(text))
+
+
+def _get_word_definitions(words, filt=MatchFilter(), full_info=False, markdown_fmt=False):
+    """
+    Look up each of the unique words in `words`
+    Return (set of dictionary strings, set of words that could not be matched)
+    """
+    words = sorted(set(words))
+    defns = set()
+    missed = set()
+    for w,ms in zip(words,lookup.match_words(words)):
+        if len(ms) == 0:
+            missed.add(w)
+        # filt.remove_substantives(ms)
+        for m in ms:
+            if filt.check_dictline_word(m.dl_entry):
+                wdefn = lookup.get_dictionary_string(m, full_info=full_info, markdown_fmt=markdown_fmt)
+                if wdefn != '':
+                    defns.add(wdefn)
+    return (defns, missed)
+
+
 def get_vocab_list(text, filt=MatchFilter(), full_info=False, markdown_fmt=False, vocab_list=None):
     """
     Take an arbitrarily long string (newlines and all) and process each word,
     then compile dictionary entries.
+    `text` can also be a text file object or an iterable of lines, which are read as a stream.
 
     vocab_list is used to remove well-known words. It can be a filename, a built-in vocab list from the following list:
         llpsi  -  Lingua Latina per se Illustrata: Familia Romana
@@ -687,33 +779,14 @@ def get_vocab_list(text, filt=MatchFilter(), full_info=False, markdown_fmt=False
 
     Return [definitions, missed words]
     """
-    tlist = re.split('[, \n!.\-:;?=+/\'\"^\\]\\[]', text)
-    tlist = [t.lower() for t in tlist if t and t.isalpha() and len(t) > 1]
-    tlist = list(set(tlist))
+    tlist = set(iter_tokens(text))
 
     vocab_definitions = []
     if vocab_list:
         vocab_definitions = _process_vocab_list_opt(vocab_list,filt,full_info,markdown_fmt)
 
-    defns = set()
-    missed = set()
-    for w in tlist:
-        # Patch the 'sum' problem for now...
-        if w.replace('u','v').replace('i','j') in definitions.irreg_sum:
-            defns.add('sum, esse, fui, futurus [irreg] to be, exist; (Medieval, in perfect tense) to go')
-        else:
-            ms = lookup.match_word(w)
-            if len(ms) == 0:
-                missed.add(w)
-            # filt.remove_substantives(ms)
-            wdefns = []
-            for m in ms:
-                if filt.check_dictline_word(m.dl_entry):
-
-                    wdefns.append(lookup.get_dictionary_string(m, full_info=full_info, markdown_fmt=markdown_fmt))
-            for wdefn in wdefns:
-                if wdefn != '' and wdefn not in vocab_definitions:
-                    defns.add(wdefn)
+    defns,missed = _get_word_definitions(tlist,filt,full_info,markdown_fmt)
+    defns = [d for d in defns if d not in vocab_definitions]
 
     defns_sort = sorted(defns)
     missed_sort = sorted(missed)
@@ -745,11 +818,9 @@ def find_example_sentences(text, word, word_filt=MatchFilter(), infl_filt=MatchF
     print("\nFinding example sentences of word: ", end='')
     print(lookup.get_dictionary_string(word_match))
 
-    sentences = text.replace('\n', ' ').split('.')  # Try to roughly split into sentences
     matched_sentences = []
-    for sentence in sentences:
-        tlist = re.split('[, \n!.\-:;?=+/\'\"^\\]\\[]', sentence)
-        tlist = [t.lower() for t in tlist if t and t.isalpha() and len(t) > 1]
+    for sentence in iter_sentences(text):  # Roughly split into sentences
+        tlist = _split_words(sentence)
 
         for w in tlist:
             ms = lookup.match_word(w)
@@ -766,13 +837,12 @@ def find_filtered_sentences(text, sentence_filt=MatchFilter(), strict=False):
     Return a list of sentences for which all words pass through the match filter
     If strict is True, all matching inflections for each word must pass through the filter
     If False, at least one inflection must pass through
+    `text` can be a string, a text file object, or an iterable of lines (see iter_sentences())
     """
-    sentences = text.replace('\n', ' ').split('.')  # Roughly split into sentences
     matched_sentences = []
-    for sentence in sentences:
+    for sentence in iter_sentences(text):  # Roughly split into sentences
         sentence_OK = True
-        tlist = re.split('[, \n!.\-:;?=+/\'\"^\\]\\[]', sentence)
-        tlist = [t.lower() for t in tlist if t and t.isalpha() and len(t) > 1]
+        tlist = _split_words(sentence)
 
         for w in tlist:
             ms = lookup.match_word(w)
@@ -827,10 +897,7 @@ def get_glossary_from_file(fname,full_info=False,vocab_list=None):
 
     # TODO This needs some checks
     with open(fname,'r') as f:
-        txt = f.readlines()
-    txt = ''.join(txt)
-
-    (vocab,missed) = get_vocab_list(txt,full_info=full_info,markdown_fmt=True,vocab_list=vocab_list)
+        (vocab,missed) = get_vocab_list(f,full_info=full_info,markdown_fmt=True,vocab_list=vocab_list)
 
     # Preprocess
     s = '  \n\n'  # Markdown newline character to separate lines
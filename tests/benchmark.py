@@ -0,0 +1,288 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import pywords.lookup as lookup
+import pywords.definitions as definitions
+import pywords.utils as pwutils
+
+# This file benchmarks the main lookup, inflection, and text functions, e.g. to check that a change
+# is actually faster, or that it doesn't slow anything else down. Run it from the repository root:
+#   $ PYTHONPATH=. python tests/benchmark.py --save
+#   ... make changes ...
+#   $ PYTHONPATH=. python tests/benchmark.py --compare
+# Each benchmark is run `--repeat` times after a warm-up run, and we report the minimum and median
+# time per call. --save stores the results with the commit and machine details in tests/.benchmarks/,
+# --compare compares with a saved file (default: the latest) and exits with status 1 if any benchmark
+# is slower than `--threshold` times its saved minimum. Compare results from the same machine only.
+
+results_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.benchmarks')
+voclist_fname = os.path.join(os.path.dirname(os.path.abspath(definitions.__file__)), 'data/lingualatina_voclist.txt')
+
+# Word sets
+frequent_words = ['est','et','in','non','ad','cum','sunt','quod','esse','aqua','puella','amat','rosam','dominus']
+rare_words = ['amphibrachyos','Androgeos','barbitos','cometes','epitomes','itineris','Lucii','perambulavissent',
+              'circumspectabantur','ingeniosissimorum','remunerationibus','supersedissetis']
+tackon_words = ['quicumque','cuiuscumque','quilibet','quidam','utercumque','unusquisque']
+enclitic_words = ['virumque','populusque','armaque','estne','videsne','plusve']
+
+benchmarks = {}
+
+
+def benchmark(name):
+    """
+    Register a benchmark function, which returns (seconds, number of calls timed)
+    """
+    def register(func):
+        benchmarks[name] = func
+        return func
+    return register
+
+
+def _load_in_subprocess(use_snapshot):
+    # Import and load in a fresh interpreter, timing from inside it to leave out interpreter startup
+    code = ('import time; t = time.perf_counter(); import pywords.lookup as lookup; '
+            'lookup.warm(use_snapshot={0}); print(time.perf_counter() - t)'.format(use_snapshot))
+    out = subprocess.run([sys.executable,'-c',code],capture_output=True,text=True,check=True).stdout
+    return float(out),1
+
+
+@benchmark('load/snapshot')
+def bench_load_snapshot():
+    lookup.build_snapshot()  # Make sure the snapshot is current, outside of the timed code
+    return _load_in_subprocess(True)
+
+
+@benchmark('load/tsv')
+def bench_load_tsv():
+    return _load_in_subprocess(False)
+
+
+def _time_calls(func, args_list):
+    t = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return time.perf_counter() - t,len(args_list)
+
+
+@benchmark('find_endings')
+def bench_find_endings():
+    return _time_calls(lookup.find_endings,[(w,) for w in frequent_words+rare_words])
+
+
+@benchmark('_simple_match')
+def bench_simple_match():
+    return _time_calls(lookup._simple_match,[(w,) for w in frequent_words+rare_words])
+
+
+def _time_match_word_uncached(words):
+    lookup.clear_match_cache()
+    t = time.perf_counter()
+    for w in words:
+        lookup.match_word(w)
+    return time.perf_counter() - t,len(words)
+
+
+@benchmark('match_word/frequent')
+def bench_match_word_frequent():
+    return _time_match_word_uncached(frequent_words)
+
+
+@benchmark('match_word/rare')
+def bench_match_word_rare():
+    return _time_match_word_uncached(rare_words)
+
+
+@benchmark('match_word/tackons')
+def bench_match_word_tackons():
+    return _time_match_word_uncached(tackon_words)
+
+
+@benchmark('match_word/enclitics')
+def bench_match_word_enclitics():
+    return _time_match_word_uncached(enclitic_words)
+
+
+@benchmark('match_word/cached')
+def bench_match_word_cached():
+    for w in frequent_words:
+        lookup.match_word(w)
+    return _time_calls(lookup.match_word,[(w,) for w in frequent_words])
+
+
+def _sample_entries():
+    # Entries of all matches of the frequent and rare words
+    return [m.dl_entry for w in frequent_words+rare_words for m in lookup.match_word(w)]
+
+
+@benchmark('get_possible_inflections/cold')
+def bench_possible_inflections_cold():
+    entries = _sample_entries()
+    definitions.clear_inflection_caches()
+    return _time_calls(definitions.get_possible_inflections,[(e,['X'],['A']) for e in entries])
+
+
+@benchmark('get_possible_inflections/warm')
+def bench_possible_inflections_warm():
+    entries = _sample_entries()
+    for e in entries:
+        definitions.get_possible_inflections(e,['X'],['A'])
+    return _time_calls(definitions.get_possible_inflections,[(e,['X'],['A']) for e in entries])
+
+
+@benchmark('get_dictionary_string')
+def bench_get_dictionary_string():
+    matches = [m for w in frequent_words+rare_words for m in lookup.match_word(w)]
+    return _time_calls(lookup.get_dictionary_string,[(m,True) for m in matches])
+
+
+@benchmark('get_paradigm/cold')
+def bench_get_paradigm_cold():
+    # Unique forms (e.g. est) have no paradigm
+    dl_ids = sorted({m.dl_id for w in frequent_words+rare_words for m in lookup.match_word(w) if not m.unique})
+    lexicon = lookup.get_default_lexicon()
+    lexicon._paradigm_cache.clear()
+    return _time_calls(lookup.get_paradigm,[(dl_id,) for dl_id in dl_ids])
+
+
+def _get_dl_id(lemma, pos):
+    return [m.dl_id for m in lookup.match_word(lemma) if m.dl_entry.pos == pos][0]
+
+
+def _time_synthesize(requests):
+    t = time.perf_counter()
+    for dl_id,pos,features in requests:
+        lookup.synthesize(dl_id,pos,**features)
+    return time.perf_counter() - t,len(requests)
+
+
+@benchmark('synthesize/all_features')
+def bench_synthesize():
+    aqua,amo = _get_dl_id('aqua','N'),_get_dl_id('amo','V')
+    return _time_synthesize([(aqua,None,{'case': 'ABL','number': 'P'}),
+                             (amo,None,{'tense': 'PERF','voice': 'ACTIVE','mood': 'SUB','person': '3','number': 'P'}),
+                             (amo,'VPAR',{'case': 'NOM','number': 'S','gender': 'M','tense': 'PERF','voice': 'PASSIVE'})]*100)
+
+
+@benchmark('synthesize/some_features')
+def bench_synthesize_partial():
+    aqua,amo = _get_dl_id('aqua','N'),_get_dl_id('amo','V')
+    return _time_synthesize([(aqua,None,{'case': 'DAT'}),(amo,None,{'mood': 'INF'})]*50)
+
+
+@benchmark('get_vocab_list/lingualatina')
+def bench_get_vocab_list():
+    with open(voclist_fname) as f:
+        text = f.read()
+    lookup.clear_match_cache()
+    t = time.perf_counter()
+    pwutils.get_vocab_list(text)
+    return time.perf_counter() - t,1
+
+
+def run_benchmarks(names, repeat):
+    """
+    Run the benchmarks `names`, return a dictionary of name -> statistics (seconds per call)
+    """
+    lookup.warm()
+    results = {}
+    for name in names:
+        func = benchmarks[name]
+        func()  # Warm-up, e.g. to fill the inflection caches
+        times = []
+        for _ in range(repeat):
+            elapsed,calls = func()
+            times.append(elapsed/calls)
+        results[name] = {'min': min(times), 'median': statistics.median(times), 'repeat': repeat}
+        print('{0:<32} {1:>12} {2:>12}'.format(name,_format_time(results[name]['min']),
+                                                _format_time(results[name]['median'])))
+    return results
+
+
+def _format_time(t):
+    for unit,scale in [('s',1),('ms',1e-3),('us',1e-6)]:
+        if t >= scale:
+            return '{0:.3f} {1}'.format(t/scale,unit)
+    return '{0:.3f} ns'.format(t/1e-9)
+
+
+def _get_commit():
+    try:
+        return subprocess.run(['git','rev-parse','--short','HEAD'],capture_output=True,text=True,
+                              cwd=os.path.dirname(results_dir),check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def save_results(results):
+    os.makedirs(results_dir,exist_ok=True)
+    commit = _get_commit()
+    fname = os.path.join(results_dir,'{0}-{1}.json'.format(time.strftime('%Y%m%d-%H%M%S'),commit))
+    with open(fname,'w') as f:
+        json.dump({'commit': commit,
+                   'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                   'machine': platform.node(),
+                   'python': platform.python_version(),
+                   'platform': platform.platform(),
+                   'results': results},f,indent=2)
+    print('Saved results to {0}'.format(fname))
+
+
+def compare_results(results, fname, threshold):
+    """
+    Print the change of each benchmark from the saved results in `fname`, return the names of
+    benchmarks slower than `threshold` times the saved minimum
+    """
+    with open(fname) as f:
+        saved = json.load(f)
+    print('\nCompared with {0} (commit {1}, {2})'.format(os.path.basename(fname),saved['commit'],saved['date']))
+    regressions = []
+    for name,stats in results.items():
+        if name not in saved['results']:
+            continue
+        ratio = stats['min']/saved['results'][name]['min']
+        flag = ''
+        if ratio > threshold:
+            flag = '  SLOWER'
+            regressions.append(name)
+        elif ratio < 1/threshold:
+            flag = '  faster'
+        print('{0:<32} {1:>12} -> {2:>12} {3:6.2f}x{4}'.format(name,_format_time(saved['results'][name]['min']),
+                                                            _format_time(stats['min']),ratio,flag))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark PyWORDS')
+    parser.add_argument('names',nargs='*',help='Benchmarks to run (default: all), matched by prefix')
+    parser.add_argument('--repeat',type=int,default=5,help='Timed runs of each benchmark (default: %(default)s)')
+    parser.add_argument('--save',action='store_true',help='Save the results in tests/.benchmarks/')
+    parser.add_argument('--compare',nargs='?',const='latest',metavar='FILE',
+                        help='Compare with saved results (default: the latest saved file)')
+    parser.add_argument('--threshold',type=float,default=1.2,help='Slowdown reported as a regression (default: %(default)s)')
+    parser.add_argument('--list',action='store_true',help='List the benchmarks and exit')
+    args = parser.parse_args()
+    if args.list:
+        print('\n'.join(benchmarks))
+        sys.exit(0)
+
+    compare_fname = args.compare
+    if compare_fname == 'latest':
+        saved = sorted(glob.glob(os.path.join(results_dir,'*.json')))
+        if not saved:
+            sys.exit('No saved results in {0}, run with --save first'.format(results_dir))
+        compare_fname = saved[-1]  # Before saving this run
+
+    names = [name for name in benchmarks if not args.names or any(name.startswith(n) for n in args.names)]
+    print('{0:<32} {1:>12} {2:>12}'.format('benchmark (per call)','min','median'))
+    results = run_benchmarks(names,args.repeat)
+    if args.save:
+        save_results(results)
+    if compare_fname:
+        if compare_results(results,compare_fname,args.threshold):
+            sys.exit(1)
@@ -0,0 +1,44 @@
+import gc
+import sys
+import resource
+import subprocess
+import tracemalloc
+import pywords.lookup as lookup
+
+# This file reports the memory used by the loaded dictionary, e.g. to compare changes to the
+# way entries are stored. Run it from the repository root:
+#   $ PYTHONPATH=. python tests/memory_report.py
+# The dictionary is loaded from the TSV files and from the snapshot, each in a fresh process,
+# and for each we report:
+#   - the memory allocated by Python for the loaded data (tracemalloc), and the peak while loading
+#   - the peak resident set size of the process
+
+
+def _max_rss_mb():
+    # ru_maxrss is in kB on Linux (and bytes on macOS)
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        maxrss /= 1024
+    return maxrss/1024
+
+
+def report_load(use_snapshot):
+    gc.collect()
+    tracemalloc.start()
+    lookup.load_data(use_snapshot=use_snapshot)
+    gc.collect()
+    current,peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    source = 'snapshot' if use_snapshot else 'TSV'
+    print('{0:>8} load: {1:6.1f} MB allocated ({2:6.1f} MB peak), {3:6.1f} MB max RSS (includes tracemalloc overhead)'.format(
+        source,current/2**20,peak/2**20,_max_rss_mb()))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        report_load(use_snapshot=(sys.argv[1] == '--snapshot'))
+    else:
+        lookup.build_snapshot()  # Make sure the snapshot is current
+        print('DICTLINE entries: {0}'.format(len(lookup.dictline)))
+        for arg in ['--tsv','--snapshot']:
+            subprocess.run([sys.executable,__file__,arg],check=True)
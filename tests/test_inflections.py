@@ -1,3 +1,4 @@
+import pickle
 import unittest
 import pywords.lookup as lookup
 import pywords.definitions as definitions
@@ -136,6 +137,178 @@ class TestTackonClass(unittest.TestCase):
         pass
 
 
+class TestValueTypes(unittest.TestCase):
+    def test_inflection_equality(self):
+        vinfl1 = definitions.build_inflection(part_of_speech='V', conj='1', variant='1', tense='PRES', voice='ACTIVE', mood='IND')
+        vinfl2 = definitions.build_inflection(part_of_speech='V', conj='1', variant='1', tense='PRES', voice='ACTIVE', mood='IND')
+        vinfl3 = definitions.build_inflection(part_of_speech='V', conj='1', variant='1', tense='PRES', voice='ACTIVE', mood='SUB')
+        self.assertEqual(vinfl1,vinfl2)
+        self.assertEqual(hash(vinfl1),hash(vinfl2))
+        self.assertNotEqual(vinfl1,vinfl3)
+        self.assertEqual(len({vinfl1,vinfl2,vinfl3}),2)
+
+    def test_different_classes_not_equal(self):
+        sinfl = definitions.build_inflection(part_of_speech='SUPINE', decl='4', variant='1', case='ACC')
+        pinfl = definitions.build_inflection(part_of_speech='PRON', decl='4', variant='1', case='ACC')
+        self.assertEqual(sinfl,definitions.build_inflection(part_of_speech='SUPINE', decl='4', variant='1', case='ACC'))
+        self.assertNotEqual(sinfl,pinfl)
+        self.assertNotEqual(pinfl,sinfl)
+
+    def test_entries_hashable(self):
+        entry1 = definitions.DictlineVerbEntry(pos='V',conj='1',variant='1',verb_kind='X',age='X',area='X',geog='X',freq='A',src='X',senses='love')
+        entry2 = definitions.DictlineVerbEntry(pos='V',conj='1',variant='1',verb_kind='X',age='X',area='X',geog='X',freq='A',src='X',senses='love')
+        entry3 = definitions.DictlineVerbEntry(pos='V',conj='1',variant='1',verb_kind='X',age='X',area='X',geog='X',freq='A',src='X',senses='like')
+        self.assertEqual(entry1,entry2)
+        self.assertNotEqual(entry1,entry3)
+        self.assertEqual(len({entry1,entry2,entry3}),2)
+
+    def test_pickle_drops_cached_hash(self):
+        entry = definitions.DictlineNounEntry(pos='N',decl='1',variant='1',gender='F',noun_kind='T',age='X',area='X',geog='X',freq='A',src='X',senses='test')
+        ninfl = definitions.build_inflection(part_of_speech='N', decl='1', variant='1', case='NOM')
+        for obj in [entry,ninfl]:
+            hash(obj)
+            copy = pickle.loads(pickle.dumps(obj))
+            self.assertFalse(hasattr(copy,'_hash'))
+            self.assertEqual(copy,obj)
+            self.assertEqual(hash(copy),hash(obj))
+
+
+class TestPossibleStemEndings(unittest.TestCase):
+    def test_noun_stem_endings(self):
+        entry = definitions.DictlineNounEntry(pos='N',decl='1',variant='1',gender='F',noun_kind='T',age='X',area='X',geog='X',freq='A',src='X',senses='test')
+        stem_endings = definitions.get_possible_stem_endings(entry)
+        self.assertIn(('1','a'),stem_endings)
+        self.assertIn(('2','ae'),stem_endings)
+        self.assertIn(('2','arvm'),stem_endings)
+        self.assertNotIn(('2','arum'),stem_endings)  # v and i spelling only
+        self.assertNotIn(('2','orvm'),stem_endings)
+
+    def test_signature_shares_stem_endings(self):
+        entry1 = definitions.DictlineNounEntry(pos='N',decl='2',variant='1',gender='M',noun_kind='T',age='X',area='X',geog='X',freq='A',src='X',senses='one')
+        entry2 = definitions.DictlineNounEntry(pos='N',decl='2',variant='1',gender='M',noun_kind='T',age='X',area='X',geog='X',freq='A',src='X',senses='two')
+        entry3 = definitions.DictlineNounEntry(pos='N',decl='2',variant='1',gender='M',noun_kind='M',age='X',area='X',geog='X',freq='A',src='X',senses='three')
+        self.assertEqual(definitions.get_inflection_signature(entry1),definitions.get_inflection_signature(entry2))
+        self.assertIs(definitions.get_possible_stem_endings(entry1),definitions.get_possible_stem_endings(entry2))
+        # Plural only
+        self.assertNotIn(('1','vs'),definitions.get_possible_stem_endings(entry3))
+
+    def test_pack_uses_pronoun_signature(self):
+        pack = definitions.DictlinePronounEntry(pos='PACK',decl='1',variant='0',pronoun_kind='X',age='X',area='X',geog='X',freq='A',src='X',senses='test')
+        pron = definitions.DictlinePronounEntry(pos='PRON',decl='1',variant='0',pronoun_kind='X',age='X',area='X',geog='X',freq='A',src='X',senses='test')
+        self.assertEqual(definitions.get_inflection_signature(pack),definitions.get_inflection_signature(pron))
+
+    def test_precompute_inflection_caches(self):
+        entry = definitions.DictlineVerbEntry(pos='V',conj='5',variant='2',verb_kind='X',age='X',area='X',geog='X',freq='A',src='X',senses='test')
+        definitions.clear_inflection_caches()
+        definitions.precompute_inflection_caches([entry])
+        caches = definitions.get_inflection_caches()
+        self.assertIn('5 2',caches['verb'])
+        self.assertIn(definitions.get_inflection_signature(entry),caches['stem_endings'])
+        infls = definitions.get_possible_inflections(entry,infl_ages=['X'],infl_frequencies=['A'])
+        # Cached results are copied, callers can change the list they get
+        infls.clear()
+        self.assertTrue(definitions.get_possible_inflections(entry,infl_ages=['X'],infl_frequencies=['A']))
+
+
+class TestSynthesisIndex(unittest.TestCase):
+    def test_noun_index(self):
+        entry = definitions.DictlineNounEntry(pos='N',decl='1',variant='1',gender='F',noun_kind='T',age='X',area='X',geog='X',freq='A',src='X',senses='test')
+        index = definitions.get_synthesis_index(entry)
+        self.assertEqual(index['N','ABL','P'],(('2','is'),))
+        self.assertIn(('2','arum'),index['N','GEN','P'])  # Dictionary spelling
+        self.assertIs(definitions.get_synthesis_index(entry),index)
+        for key in index:
+            self.assertEqual(len(key),1+len(definitions.synthesis_features[key[0]]))
+
+    def test_wildcard_codes(self):
+        entry = definitions.DictlineAdjectiveEntry(pos='ADJ',decl='3',variant='2',comparison='POS',age='X',area='X',geog='X',freq='A',src='X',senses='test')
+        index = definitions.get_synthesis_index(entry)
+        # Common gender endings are found under masculine and feminine
+        self.assertEqual(index['ADJ','ABL','P','M','POS'],index['ADJ','ABL','P','F','POS'])
+
+    def test_verb_index(self):
+        entry = definitions.DictlineVerbEntry(pos='V',conj='1',variant='1',verb_kind='X',age='X',area='X',geog='X',freq='A',src='X',senses='test')
+        index = definitions.get_synthesis_index(entry)
+        self.assertEqual(index['V','PERF','ACTIVE','SUB','3','P'],(('3','erint'),))
+        self.assertIn(('VPAR','NOM','S','M','PERF','PASSIVE'),index)
+        self.assertIn(('SUPINE','ACC'),index)
+
+
+class TestEndingTrie(unittest.TestCase):
+    def test_find_splits(self):
+        trie = definitions.EndingTrie(['','a','ae','arum','um','rum'])
+        self.assertEqual(trie.find_splits('rosarum'),[7,5,4,3])
+        self.assertEqual(trie.find_splits('rosarum',skip_zero=True),[5,4,3])
+        self.assertEqual(trie.find_splits('rosa'),[4,3])
+        # The stem is never empty
+        self.assertEqual(trie.find_splits('a'),[1])
+        self.assertEqual(trie.find_splits(''),[])
+
+    def test_contains(self):
+        trie = definitions.EndingTrie(['ae','arum'])
+        self.assertIn('ae',trie)
+        self.assertIn('arum',trie)
+        self.assertNotIn('rum',trie)
+        self.assertNotIn('',trie)
+
+    def test_endings_from_inflections(self):
+        endings = definitions.get_endings()
+        self.assertIn('',endings)
+        self.assertIn('arvm',endings)
+        self.assertNotIn('arum',endings)
+        self.assertIn('arum',definitions.endings_list_uvij)
+        self.assertEqual(endings,definitions.endings_list_vi)
+        trie = definitions.get_ending_trie()
+        self.assertTrue(all(e in trie for e in endings))
+
+
+class TestInflectionIndex(unittest.TestCase):
+    def test_query_matches_scan(self):
+        infls = definitions.get_inflections()
+        queries = [('N', dict(decl='3', case='ABL', number='P')),
+                   ('N', dict(decl='1', variant='0')),
+                   ('V', dict(conj='3', variant='1', tense='PRES', voice='ACTIVE', mood='IND')),
+                   ('VPAR', dict(conj='0', variant='0')),
+                   ('ADJ', dict(decl='1', variant='1', case='GEN', gender='F')),
+                   ('PRON', dict(decl='4', variant='2', stem='1'))]
+        for pos,criteria in queries:
+            template = definitions.build_inflection(part_of_speech=pos, **criteria)
+            self.assertEqual(definitions.query_inflections(pos, **criteria),
+                             [i for i in infls[pos] if template.matches(i)])
+
+    def test_query_ending(self):
+        abl_pl = definitions.query_inflections('N', decl='3', case='ABL', number='P')
+        self.assertTrue(all(i.ending_vi == 'ibvs' for i in abl_pl))
+        self.assertEqual(definitions.query_inflections('N', ending='arum'),
+                         definitions.query_inflections('N', ending='arvm'))
+        self.assertTrue(definitions.query_inflections('N', ending='arum'))
+        # Empty criteria match anything, the empty ending does not
+        self.assertEqual(definitions.query_inflections('N', case='', gender=None),definitions.get_inflections()['N'])
+        self.assertTrue(all(i.ending_vi == '' for i in definitions.query_inflections('N', ending='')))
+        self.assertEqual(definitions.query_inflections('N', case='XYZ'),[])
+
+    def test_query_invalid(self):
+        with self.assertRaises(ValueError):
+            definitions.query_inflections('N', conj='1')
+        with self.assertRaises(ValueError):
+            definitions.query_inflections('XYZ', decl='1')
+
+
+class TestInflectionTable(unittest.TestCase):
+    def test_independent_tables(self):
+        table = definitions.InflectionTable()
+        self.assertFalse(table.loaded)
+        self.assertEqual(table.get_inflections(),definitions.get_inflections())
+        self.assertTrue(table.loaded)
+        self.assertIsNot(table.get_inflections(),definitions.get_inflections())
+        entry = lookup.match_word('aquae')[0].dl_entry
+        definitions.clear_inflection_caches()
+        self.assertEqual(table.get_possible_stem_endings(entry),definitions.get_possible_stem_endings(entry))
+        table.clear_caches()
+        self.assertTrue(definitions.get_inflection_caches()['stem_endings'])
+        self.assertFalse(table.get_caches()['stem_endings'])
+
+
 if __name__ == '__main__':
     #dl_entry = lookup.dictline[11053]['entry']
     #for infl in definitions.get_possible_inflections(dl_entry):
@@ -1,14 +1,37 @@
 import unittest
+import asyncio
+import contextlib
+import dataclasses
+import io
+import json
+import os
 import random
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
 import sqlite3
 import pywords.lookup as lookup
 from pywords.lookup import WordMatch
 import pywords.definitions as definitions
 from pywords.matchfilter import MatchFilter
 import pywords.utils as pwutils
+import pywords.snapshot as snapshot
+import pywords.fullforms as fullforms
+import pywords.corpus as corpus
+import pywords.service as service
+import pywords.cli as cli
 #from generate_database import verify_database
 
 
+def get_dl_id(lemma, pos):
+    """
+    Return the dictline id of the entry with part of speech `pos` matching its dictionary form `lemma`
+    """
+    return [m.dl_id for m in lookup.match_word(lemma) if m.dl_entry.pos == pos][0]
+
+
 def build_dictline_from_str(s):
     ps = s[:34].split()
     senses = s[34:]
@@ -218,9 +241,155 @@ class TestLookup(unittest.TestCase):
 
         #self.assertEqual(lookup._simple_match('<fullword>'),[WordMatch('<stem>','<end>','','','','',<word>_dl_entry)])
 
+    def test_build_stem_index(self):
+        dl = [{'stem1':'aqu','stem2':'aqu','stem3':'','stem4':'','entry':None},
+              {'stem1':'am','stem2':'am','stem3':'amav','stem4':'amat','entry':None},
+              {'stem1':'-','stem2':'aqu','stem3':'','stem4':'','entry':None},
+              {'stem1':'iuv','stem2':'juv','stem3':'','stem4':'','entry':None}]
+        index = lookup.build_stem_index(dl)
+        # Keys use v and i spelling
+        self.assertEqual(sorted(index.keys()),['am','amat','amav','aqv','ivv'])
+        # (id << 2) | (slot-1), slot-major, each id listed once per stem
+        self.assertEqual(list(index['aqv']),[(0 << 2) | 0, (2 << 2) | 1])
+        self.assertEqual(list(index['amat']),[(1 << 2) | 3])
+        self.assertEqual(list(index['ivv']),[(3 << 2) | 0])
+        self.assertEqual(lookup._find_stem_ids(index,'aqv'),[0,2])
+        self.assertEqual(lookup._find_stem_ids(index,'xyz'),[])
+
     def test_match_word(self):
         pass
 
+    def test_match_words(self):
+        words = ['aquae','Mosis','aqvae','amat','xyzzy','aquae']
+        lookup.clear_match_cache()
+        results = lookup.match_words(words)
+        self.assertEqual(len(results),len(words))
+        for w,matches in zip(words,results):
+            self.assertEqual(matches,lookup._match_word_uncached(w))
+        self.assertEqual(results[0],results[5])
+        self.assertIsNot(results[0],results[5])
+        self.assertEqual(results[2][0].match_stem,'aqv')
+        self.assertEqual(results[4],[])
+        # Deduplicated by v and i spelling: 4 unique words
+        self.assertEqual(lookup.match_cache_info().misses,4)
+        self.assertEqual(lookup.match_words([]),[])
+        self.assertEqual(lookup.match_words(iter(['amat'])),[lookup.match_word('amat')])
+
+    def test_get_match_inflections(self):
+        m = lookup.match_word('aquam')[0]
+        self.assertEqual(lookup.dictline[m.dl_id]['entry'],m.dl_entry)
+        infls = lookup.get_match_inflections(m)
+        self.assertEqual([(i.case,i.number) for i in infls],[('ACC','S')])
+        # Conjunctions and interjections have no inflections
+        self.assertEqual(lookup.get_match_inflections(lookup.match_word('et')[0]),[])
+
+    def test_analyze_word(self):
+        analyses = lookup.analyze_word('amatus')
+        self.assertEqual([(a.pos,a.codes['pos'],a.codes['case']) for a in analyses],[('ADJ','ADJ','NOM'),('V','VPAR','NOM')])
+        participle = analyses[1]
+        amo = get_dl_id('amo','V')
+        self.assertEqual((participle.dl_id,participle.stem_ids,participle.stem,participle.ending),(amo,['4'],'amat','us'))
+        self.assertEqual(participle.entry,lookup.dictline[amo]['entry'])
+        # Formatted like get_word_inflections(), only on demand
+        self.assertIn(str(participle),lookup.get_word_inflections(participle.match))
+        self.assertEqual(participle.to_dict()['inflection'],participle.codes)
+        # Entries without inflections get one analysis
+        et = lookup.analyze_word('et')
+        self.assertEqual([(a.inflection,a.codes,str(a)) for a in et],[(None,{},'et conj')])
+        self.assertEqual(lookup.analyze_word('xyzzy'),[])
+        words = ['amatus','et','xyzzy','aquae']
+        self.assertEqual(lookup.analyze_words(words),[lookup.analyze_word(w) for w in words])
+
+    def test_get_paradigm(self):
+        aqua_id,amo_id = get_dl_id('aqua','N'),get_dl_id('amo','V')
+        aqua = lookup.get_paradigm(aqua_id)
+        forms = {(a.codes['case'],a.codes['number']): a.word for a in aqua}
+        self.assertEqual((forms['NOM','S'],forms['GEN','P'],forms['ABL','P']),('aqua','aquarum','aquis'))
+        self.assertTrue(all(a.dl_id == aqua_id and a.pos == 'N' for a in aqua))
+        # Verbs include participles and supines, and every form matches the entry again
+        amo = lookup.get_paradigm(amo_id)
+        self.assertEqual({a.codes['pos'] for a in amo},{'V','VPAR','SUPINE'})
+        words = {a.word: a for a in amo}
+        self.assertIn('amavissent',words)
+        self.assertEqual(words['amatus'].codes['pos'],'VPAR')
+        for a in amo:
+            self.assertIn(amo_id,[m.dl_id for m in lookup.match_word(a.word)])
+            self.assertIn(a.inflection,lookup.get_match_inflections(a.match))
+        # Other ages and frequencies, and entries without inflections
+        self.assertGreater(len(lookup.get_paradigm(amo_id,infl_ages=[],infl_frequencies=[])),len(amo))
+        self.assertEqual([(a.word,a.inflection) for a in lookup.get_paradigm(lookup.match_word('et')[0].dl_id)],
+                         [('et',None)])
+        # Cached, but a new list each time
+        self.assertEqual(lookup.get_paradigm(amo_id),amo)
+        self.assertIsNot(lookup.get_paradigm(amo_id),amo)
+        self.assertEqual(lookup.get_paradigms([aqua_id,amo_id]),[aqua,amo])
+
+    def test_print_noun_declensions(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            lookup.print_noun_declensions(lookup.match_word('aquae')[0])
+            lookup.print_noun_declensions(lookup.match_word('boum')[0])  # Unique form
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0],'aqua, aquae')
+        self.assertEqual(lines[2].split(),['GEN','aquae','aquarum'])
+        self.assertEqual(lines[-1],'boum (unique form, no declension)')
+
+    def test_synthesize(self):
+        aqua,amo = get_dl_id('aqua','N'),get_dl_id('amo','V')
+        self.assertEqual(lookup.synthesize(aqua,case='ABL',number='P'),['aquis'])
+        self.assertEqual(lookup.synthesize(amo,tense='PERF',voice='ACTIVE',mood='SUB',person='3',number='P'),['amaverint'])
+        self.assertEqual(lookup.synthesize(amo,'SUPINE',case='ACC'),['amatum'])
+        # With some of the features, every form that has them
+        self.assertEqual(lookup.synthesize(amo,mood='INF',voice='ACTIVE'),['amare','amavisse'])
+        self.assertEqual(lookup.synthesize(aqua,case='DAT'),['aquae','aquis'])
+        self.assertEqual(lookup.synthesize(aqua,case='XYZ',number='P'),[])
+        with self.assertRaises(ValueError):
+            lookup.synthesize(aqua,tense='PRES')
+        with self.assertRaises(ValueError):
+            lookup.synthesize(aqua,case='ABL',tense='PRES')
+        # The same forms as the paradigm
+        for a in lookup.get_paradigm(amo):
+            features = {name: a.codes[name] for name in definitions.synthesis_features[a.codes['pos']]}
+            self.assertIn(a.word,lookup.synthesize(amo,a.codes['pos'],**features))
+        bene = lookup.match_word('bene')[0].dl_id
+        self.assertEqual(lookup.synthesize(bene,comparison='SUPER'),['optime'])
+
+    def test_unique_forms(self):
+        # agatur is a unique form of an impersonal verb, and a regular form of ago
+        matches = lookup.match_word('agatur')
+        self.assertTrue(matches[0].unique)
+        self.assertEqual((matches[0].match_stem,matches[0].match_ending,matches[0].dl_id),('agatur','',-1))
+        self.assertFalse(any(m.unique for m in matches[1:]))
+        infls = lookup.get_match_inflections(matches[0])
+        self.assertEqual([(i.tense,i.voice,i.mood,i.person,i.number) for i in infls],[('PRES','PASSIVE','SUB','3','S')])
+        self.assertEqual(lookup.get_dictionary_string(matches[0],header_only=True),'agatur')
+        # Rows of the same form and entry share one match
+        iusiurandum = [m for m in lookup.match_word('iusiurandum') if m.unique]
+        self.assertEqual(len(iusiurandum),1)
+        self.assertEqual(sorted(i.case for i in lookup.get_match_inflections(iusiurandum[0])),['ACC','NOM'])
+        # Regular matches of the same form are kept
+        vis = lookup.match_word('vis')
+        self.assertTrue(vis[0].unique)
+        self.assertEqual(vis[0].dl_entry.pos,'V')
+        self.assertIn('N',[m.dl_entry.pos for m in vis[1:]])
+        self.assertEqual(lookup.analyze_word('boum')[0].codes['case'],'GEN')
+        with self.assertRaises(ValueError):
+            lookup.get_paradigm(matches[0].dl_id)
+
+    def test_esse_forms(self):
+        for w,codes in [('est',('PRES','IND','3','S')),('erant',('IMPF','IND','3','P')),('fuisset',('PLUP','SUB','3','S')),
+                        ('sim',('PRES','SUB','1','S'))]:
+            analyses = lookup.analyze_word(w)
+            self.assertTrue(analyses[0].match.unique)
+            self.assertEqual(tuple(analyses[0].codes[name] for name in ['tense','mood','person','number']),codes)
+            self.assertEqual(analyses[0].get_dictionary_string(header_only=True),'sum, esse, fui, futurus')
+        # fuerit is future perfect indicative or perfect subjunctive, one match
+        fuerit = lookup.match_word('fuerit')
+        self.assertEqual(len(fuerit),1)
+        self.assertEqual(sorted(i.mood for i in lookup.get_match_inflections(fuerit[0])),['IND','SUB'])
+        defns,missed = pwutils.get_vocab_list('puella est. servi erant.')
+        self.assertIn(lookup.get_dictionary_string(fuerit[0]),defns)
+
     def test_get_dictionary_string(self):
         pass
 
@@ -231,6 +400,674 @@ class TestLookup(unittest.TestCase):
         pass
 
 
+class TestMatchCache(unittest.TestCase):
+    def setUp(self):
+        lookup.clear_match_cache()
+
+    def tearDown(self):
+        lookup.set_match_cache_size(10000)
+        lookup.clear_match_cache()
+
+    def test_cache_hits(self):
+        first = lookup.match_word('aquae')
+        second = lookup.match_word('aquae')
+        self.assertEqual(first,second)
+        self.assertIsNot(first,second)
+        info = lookup.match_cache_info()
+        self.assertEqual((info.hits,info.misses,info.size),(1,1,1))
+
+    def test_cache_respells_uvij(self):
+        self.assertEqual(lookup.match_word('aquae'),lookup._match_word_uncached('aquae'))
+        matches = lookup.match_word('aqvae')
+        self.assertEqual(lookup.match_cache_info().hits,1)
+        self.assertEqual(matches,lookup._match_word_uncached('aqvae'))
+        self.assertEqual(matches[0].match_stem,'aqv')
+
+    def test_cache_results_immutable(self):
+        m = lookup.match_word('aquae')[0]
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            m.match_stem = 'x'
+
+    def test_cache_evictions(self):
+        lookup.set_match_cache_size(2)
+        for w in ['aquae','rosa','amo']:
+            lookup.match_word(w)
+        info = lookup.match_cache_info()
+        self.assertEqual((info.size,info.evictions,info.maxsize),(2,1,2))
+        lookup.match_word('aquae')  # Evicted, least recently used
+        self.assertEqual(lookup.match_cache_info().misses,4)
+
+    def test_cache_disabled(self):
+        lookup.set_match_cache_size(0)
+        lookup.match_word('aquae')
+        lookup.match_word('aquae')
+        self.assertEqual(lookup.match_cache_info().hits,0)
+        self.assertEqual(lookup.match_cache_info().size,0)
+
+    def test_cache_cleared_on_reload(self):
+        lookup.match_word('aquae')
+        lookup.load_data()
+        self.assertEqual(lookup.match_cache_info().size,0)
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        # Count the stages of the stem and ending search, even if a full-form table was built
+        self.fullforms = lookup.warm().fullforms
+        lookup.get_default_lexicon().fullforms = None
+        lookup.clear_match_cache()
+
+    def tearDown(self):
+        lookup.disable_instrumentation()
+        lookup.get_default_lexicon().fullforms = self.fullforms
+        lookup.clear_match_cache()
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(lookup.get_instrumentation())
+        self.assertIsNone(lookup.disable_instrumentation())
+
+    def test_stage_counters(self):
+        stats = lookup.enable_instrumentation()
+        self.assertIs(lookup.get_instrumentation(),stats)
+        lookup.match_word('aquae')
+        lookup.match_word('aquae')  # Cached, not counted
+        self.assertEqual(stats.counters['words'],1)
+        self.assertEqual(stats.calls['find_endings'],1)
+        self.assertEqual(stats.counters['splits'],len(lookup.find_endings('aquae')))
+        self.assertEqual(stats.counters['stems_probed'],len(lookup.find_endings('aquae')))
+        self.assertGreaterEqual(stats.counters['candidates'],stats.counters['valid'])
+        self.assertGreater(stats.counters['valid'],0)
+        self.assertEqual((stats.counters['tackon_fallbacks'],stats.counters['enclitic_fallbacks']),(0,0))
+        self.assertEqual((stats.calls['uniques'],stats.counters['unique_hits']),(1,0))
+        lookup.match_word('agatur')
+        self.assertEqual(stats.counters['unique_hits'],1)
+
+    def test_fallbacks(self):
+        stats = lookup.enable_instrumentation()
+        lookup.match_word('virumque')
+        self.assertEqual(stats.counters['tackon_fallbacks'],1)
+        self.assertEqual(stats.counters['enclitic_fallbacks'],1)
+        self.assertGreater(stats.times['enclitics'],0)
+
+    def test_match_words(self):
+        stats = lookup.enable_instrumentation()
+        lookup.match_words(['aquae','rosam','aquae'])
+        self.assertEqual(stats.counters['words'],2)
+        self.assertEqual(stats.calls['find_endings'],1)  # One pass for the whole batch
+
+    def test_slowest_words(self):
+        stats = lookup.enable_instrumentation(slowest=2)
+        for w in ['aquae','rosam','amat','virumque']:
+            lookup.match_word(w)
+        slowest = stats.get_slowest_words()
+        self.assertEqual(len(slowest),2)
+        self.assertGreaterEqual(slowest[0][1],slowest[1][1])
+
+    def test_report(self):
+        stats = lookup.enable_instrumentation()
+        lookup.match_word('aquae')
+        report = json.loads(json.dumps(stats.to_dict()))
+        self.assertEqual(list(report['stages']),lookup.MatchInstrumentation.stages)
+        self.assertEqual(report['counters']['words'],1)
+        self.assertEqual(report['slowest_words'][0]['word'],'aquae')
+        self.assertIn('stem_search',stats.format_report())
+        stats.reset()
+        self.assertEqual(stats.counters['words'],0)
+
+    def test_disable(self):
+        stats = lookup.enable_instrumentation()
+        self.assertIs(lookup.disable_instrumentation(),stats)
+        lookup.match_word('aquae')
+        self.assertEqual(stats.counters['words'],0)
+
+
+class TestFullForms(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # A small dictionary, to keep compiling the table fast
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        cls.dictline_fname = os.path.join(cls.tmpdir.name,'DICTLINE.tsv')
+        with open(lookup.DEFAULT_DICTLINE_FNAME) as f, open(cls.dictline_fname,'w') as out:
+            lines = f.readlines()
+            out.writelines(lines[:1] + lines[1:1500] + [l for l in lines if '\taqu' in l or '\tpuell' in l])
+        cls.fname = os.path.join(cls.tmpdir.name,'test.fullforms')
+        cls.lexicon = lookup.Lexicon(dictline_fnames=[cls.dictline_fname],fullforms_fname=cls.fname)
+        cls.lexicon.build_fullforms()
+        cls.plain = lookup.Lexicon(dictline_fnames=[cls.dictline_fname])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.lexicon.fullforms.close()
+        cls.tmpdir.cleanup()
+
+    def test_table_opened(self):
+        self.assertIsNotNone(self.lexicon.fullforms)
+        self.assertIsNone(self.plain.warm().fullforms)
+        self.assertIn('aqvae',self.lexicon.fullforms)
+        self.assertNotIn('aquae',self.lexicon.fullforms)  # Forms are in v and i spelling
+        self.assertNotIn('xyzzy',self.lexicon.fullforms)
+
+    def test_same_matches(self):
+        forms = self.lexicon.compile_fullforms()
+        self.assertEqual(len(forms),len(self.lexicon.fullforms))
+        for form,matches in forms.items():
+            self.assertEqual(self.lexicon.fullforms.get(form),tuple(matches))
+        for form in random.Random(0).sample(sorted(forms),2000):
+            self.assertEqual(self.lexicon._simple_match(form),self.plain._simple_match(form))
+        words = ['aquae','Aquam','puellarum','aqvarumque','quicumque','xyzzy','a','']
+        self.assertEqual(self.lexicon.match_words(words),self.plain.match_words(words))
+        for w in words:
+            self.assertEqual(self.lexicon.match_word(w),self.plain.match_word(w))
+
+    def test_instrumentation(self):
+        self.lexicon.clear_match_cache()
+        stats = self.lexicon.enable_instrumentation()
+        self.lexicon.match_word('aquae')
+        self.lexicon.disable_instrumentation()
+        self.assertEqual(stats.counters['fullform_hits'],1)
+        self.assertEqual(stats.calls['find_endings'],0)
+
+    def test_stale_table(self):
+        # The table is only used with the files it was built from
+        self.assertIsNone(fullforms.open_fullforms(self.fname))
+        other = lookup.Lexicon(dictline_fnames=[lookup.DEFAULT_DICTLINE_FNAME],fullforms_fname=self.fname)
+        self.assertIsNone(other._open_fullforms())
+
+    def test_reload_closes_table(self):
+        # Reloading or clearing the lexicon closes the table it replaces
+        table = self.lexicon.fullforms
+        self.lexicon.load()
+        self.assertTrue(table._mm.closed)
+        self.assertIn('aqvae',self.lexicon.fullforms)
+        table = self.lexicon.fullforms
+        self.lexicon.clear()
+        self.assertTrue(table._mm.closed)
+        self.assertIsNone(self.lexicon.fullforms)
+        self.lexicon.load()
+        self.assertIn('aqvae',self.lexicon.fullforms)
+
+
+class TestStreaming(unittest.TestCase):
+    text = 'Puella in villa est.\nServus-que aquam "portat"; a\nvilla mag\nna est'
+
+    def test_iter_tokens(self):
+        tokens = ['puella','in','villa','est','servus','que','aquam','portat','villa','mag','na','est']
+        self.assertEqual(list(pwutils.iter_tokens(self.text)),tokens)
+        self.assertEqual(list(pwutils.iter_tokens(io.StringIO(self.text))),tokens)
+        self.assertEqual(list(pwutils.iter_tokens(self.text.splitlines(keepends=True))),tokens)
+        # Each line ends a word, with or without its newline
+        self.assertEqual(list(pwutils.iter_tokens(self.text.splitlines())),tokens)
+        self.assertEqual(list(pwutils.iter_tokens(['arma virum','cano troiae'])),['arma','virum','cano','troiae'])
+        # Words split between blocks are joined back together
+        long_text = 'puella '*(pwutils._block_size//5)
+        self.assertEqual(list(pwutils.iter_tokens(long_text)),long_text.split())
+        self.assertEqual(list(pwutils.iter_tokens(io.StringIO(long_text))),long_text.split())
+        self.assertEqual(list(pwutils.iter_tokens('')),[])
+
+    def test_iter_sentences(self):
+        sentences = self.text.replace('\n',' ').split('.')
+        self.assertEqual(list(pwutils.iter_sentences(self.text)),sentences)
+        self.assertEqual(list(pwutils.iter_sentences(io.StringIO(self.text))),sentences)
+        self.assertEqual(list(pwutils.iter_sentences(self.text.splitlines())),sentences)
+        self.assertEqual(list(pwutils.iter_sentences(self.text.splitlines(keepends=True))),sentences)
+        self.assertEqual(list(pwutils.iter_sentences(['Puella in villa','est. Servus.'])),
+                         ['Puella in villa est',' Servus',''])
+
+    def test_get_vocab_list_from_file(self):
+        self.assertEqual(pwutils.get_vocab_list(io.StringIO(self.text)),pwutils.get_vocab_list(self.text))
+
+
+class TestCorpus(unittest.TestCase):
+    text = 'Puella in villa est. Servus aquam portat. Villa magna est. Puella et servus in villa sunt xyzzy.'
+
+    def test_chunk_text(self):
+        chunks = list(corpus.chunk_text(self.text,chunk_size=10))
+        self.assertEqual(''.join(chunks),self.text)
+        self.assertTrue(all(c[-1] != ' ' and not c[0].isalpha() for c in chunks[1:]))
+
+    def test_analyze_text(self):
+        defns,missed = pwutils.get_vocab_list(self.text)
+        result = corpus.analyze_text(self.text,processes=1,chunk_size=20)
+        self.assertEqual(result.definitions,defns)
+        self.assertEqual(result.missed,['xyzzy'])
+        self.assertEqual(result.word_counts['villa'],3)
+        self.assertEqual(result.word_counts['est'],2)
+
+    def test_analyze_text_parallel(self):
+        self.assertEqual(corpus.analyze_text(self.text,processes=2,chunk_size=20),
+                         corpus.analyze_text(self.text,processes=1,chunk_size=20))
+
+    def test_chunk_size(self):
+        # Chunks only break where words are split, tabs don't split words
+        text = self.text.replace('villa est','villa\test').replace('aquam ','aquam\t')
+        expected = corpus.analyze_text(text,processes=1,chunk_size=len(text))
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir,'text.txt')
+            with open(fname,'w') as f:
+                f.write(text)
+            for chunk_size in range(1,30):
+                self.assertEqual(corpus.analyze_text(text,processes=1,chunk_size=chunk_size),expected)
+                self.assertEqual(corpus.analyze_files([fname],processes=1,chunk_size=chunk_size),expected)
+
+    def test_analyze_directory(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for i,sentence in enumerate(self.text.split('.')):
+                with open(os.path.join(tmpdir,'{0}.txt'.format(i)),'w') as f:
+                    f.write(sentence)
+            with open(os.path.join(tmpdir,'ignored.md'),'w') as f:
+                f.write('nauta')
+            result = corpus.analyze_directory(tmpdir,processes=1)
+        self.assertEqual(result,corpus.analyze_text(self.text,processes=1))
+
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.fname = os.path.join(self.tmpdir.name, 'test.snapshot')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_snapshot_round_trip(self):
+        lookup.build_snapshot(self.fname)
+        payload = snapshot.read_snapshot(self.fname)
+        self.assertIsNotNone(payload)
+        self.assertEqual(len(payload['dictline']),len(lookup.dictline))
+        self.assertEqual(payload['stem_index'],lookup.stem_index)
+        self.assertEqual(payload['tackon_suffix_set'],lookup.tackon_suffix_set)
+        aquae = lookup._simple_match('aquae')
+        self.assertEqual(len(aquae),1)
+        self.assertIn(aquae[0].dl_entry,[d['entry'] for d in payload['dictline']])
+
+    def test_missing_snapshot(self):
+        self.assertIsNone(snapshot.read_snapshot(self.fname))
+
+    def test_corrupt_snapshot(self):
+        lookup.build_snapshot(self.fname)
+        with open(self.fname,'r+b') as f:
+            f.seek(-8,os.SEEK_END)
+            f.write(b'\x00'*8)
+        self.assertIsNone(snapshot.read_snapshot(self.fname))
+
+    def test_wrong_version_snapshot(self):
+        lookup.build_snapshot(self.fname)
+        with open(self.fname,'r+b') as f:
+            f.seek(len(snapshot.SNAPSHOT_MAGIC))
+            f.write(struct.pack('>I',snapshot.SNAPSHOT_VERSION+1))
+        self.assertIsNone(snapshot.read_snapshot(self.fname))
+
+    def test_snapshot_has_inflection_caches(self):
+        lookup.build_snapshot(self.fname)
+        payload = snapshot.read_snapshot(self.fname)
+        caches = payload['inflection_caches']
+        # Every inflection signature in the dictionary has its stem endings precomputed
+        signatures = {definitions.get_inflection_signature(d['entry']) for d in payload['dictline']}
+        signatures = {sig for sig in signatures if sig[0] not in ['CONJ','INTERJ']}
+        self.assertEqual(set(caches['stem_endings'].keys()),signatures)
+        self.assertIn('1 1',caches['noun'])
+        self.assertIn('3 1',caches['verb'])
+
+        lookup.get_default_lexicon()._apply_snapshot_payload(payload)
+        entry = lookup.match_word('aquae')[0].dl_entry
+        self.assertEqual(definitions.get_possible_stem_endings(entry),
+                         caches['stem_endings'][definitions.get_inflection_signature(entry)])
+
+
+class TestLazyLoading(unittest.TestCase):
+    def test_import_does_not_load(self):
+        code = ('import pywords.utils, pywords.lookup as lookup, pywords.definitions as definitions;'
+                'print(lookup.get_default_lexicon().loaded, definitions.get_default_inflection_table().loaded)')
+        out = subprocess.run([sys.executable,'-c',code],capture_output=True,text=True,check=True).stdout
+        self.assertEqual(out.split(),['False','False'])
+
+    def test_warm(self):
+        ctx = lookup.warm()
+        self.assertTrue(ctx.loaded)
+        self.assertIs(lookup.warm(),ctx)
+        self.assertIs(lookup.dictline,ctx.dictline)
+        self.assertTrue(len(definitions.inflections['N']) > 0)
+
+    def test_legacy_globals(self):
+        self.assertTrue(len(lookup.stem_index) > 0)
+        with self.assertRaises(AttributeError):
+            lookup.not_a_global
+
+
+class TestLexicon(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.extra_fname = os.path.join(self.tmpdir.name,'EXTRA.tsv')
+        with open(lookup.DEFAULT_DICTLINE_FNAME) as f:
+            header = f.readline()
+        with open(self.extra_fname,'w') as f:
+            f.write(header)
+            f.write('\t'.join(['0','pyword','pyword','','','N','2 2 N T','2','2','N','','T','',
+                               'X','X','X','A','X','PyWORDS test word;'])+'\n')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_default_lexicon(self):
+        lexicon = lookup.get_default_lexicon()
+        self.assertIs(lookup.warm(),lexicon)
+        self.assertIs(lexicon.inflections,definitions.get_default_inflection_table())
+        self.assertEqual(lookup.match_word('aquae'),lexicon.match_word('aquae'))
+
+    def test_extended_lexicon(self):
+        extended = lookup.Lexicon(dictline_fnames=[lookup.DEFAULT_DICTLINE_FNAME,self.extra_fname])
+        self.assertFalse(extended.loaded)
+        matches = extended.match_word('pywordum')
+        self.assertEqual([m.dl_entry.senses for m in matches],['PyWORDS test word;'])
+        self.assertEqual(extended.match_word('aquae'),lookup.match_word('aquae'))
+        self.assertEqual(len(extended.dictline),len(lookup.dictline)+1)
+        # The default lexicon and its cache are unaffected
+        self.assertEqual(lookup.match_word('pywordum'),[])
+        self.assertIsNot(extended.inflections,lookup.get_default_lexicon().inflections)
+
+    def test_extended_uniques(self):
+        uniques_fname = os.path.join(self.tmpdir.name,'UNIQUES.tsv')
+        with open(os.path.join(os.path.dirname(definitions.__file__),'data/UNIQUES.tsv')) as f:
+            header = f.readline()
+        with open(uniques_fname,'w') as f:
+            f.write(header)
+            f.write('\t'.join(['pywordo','pywordo','N','2','2','ABL','S','N','','','','','','','XXXAX',
+                               'PyWORDS test form;'])+'\n')
+        extended = lookup.Lexicon(uniques_fname=uniques_fname)
+        m = extended.match_word('pywordo')[0]
+        # The inflections come with the match, whichever lexicon it is from
+        self.assertEqual(lookup.get_word_inflections(m),extended.get_word_inflections(m))
+        self.assertEqual([i.case for i in lookup.get_match_inflections(m)],['ABL'])
+        self.assertEqual(lookup.match_word('pywordo'),[])
+
+    def test_lexicon_snapshot(self):
+        fname = os.path.join(self.tmpdir.name,'extra.snapshot')
+        extended = lookup.Lexicon(dictline_fnames=[self.extra_fname],snapshot_fname=fname)
+        extended.warm()
+        # Loading only reads snapshots, they are built explicitly
+        self.assertFalse(os.path.exists(fname))
+        self.assertEqual(extended.build_snapshot(),fname)
+        self.assertTrue(os.path.exists(fname))
+        sources = extended.dictline_fnames + [extended.inflections.fname,extended.tackons_fname,
+                                             extended.uniques_fname,extended.esse_fname] + snapshot.module_fnames
+        payload = snapshot.read_snapshot(fname,sources)
+        self.assertEqual(len(payload['dictline']),1)
+        # A snapshot is only valid for the files it was built from
+        self.assertIsNone(snapshot.read_snapshot(fname))
+        reloaded = lookup.Lexicon(dictline_fnames=[self.extra_fname],snapshot_fname=fname).warm()
+        self.assertEqual(len(reloaded.match_word('pywordi')),1)
+
+
+class TestThreadSafety(unittest.TestCase):
+    n_threads = 16
+
+    def setUp(self):
+        with open(os.path.join(os.path.dirname(definitions.__file__),'data/lingualatina_voclist.txt')) as f:
+            self.words = list(pwutils.iter_tokens(f.read()[:6000]))
+        # Switch threads often, so they interleave within the loading and caching code
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-5)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switch_interval)
+
+    def test_concurrent_match_word(self):
+        reference = lookup.Lexicon()
+        expected = {w: reference.match_word(w) for w in self.words}
+        # Nothing is loaded yet, all threads start looking up words at once; the small match cache
+        # keeps evicting words, so most lookups go through the inflection caches
+        shared = lookup.Lexicon(match_cache_size=50)
+        barrier = threading.Barrier(self.n_threads)
+        errors = []
+
+        def worker(seed):
+            words = list(self.words)
+            random.Random(seed).shuffle(words)
+            barrier.wait()
+            try:
+                if seed % 2:
+                    results = shared.match_words(words)
+                else:
+                    results = [shared.match_word(w) for w in words]
+                errors.extend(w for w,r in zip(words,results) if r != expected[w])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker,args=(i,)) for i in range(self.n_threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors,[])
+        self.assertEqual(shared.inflections.get_caches(),reference.inflections.get_caches())
+        # Every lookup was counted once; match_words() looks up each distinct word once
+        info = shared.match_cache_info()
+        n_distinct = len({w.replace('j','i').replace('u','v') for w in self.words})
+        self.assertEqual(info.hits+info.misses,self.n_threads//2*(len(self.words)+n_distinct))
+        self.assertEqual(info.size,50)
+
+
+class TestService(unittest.TestCase):
+    words = ['aquae','rosa','amat','aqvae','xyzzy','puella','aquae','est']
+
+    def run_with_service(self, client_func, **kwargs):
+        """
+        Start a LookupService on a free port and run client_func(port) in a thread, return its result
+        """
+        async def run():
+            lookup_service = service.LookupService(**kwargs)
+            server = await lookup_service.start(port=0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                return await asyncio.get_running_loop().run_in_executor(None, client_func, port)
+            finally:
+                server.close()
+                await server.wait_closed()
+                lookup_service.close()
+        return asyncio.run(run())
+
+    def test_client(self):
+        def client_func(port):
+            with service.ServiceClient(port=port) as client:
+                return (client.match_word('aquae'), client.match_words(self.words),
+                        client.get_dictionary_string('aquae'), client.get_word_inflections('aquae'),
+                        client.analyze_word('amatus'))
+        matches,all_matches,dict_strs,infl_strs,analyses = self.run_with_service(client_func)
+        self.assertEqual(matches,[service._match_to_json(m) for m in lookup.match_word('aquae')])
+        self.assertEqual(matches[0]['entry']['senses'],lookup.match_word('aquae')[0].dl_entry.senses)
+        self.assertEqual(all_matches,[[service._match_to_json(m) for m in lookup.match_word(w)] for w in self.words])
+        self.assertEqual(dict_strs,[lookup.get_dictionary_string(m) for m in lookup.match_word('aquae')])
+        self.assertEqual(infl_strs,lookup.get_word_inflections(lookup.match_word('aquae')[0]))
+        self.assertEqual(analyses,[a.to_dict() for a in lookup.analyze_word('amatus')])
+
+    def test_errors(self):
+        def client_func(port):
+            errors = []
+            with service.ServiceClient(port=port) as client:
+                for method,params in [('not_a_method',{}),('match_word',{}),('match_word',{'words':['a']})]:
+                    try:
+                        client.request(method,**params)
+                    except RuntimeError as e:
+                        errors.append(str(e))
+                # Invalid JSON gets an error response too, and the connection stays usable
+                client._file.write(b'{not json\n')
+                client._file.flush()
+                errors.append(json.loads(client._file.readline())['error'])
+                self.assertTrue(client.match_word('aquae'))
+            return errors
+        errors = self.run_with_service(client_func)
+        self.assertEqual(len(errors),4)
+        self.assertTrue(errors[0].startswith('Unknown method'))
+        self.assertTrue(errors[3].startswith('Invalid JSON'))
+
+    def test_long_lines(self):
+        def client_func(port):
+            with service.ServiceClient(port=port) as client:
+                # Longer than the default StreamReader limit of 64 KiB
+                long_results = client.match_words(['aquae']*12000)
+                with self.assertRaises(RuntimeError) as cm:
+                    client.match_words(['aquae']*120000)
+                # The rest of the line was skipped, the connection stays usable
+                return long_results,str(cm.exception),client.match_word('aquae')
+        long_results,error,matches = self.run_with_service(client_func,max_line_size=2**17)
+        self.assertEqual(long_results,[matches]*12000)
+        self.assertEqual(error,'Request line longer than 131072 bytes')
+        self.assertEqual(matches,[service._match_to_json(m) for m in lookup.match_word('aquae')])
+
+    def test_custom_lexicon(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            extra_fname = os.path.join(tmpdir,'EXTRA.tsv')
+            with open(lookup.DEFAULT_DICTLINE_FNAME) as f:
+                header = f.readline()
+            with open(extra_fname,'w') as f:
+                f.write(header)
+                f.write('\t'.join(['0','pyword','pyword','','','N','2 2 N T','2','2','N','','T','',
+                                   'X','X','X','A','X','PyWORDS test word;'])+'\n')
+            extended = lookup.Lexicon(dictline_fnames=[extra_fname])
+
+            def client_func(port):
+                with service.ServiceClient(port=port) as client:
+                    return (client.get_dictionary_string('pywordum'),client.get_word_inflections('pywordi'),
+                            client.analyze_word('pywordum'))
+            dict_strs,infl_strs,analyses = self.run_with_service(client_func,lexicon=extended)
+        m = extended.match_word('pywordum')[0]
+        self.assertEqual(dict_strs,[extended.get_dictionary_string(m)])
+        self.assertEqual(infl_strs,extended.get_word_inflections(extended.match_word('pywordi')[0]))
+        self.assertEqual(analyses,[a.to_dict() for a in extended.analyze_word('pywordum')])
+
+    def test_internal_type_errors(self):
+        # Only bad parameters are reported as such, other TypeErrors are errors of the method
+        async def run():
+            lookup_service = service.LookupService()
+            lookup_service.lexicon.warm()
+            responses = [await lookup_service.handle_request({'method': 'match_word','word': 5}),
+                         await lookup_service.handle_request({'method': 'match_word','word': 'a','less': True})]
+            lookup_service.close()
+            return responses
+        responses = asyncio.run(run())
+        self.assertTrue(responses[0]['error'].startswith('TypeError: '))
+        self.assertTrue(responses[1]['error'].startswith('Invalid parameters for match_word'))
+
+    def test_batching(self):
+        async def run():
+            lookup_service = service.LookupService(max_batch_size=100,max_delay=0.05)
+            lookup_service.lexicon.warm()
+            results = await asyncio.gather(*[lookup_service.match_word(w) for w in self.words*10])
+            lookup_service.close()
+            return lookup_service,results
+        lookup_service,results = asyncio.run(run())
+        self.assertEqual(results,[lookup.match_word(w) for w in self.words*10])
+        # All concurrent requests were matched in one batch
+        self.assertEqual((lookup_service.batches,lookup_service.batched_words),(1,len(self.words)*10))
+
+    def test_batch_tasks(self):
+        async def run():
+            lookup_service = service.LookupService(max_delay=10)
+            lookup_service.lexicon.warm()
+            # Running batches are referenced by the service until they are done
+            request = asyncio.ensure_future(lookup_service.match_word('aquae'))
+            await asyncio.sleep(0)
+            lookup_service._flush()
+            self.assertEqual(len(lookup_service._tasks),1)
+            matches = await request
+            await asyncio.sleep(0)
+            self.assertEqual(lookup_service._tasks,set())
+            # Closing the service cancels the requests of pending and running batches
+            running = asyncio.ensure_future(lookup_service.match_word('rosa'))
+            await asyncio.sleep(0)
+            lookup_service._flush()
+            pending = asyncio.ensure_future(lookup_service.match_word('amat'))
+            await asyncio.sleep(0)
+            lookup_service.close()
+            results = await asyncio.gather(running,pending,return_exceptions=True)
+            return matches,results
+        matches,results = asyncio.run(run())
+        self.assertEqual(matches,lookup.match_word('aquae'))
+        self.assertTrue(all(isinstance(r,asyncio.CancelledError) for r in results))
+
+    def test_batch_errors(self):
+        class FailingLexicon(lookup.Lexicon):
+            def match_word(self, w, use_tricks=False):
+                if w == 'fail':
+                    raise RuntimeError('failed on purpose')
+                return super().match_word(w, use_tricks)
+
+            def match_words(self, words, use_tricks=False):
+                return [self.match_word(w, use_tricks) for w in words]
+
+        async def run(lexicon, requests):
+            lookup_service = service.LookupService(lexicon,max_batch_size=100,max_delay=0.05)
+            lookup_service.lexicon.warm()
+            responses = await asyncio.gather(*[lookup_service.handle_request(r) for r in requests])
+            lookup_service.close()
+            return lookup_service.batches,responses
+        # A malformed request from one client doesn't fail the others in its batch
+        batches,responses = asyncio.run(run(None,[{'id': 1,'method': 'match_word','word': 'aqua'},
+                                                  {'id': 2,'method': 'match_word','word': 5},
+                                                  {'id': 3,'method': 'match_words','words': ['rosa',5]}]))
+        self.assertEqual(responses[0]['result'],[service._match_to_json(m) for m in lookup.match_word('aqua')])
+        self.assertIn('error',responses[1])
+        self.assertIn('error',responses[2])
+        # Neither does a word which fails to match
+        batches,responses = asyncio.run(run(FailingLexicon(),[{'id': 1,'method': 'match_word','word': 'aqua'},
+                                                              {'id': 2,'method': 'match_word','word': 'fail'}]))
+        self.assertEqual(batches,1)
+        self.assertEqual(responses[0]['result'],[service._match_to_json(m) for m in lookup.match_word('aqua')])
+        self.assertEqual(responses[1]['error'],'RuntimeError: failed on purpose')
+
+
+class TestCLI(unittest.TestCase):
+    text = 'Puella aquam portat. Et heu xyzzy amatus'
+
+    def run_cli(self, *args):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            fname = os.path.join(tmpdir,'text.txt')
+            with open(fname,'w') as f:
+                f.write(self.text)
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                self.assertEqual(cli.main([fname]+list(args)),0)
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_output(self):
+        records = self.run_cli()
+        self.assertEqual([r['token'] for r in records],list(pwutils.iter_tokens(self.text)))
+        aquam = records[1]['matches'][0]
+        self.assertEqual(aquam['entry'],{name: getattr(lookup.dictline[aquam['id']]['entry'],name)
+                                         for name in lookup.dictline[aquam['id']]['entry']._fields})
+        self.assertEqual((aquam['stem'],aquam['ending'],aquam['pos']),('aqu','am','N'))
+        self.assertEqual([(i['pos'],i['case'],i['number']) for i in aquam['inflections']],[('N','ACC','S')])
+        self.assertEqual(records[5]['matches'],[])
+        self.assertEqual(records,cli.analyze_tokens(list(pwutils.iter_tokens(self.text))))
+
+    def test_jobs(self):
+        self.assertEqual(self.run_cli('--jobs','2','--batch-size','2'),self.run_cli())
+        # Batches and jobs can't be empty
+        for args in [['--batch-size','0'],['--batch-size','-1'],['--jobs','0'],['--batch-size','x']]:
+            with self.assertRaises(SystemExit),contextlib.redirect_stderr(io.StringIO()):
+                cli.get_parser().parse_args(args)
+
+    def test_filters(self):
+        records = self.run_cli('--parts-of-speech','V,ADJ','--cases','NOM')
+        self.assertEqual(records[1]['matches'],[])
+        amatus = records[6]['matches']
+        self.assertEqual(sorted(m['pos'] for m in amatus),['ADJ','V'])
+        self.assertTrue(all(i['case'] == 'NOM' for m in amatus for i in m['inflections']))
+
+    def test_unique(self):
+        est,aquam = cli.analyze_tokens(['est','aquam'])
+        self.assertEqual([(m['id'],m['unique'],m['stem'],m['pos']) for m in est['matches']],[(-1,True,'est','V')])
+        self.assertTrue(est['matches'][0]['inflections'])
+        self.assertFalse(aquam['matches'][0]['unique'])
+
+    def test_substantives(self):
+        records = cli.analyze_tokens(['bonum','amicus'])
+        self.assertIn('N',[m['pos'] for m in records[0]['matches']])
+        records = cli.analyze_tokens(['bonum','amicus'],MatchFilter(substantives=False))
+        self.assertEqual([[m['pos'] for m in r['matches']] for r in records],[['ADJ'],['ADJ']])
+        self.assertEqual(cli.build_filter(cli.get_parser().parse_args(['--no-substantives'])).substantives,False)
+        self.assertEqual(len(lookup.match_word('bonum')),3)  # The cached matches are left alone
+
+
 if __name__ == '__main__':
     lookup.lookup_word('praedium')
     lookup.lookup_word('applicatus')